@@ -0,0 +1,182 @@
+// Draws the SCF / DOS charts of fair_summarized_*.md pages and the band
+// structures written by `fair visualize`.
+//
+// The pages only contain placeholder divs (class "fair-chart" or
+// "fair-bands"); the data lives in binary sidecar files (raw little-endian
+// float32/float64 rows, or quantized uint16 band energies next to a small
+// *_bands.json). A sidecar is fetched once its chart scrolls into view, so
+// long pages and mkdocs builds do not carry the series.
+
+let googleChartsReady = null;
+
+function loadGoogleCharts() {
+  if (googleChartsReady) return googleChartsReady;
+  googleChartsReady = new Promise((resolve, reject) => {
+    const start = () => {
+      google.charts.load('current', {'packages': ['corechart']});
+      google.charts.setOnLoadCallback(resolve);
+    };
+    if (typeof google !== 'undefined' && google.charts) return start();
+    const s = document.createElement('script');
+    s.src = 'https://www.gstatic.com/charts/loader.js';
+    s.async = true;
+    s.onload = start;
+    s.onerror = () => {
+      googleChartsReady = null;
+      reject(new Error('Failed to load Google Charts'));
+    };
+    document.head.appendChild(s);
+  });
+  return googleChartsReady;
+}
+
+function fetchChecked(url, kind) {
+  return fetch(url).then(r => {
+    if (!r.ok) throw new Error('Failed to fetch ' + url + ': ' + r.status);
+    return r[kind]();
+  });
+}
+
+function readRows(buffer, dtype, nColumns) {
+  const values = dtype === 'float64' ? new Float64Array(buffer) : new Float32Array(buffer);
+  const rows = [];
+  for (let i = 0; i + nColumns <= values.length; i += nColumns) {
+    const row = new Array(nColumns);
+    for (let j = 0; j < nColumns; j++) {
+      const v = values[i + j];
+      row[j] = Number.isNaN(v) ? null : v; // Google Charts wants null for gaps
+    }
+    rows.push(row);
+  }
+  return rows;
+}
+
+function drawFairChart(container) {
+  const src = container.dataset.src;
+  const columns = JSON.parse(container.dataset.columns || '[]');
+  const options = JSON.parse(container.dataset.options || '{}');
+
+  Promise.all([fetchChecked(src, 'arrayBuffer'), loadGoogleCharts()])
+    .then(([buffer]) => {
+      const data = new google.visualization.DataTable();
+      columns.forEach(label => data.addColumn('number', label));
+      data.addRows(readRows(buffer, container.dataset.dtype, columns.length));
+      new google.visualization.LineChart(container).draw(data, options);
+    })
+    .catch(err => {
+      console.error('charts.js:', err);
+      container.textContent = 'Chart could not be loaded: ' + String(err);
+      delete container.dataset.loaded;
+    });
+}
+
+// --- Band structures (bands.write_band_structure) ---
+
+const LITTLE_ENDIAN = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+function readBandEnergies(buffer, layout) {
+  // (spin, band, kpoint) energies in eV: offset + scale * uint16
+  const count = layout.shape.reduce((a, b) => a * b, 1);
+  const energies = new Float64Array(count);
+  if (LITTLE_ENDIAN) {
+    const raw = new Uint16Array(buffer, 0, count); // The file layout; no copy or parsing
+    for (let i = 0; i < count; i++) energies[i] = layout.offset + layout.scale * raw[i];
+  } else {
+    const view = new DataView(buffer);
+    for (let i = 0; i < count; i++) energies[i] = layout.offset + layout.scale * view.getUint16(2 * i, true);
+  }
+  return energies;
+}
+
+function bandRows(meta, energies) {
+  // One row per k-point and one column per (spin, band). A row of nulls
+  // between segments stops the lines from joining across a path jump.
+  const [nSpin, nBands, nK] = meta.energies.shape;
+  const nSeries = nSpin * nBands;
+  const rows = [];
+  meta.segments.forEach(([start, stop], i) => {
+    if (i > 0) rows.push([meta.distances[start], ...new Array(nSeries).fill(null)]);
+    for (let k = start; k < stop; k++) {
+      const row = new Array(nSeries + 1);
+      row[0] = meta.distances[k];
+      for (let s = 0; s < nSeries; s++) row[s + 1] = energies[s * nK + k];
+      rows.push(row);
+    }
+  });
+  return rows;
+}
+
+const BAND_REFERENCES = {vbm: 'E - E_VBM (eV)', fermi: 'E - E_F (eV)', absolute: 'Energy (eV)'};
+
+function drawBandStructure(container) {
+  const src = new URL(container.dataset.src, document.baseURI);
+  const metaReady = fetchChecked(src, 'json');
+  // The page names the sidecar, so both files are fetched at once
+  const sidecar = container.dataset.sidecar
+    ? fetchChecked(new URL(container.dataset.sidecar, src), 'arrayBuffer')
+    : metaReady.then(m => fetchChecked(new URL(m.energies.file, src), 'arrayBuffer'));
+
+  Promise.all([metaReady, sidecar, loadGoogleCharts()])
+    .then(([meta, buffer]) => {
+      const [nSpin, nBands] = meta.energies.shape;
+      const data = new google.visualization.DataTable();
+      data.addColumn('number', 'k');
+      const series = {};
+      for (let s = 0; s < nSpin; s++) {
+        for (let b = 0; b < nBands; b++) {
+          data.addColumn('number', (nSpin > 1 ? (s ? 'Spin down ' : 'Spin up ') : '') + 'band ' + (meta.first_band + b + 1));
+          series[s * nBands + b] = {color: s ? '#d62728' : '#1f77b4'};
+        }
+      }
+      data.addRows(bandRows(meta, readBandEnergies(buffer, meta.energies)));
+      const ticks = meta.ticks.map(t => ({v: t.distance, f: t.label || ''}));
+      new google.visualization.LineChart(container).draw(data, {
+        legend: {position: 'none'},
+        series: series,
+        lineWidth: 1.5,
+        hAxis: {ticks: ticks, gridlines: {color: '#ccc'}},
+        vAxis: {title: BAND_REFERENCES[meta.reference] || 'Energy (eV)'},
+        chartArea: {width: '85%', height: '80%'},
+      });
+    })
+    .catch(err => {
+      console.error('charts.js:', err);
+      container.textContent = 'Band structure could not be loaded: ' + String(err);
+      delete container.dataset.loaded;
+    });
+}
+
+function loadCharts() {
+  const charts = Array.from(document.querySelectorAll('.fair-chart, .fair-bands'))
+    .filter(container => container.dataset.loaded !== 'true');
+  if (!charts.length) return;
+
+  const start = container => {
+    container.dataset.loaded = 'true'; // prevent double init
+    if (container.classList.contains('fair-bands')) drawBandStructure(container);
+    else drawFairChart(container);
+  };
+
+  if (!('IntersectionObserver' in window)) {
+    charts.forEach(start);
+    return;
+  }
+  const observer = new IntersectionObserver((entries, obs) => {
+    entries.forEach(entry => {
+      if (!entry.isIntersecting) return;
+      obs.unobserve(entry.target);
+      start(entry.target);
+    });
+  }, {rootMargin: '200px'});
+  charts.forEach(container => observer.observe(container));
+}
+
+// --- Run after full page load (fallback if instant nav disabled) ---
+document.addEventListener("DOMContentLoaded", loadCharts);
+
+// --- Run after every Material page navigation ---
+if (typeof document$ !== "undefined") {
+  document$.subscribe(() => {
+    loadCharts();
+  });
+}
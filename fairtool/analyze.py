@@ -2,153 +2,605 @@
 
 """Handles the analysis of parsed calculation data."""
 
+import hashlib
 import json
 import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import yaml # For config file
-import pandas as pd # Example: for creating summary tables
+import numpy as np
 
-# Optional: Import pymatgen or other analysis libraries
-# from pymatgen.core import Structure
-# from pymatgen.electronic_structure.dos import CompleteDos
-# from pymatgen.electronic_structure.bandstructure import BandStructureSymmLine
+from .archive import is_parsed_archive, load_archive
+from .cache import CACHE_DIRNAME, input_fingerprint
+from .index import extract_key_scalars, find_parsed_archives
+from .results import DEFAULT_BATCH_SIZE, ResultsStore, results_path
+from .trajectory import step_scalars
+from .units import J_PER_EV
 
 log = logging.getLogger("fairtool")
 
-def run_analysis(input_path: Path, output_dir: Path, config_path: Optional[Path]):
+HBAR = 1.054571817e-34  # J s
+ELECTRON_MASS = 9.1093837015e-31  # kg
+
+# Memoized task results of an archive live next to its parse cache record.
+ANALYSIS_RECORD_SUFFIX = ".analysis"
+ANALYSIS_RECORD_SCHEMA = 1
+
+
+# --- Helpers ---
+
+def _first(items: Any) -> dict:
+    return items[0] if isinstance(items, list) and items and isinstance(items[0], dict) else {}
+
+
+def _last(items: Any) -> dict:
+    return items[-1] if isinstance(items, list) and items and isinstance(items[-1], dict) else {}
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _Calculation:
+    """The pieces of one archive the analysis tasks work on, looked up once."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.run = _first(data.get("run"))
+        self.calculations = self.run.get("calculation") if isinstance(self.run.get("calculation"), list) else []
+        self.last = _last(self.calculations)
+
+    @cached_property
+    def scalars(self) -> Dict[str, Any]:
+        return extract_key_scalars(self.data)
+
+    @cached_property
+    def step(self) -> Dict[str, float]:
+        return step_scalars(self.last)
+
+    @cached_property
+    def dos(self) -> dict:
+        return _first(self.last.get("dos_electronic"))
+
+    @cached_property
+    def labels(self) -> List[str]:
+        labels = (_last(self.run.get("system")).get("atoms") or {}).get("labels")
+        return labels if isinstance(labels, list) else []
+
+
+# --- Task registry ---
+
+class AnalysisTask:
     """
-    Performs analysis on parsed data (JSON file or directory of JSON files).
+    A named analysis producing a fixed set of result columns.
 
     Args:
-        input_path: Path to the parsed JSON file or directory.
-        output_dir: Directory to save analysis results.
-        config_path: Optional path to a YAML configuration file for analysis tasks.
+        name: Name used in the config file.
+        version: Bump it whenever the results change; memoized results of
+            other versions are recomputed.
+        paths: Archive subtrees the task reads (see archive.ArchiveReader.select).
+        columns: Result column names and types (see results.COLUMN_TYPES).
+        function: Called as function(calculation, options) and returns a dict
+            with a value for each column.
     """
-    config = {}
-    if config_path:
-        log.info(f"Loading analysis configuration from: {config_path}")
-        try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-        except Exception as e:
-            log.error(f"Failed to load config file {config_path}: {e}")
-            # Decide if analysis can proceed without config or should exit
-            # return
 
-    # --- Find input files ---
-    if input_path.is_file() and input_path.suffix == '.json':
-        files_to_analyze = [input_path]
-    elif input_path.is_dir():
-        log.info(f"Searching for parsed JSON files (*_parsed.json) in: {input_path}")
-        files_to_analyze = sorted(list(input_path.rglob("*_parsed.json")))
-        if not files_to_analyze:
-             log.warning(f"No '*_parsed.json' files found in {input_path}")
-             return
-    else:
-        log.error(f"Input path must be a JSON file or a directory containing them: {input_path}")
-        return
+    def __init__(self, name: str, version: int, paths: List[str], columns: Dict[str, str],
+                 function: Callable[[_Calculation, Dict[str, Any]], Dict[str, Any]]):
+        self.name = name
+        self.version = version
+        self.paths = list(paths)
+        self.columns = dict(columns)
+        self.function = function
 
-    log.info(f"Found {len(files_to_analyze)} JSON file(s) to analyze.")
+    def run(self, calc: _Calculation, options: Dict[str, Any]) -> Dict[str, Any]:
+        values = self.function(calc, options)
+        return {column: values.get(column) for column in self.columns}
 
-    analysis_results = [] # Store results from each file if creating a summary
+    def key(self, sha256: str, options: Dict[str, Any]) -> str:
+        """Memoization key of the results of this task for an archive with the given digest."""
+        payload = {"archive": sha256, "task": self.name, "version": self.version, "options": options}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
 
-    for file in files_to_analyze:
-        log.info(f"Analyzing data from: {file.name}")
-        try:
-            with open(file, 'r') as f:
-                parsed_data = json.load(f)
-
-            # --- Perform Analysis ---
-            # This is where you add your specific analysis logic.
-            # Examples:
-            # 1. Extract key properties (energy, band gap, forces)
-            # 2. Check convergence
-            # 3. Calculate derived quantities (e.g., formation energy if multiple calcs)
-            # 4. Generate data for plots (DOS, band structure) - often done in visualize step too
-
-            result = perform_single_file_analysis(parsed_data, config, file.stem)
-            analysis_results.append(result)
-
-            # --- Save individual results (optional) ---
-            # Example: Save a small summary YAML for this specific file
-            individual_output_path = output_dir / f"{file.stem}_analysis.yaml"
-            log.debug(f"Saving individual analysis summary to {individual_output_path}")
-            with open(individual_output_path, 'w') as f:
-                yaml.dump(result, f, default_flow_style=False)
-
-        except json.JSONDecodeError:
-            log.error(f"Failed to decode JSON from {file.name}. Skipping.")
+
+TASKS: Dict[str, AnalysisTask] = {}
+
+
+def analysis_task(name: str, version: int, paths: List[str], columns: Dict[str, str]):
+    """Decorator registering a function as the analysis task `name` (see AnalysisTask)."""
+    def register(function):
+        taken = {column for task in TASKS.values() if task.name != name for column in task.columns}
+        clashes = sorted(taken & set(columns))
+        if clashes:
+            raise ValueError(f"Analysis task '{name}' redefines result column(s): {', '.join(clashes)}")
+        TASKS[name] = AnalysisTask(name, version, paths, columns, function)
+        return function
+    return register
+
+
+# --- Tasks ---
+# Energies are in eV, forces in eV/Å, stresses in GPa, magnetic moments in
+# Bohr magnetons and effective masses in electron masses.
+
+@analysis_task("structure", 1,
+               paths=["results.material", "run.0.program", "run.0.system.-1.atoms.labels", "run.0.calculation.-1.energy"],
+               columns={"program": "string", "formula": "string", "n_atoms": "int64", "n_steps": "int64"})
+def _structure(calc, options):
+    return {
+        "program": calc.scalars["program"],
+        "formula": calc.scalars["formula"],
+        "n_atoms": calc.scalars["n_atoms"],
+        "n_steps": len(calc.calculations),
+    }
+
+
+@analysis_task("energies", 1, paths=["run.0.calculation.-1.energy"],
+               columns={"energy_total": "float64", "energy_free": "float64"})
+def _energies(calc, options):
+    return {"energy_total": calc.step["energy_total"], "energy_free": calc.step["energy_free"]}
+
+
+@analysis_task("band_gap", 1, paths=["results.properties.electronic.band_gap", "run.0.calculation.-1.band_gap"],
+               columns={"band_gap": "float64"})
+def _band_gap(calc, options):
+    gap = calc.scalars["band_gap"]
+    if gap is None:
+        gap = _first(calc.last.get("band_gap")).get("value")
+    return {"band_gap": _number(gap) / J_PER_EV}
+
+
+@analysis_task("forces", 1, paths=["run.0.calculation.-1.forces"],
+               columns={"force_max": "float64", "force_rms": "float64"})
+def _forces(calc, options):
+    return {"force_max": calc.step["force_max"], "force_rms": calc.step["force_rms"]}
+
+
+@analysis_task("stress", 1, paths=["run.0.calculation.-1.stress"],
+               columns={"pressure": "float64", "stress_max": "float64"})
+def _stress(calc, options):
+    return {"pressure": calc.step["pressure"], "stress_max": calc.step["stress_max"]}
+
+
+_DOS_PATHS = [
+    "run.0.calculation.-1.dos_electronic.0.energies",
+    "run.0.calculation.-1.dos_electronic.0.energy_fermi",
+]
+
+
+@analysis_task("magnetization", 1,
+               paths=_DOS_PATHS + ["run.0.calculation.-1.dos_electronic.0.total.*.value_integrated"],
+               columns={"magnetization": "float64"})
+def _magnetization(calc, options):
+    """Spin moment: N(up) - N(down) of the integrated DOS at the Fermi level."""
+    energies, fermi = calc.dos.get("energies"), calc.dos.get("energy_fermi")
+    channels = [channel.get("value_integrated") for channel in calc.dos.get("total") or [] if isinstance(channel, dict)]
+    if energies is None or fermi is None or len(channels) != 2 or any(c is None for c in channels):
+        return {"magnetization": np.nan}
+    up, down = (np.interp(fermi, energies, channel) for channel in channels)
+    return {"magnetization": float(up - down)}
+
+
+@analysis_task("convergence", 1,
+               paths=["run.0.method.0.scf", "run.0.calculation.-1.scf_iteration.*.energy.total",
+                      "results.properties.geometry_optimization"],
+               columns={"n_scf": "int64", "scf_converged": "bool", "geometry_converged": "bool"})
+def _convergence(calc, options):
+    """
+    scf_converged: the last two SCF energies agree within the SCF threshold.
+    geometry_converged: a geometry optimization met its energy tolerance.
+    Either is None when it cannot be decided (no threshold, not a relaxation).
+    """
+    iterations = [it for it in calc.last.get("scf_iteration") or [] if isinstance(it, dict)]
+    threshold = _number((_first(calc.run.get("method")).get("scf") or {}).get("threshold_energy_change"))
+    energies = [_number(((it.get("energy") or {}).get("total") or {}).get("value")) for it in iterations]
+    scf_converged = None
+    if threshold > 0 and len(energies) >= 2 and not np.isnan(energies[-2:]).any():
+        scf_converged = bool(abs(energies[-1] - energies[-2]) <= threshold)
+
+    optimization = ((calc.data.get("results") or {}).get("properties") or {}).get("geometry_optimization") or {}
+    difference = _number(optimization.get("final_energy_difference"))
+    tolerance = _number(optimization.get("convergence_tolerance_energy_difference"))
+    geometry_converged = None
+    if not (np.isnan(difference) or np.isnan(tolerance)):
+        geometry_converged = bool(abs(difference) <= tolerance)
+    return {"n_scf": len(iterations), "scf_converged": scf_converged, "geometry_converged": geometry_converged}
+
+
+@analysis_task("dos_features", 1,
+               paths=_DOS_PATHS + ["run.0.calculation.-1.dos_electronic.0.total.*.value",
+                                   "run.0.calculation.-1.dos_electronic.0.total.*.value_integrated"],
+               columns={"dos_fermi": "float64", "dos_gap": "float64", "dos_electrons": "float64"})
+def _dos_features(calc, options):
+    """
+    dos_fermi: states/eV at the Fermi level (all spin channels).
+    dos_gap: width of the DOS-free window around the Fermi level, where the
+        DOS stays below options['tolerance'] states/eV (default 1e-3).
+    dos_electrons: integrated DOS at the Fermi level.
+    """
+    features = {"dos_fermi": np.nan, "dos_gap": np.nan, "dos_electrons": np.nan}
+    energies, fermi = calc.dos.get("energies"), calc.dos.get("energy_fermi")
+    channels = [channel for channel in calc.dos.get("total") or [] if isinstance(channel, dict)]
+    values = [channel.get("value") for channel in channels]
+    if energies is None or fermi is None or not channels or any(v is None for v in values):
+        return features
+    energies = np.asarray(energies, dtype=float) / J_PER_EV
+    fermi = fermi / J_PER_EV
+    dos = np.sum(values, axis=0) * J_PER_EV  # states/J -> states/eV
+    features["dos_fermi"] = float(np.interp(fermi, energies, dos))
+
+    empty = dos < options.get("tolerance", 1e-3)
+    below = np.flatnonzero((energies <= fermi) & ~empty)
+    above = np.flatnonzero((energies >= fermi) & ~empty)
+    if features["dos_fermi"] >= options.get("tolerance", 1e-3):
+        features["dos_gap"] = 0.0
+    elif len(below) and len(above):
+        features["dos_gap"] = float(energies[above[0]] - energies[below[-1]])
+
+    integrated = [channel.get("value_integrated") for channel in channels]
+    if all(v is not None for v in integrated):
+        features["dos_electrons"] = float(sum(np.interp(fermi, energies, v) for v in integrated))
+    return features
+
+
+def _band_edge_mass(segments: List[Tuple[np.ndarray, np.ndarray]], edge: float, valence: bool) -> float:
+    """
+    Effective mass (in electron masses) at the band edge energy `edge`.
+
+    The band extremum closest to `edge` is located on the k-path and
+    E - E_edge = a |k - k_edge|^2 is fitted to up to three points on either
+    side of it within its segment; m* = hbar^2 / (2 |a|).
+    """
+    best = None
+    for distances, energies in segments:
+        side = energies <= edge + 1e-3 * J_PER_EV if valence else energies >= edge - 1e-3 * J_PER_EV
+        candidates = np.where(side, np.abs(energies - edge), np.inf)
+        k, band = np.unravel_index(np.argmin(candidates), candidates.shape)
+        if np.isfinite(candidates[k, band]) and (best is None or candidates[k, band] < best[0]):
+            best = (candidates[k, band], distances, energies[:, band], k)
+    if best is None:
+        return np.nan
+    _, distances, band, k = best
+    window = slice(max(k - 3, 0), k + 4)
+    dk2 = (distances[window] - distances[k]) ** 2
+    de = band[window] - band[k]
+    if not np.any(dk2 > 0):
+        return np.nan
+    curvature = np.sum(dk2 * de) / np.sum(dk2 ** 2)
+    if curvature == 0:
+        return np.nan
+    return float(HBAR ** 2 / (2 * abs(curvature)) / ELECTRON_MASS)
+
+
+@analysis_task("effective_mass", 1, paths=["run.0.calculation.-1.band_structure_electronic.0"],
+               columns={"mass_electron": "float64", "mass_hole": "float64"})
+def _effective_mass(calc, options):
+    """Parabolic band-edge masses along the band structure path (insulators only)."""
+    masses = {"mass_electron": np.nan, "mass_hole": np.nan}
+    band_structure = _first(calc.last.get("band_structure_electronic"))
+    gap = _first(band_structure.get("band_gap"))
+    homo, lumo = gap.get("energy_highest_occupied"), gap.get("energy_lowest_unoccupied")
+    cell = band_structure.get("reciprocal_cell")
+    if homo is None or lumo is None or not lumo > homo or cell is None:
+        return masses
+    cell = 2 * np.pi * np.asarray(cell, dtype=float)  # NOMAD stores the reciprocal cell without 2 pi
+    segments = []
+    for segment in band_structure.get("segment") or []:
+        kpoints, energies = segment.get("kpoints"), segment.get("energies")
+        if kpoints is None or energies is None:
             continue
-        except Exception as e:
-            log.error(f"Error analyzing {file.name}: {e}", exc_info=True)
-            # Decide whether to continue with other files or stop
+        cartesian = np.asarray(kpoints, dtype=float) @ cell
+        steps = np.linalg.norm(np.diff(cartesian, axis=0), axis=1)
+        distances = np.concatenate(([0.0], np.cumsum(steps)))
+        segments.append((distances, np.asarray(energies, dtype=float)[0]))  # First spin channel
+    if segments:
+        masses["mass_electron"] = _band_edge_mass(segments, lumo, valence=False)
+        masses["mass_hole"] = _band_edge_mass(segments, homo, valence=True)
+    return masses
 
-    # --- Save Aggregate Results (optional) ---
-    if analysis_results:
-        log.info("Aggregating analysis results...")
-        try:
-            # Example: Create a Pandas DataFrame and save as CSV
-            df = pd.DataFrame(analysis_results)
-            aggregate_csv_path = output_dir / "analysis_summary.csv"
-            df.to_csv(aggregate_csv_path, index=False)
-            log.info(f"Saved aggregate analysis summary to {aggregate_csv_path}")
-        except Exception as e:
-            log.error(f"Failed to save aggregate analysis results: {e}")
 
-    log.info("Analysis process completed.")
+@analysis_task("formation_energy", 1, paths=["run.0.system.-1.atoms.labels", "run.0.calculation.-1.energy"],
+               columns={"formation_energy": "float64"})
+def _formation_energy(calc, options):
+    """
+    Formation energy per atom relative to options['references'], a mapping
+    of element -> reference energy in eV/atom (e.g. of the elemental solids).
+    """
+    references = options.get("references") or {}
+    labels = calc.labels
+    energy = calc.step["energy_total"]
+    if not labels or np.isnan(energy) or any(label not in references for label in labels):
+        return {"formation_energy": np.nan}
+    return {"formation_energy": (energy - sum(float(references[label]) for label in labels)) / len(labels)}
+
+
+# Tasks run when the config does not list any.
+DEFAULT_TASKS = ["structure", "energies", "band_gap", "forces", "stress", "magnetization", "convergence"]
+
+# Every results table starts with these columns.
+KEY_COLUMNS = {"archive": "string", "analyzed": "float64"}
+
+# Upper bound on the archives a worker analyzes per task, so rows keep
+# streaming back to the writer on large projects.
+MAX_WORKER_BATCH = 64
 
+# Selected tasks with their options, as (task name, options) pairs.
+TaskSelection = List[Tuple[str, Dict[str, Any]]]
 
-def perform_single_file_analysis(data: dict, config: dict, identifier: str) -> dict:
+
+def select_tasks(config: Dict[str, Any]) -> TaskSelection:
     """
-    Placeholder function for analyzing data from a single parsed file.
+    Reads the tasks to run from an analysis config.
 
-    Args:
-        data: The loaded JSON data from the parser.
-        config: The analysis configuration dictionary.
-        identifier: A unique identifier for this calculation (e.g., filename stem).
+    'tasks' is a list of task names, where an entry may also be a one-key
+    mapping of the name to the task options, or a mapping of names to options:
 
-    Returns:
-        A dictionary containing key analysis results.
+        tasks:
+          - energies
+          - formation_energy:
+              references: {Si: -5.42}
+
+    Raises:
+        ValueError: For unknown task names.
     """
-    log.debug(f"Performing analysis for identifier: {identifier}")
-    results = {"identifier": identifier}
+    entries = config.get("tasks") or DEFAULT_TASKS
+    if isinstance(entries, dict):
+        entries = [{name: options} for name, options in entries.items()]
+    selection = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            selection.extend((str(name), dict(options or {})) for name, options in entry.items())
+        else:
+            selection.append((str(entry), {}))
+    unknown = [name for name, _ in selection if name not in TASKS]
+    if unknown:
+        raise ValueError(f"Unknown analysis task(s): {', '.join(unknown)}. Choose from: {', '.join(TASKS)}")
+    return selection
 
-    # --- Example Analysis Tasks ---
 
-    # Extract Total Energy (adjust path based on parser output structure)
-    try:
-        # This path is hypothetical - check electronic-parsers output format
-        energy = data.get("results", {}).get("properties", {}).get("energy", {}).get("total", {}).get("value")
-        results["total_energy_eV"] = energy
-    except (AttributeError, TypeError, KeyError):
-        log.debug(f"Could not extract total energy for {identifier}")
-        results["total_energy_eV"] = None
-
-    # Extract Band Gap (adjust path based on parser output structure)
+def known_column_types() -> Dict[str, str]:
+    """Types of every column a results table can hold (all registered tasks)."""
+    columns = dict(KEY_COLUMNS)
+    for task in TASKS.values():
+        columns.update(task.columns)
+    return columns
+
+
+def result_columns(tasks: TaskSelection) -> Dict[str, str]:
+    """Column names and types of a results table produced by the given tasks."""
+    columns = dict(KEY_COLUMNS)
+    for name, _ in tasks:
+        columns.update(TASKS[name].columns)
+    return columns
+
+
+def tasks_for_columns(columns: List[str]) -> TaskSelection:
+    """
+    The tasks (in registration order, default options) that produce the given columns.
+
+    Raises:
+        ValueError: For columns no task produces.
+    """
+    unknown = [column for column in columns if column not in known_column_types()]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}. Choose from: {', '.join(known_column_types())}")
+    return [(name, {}) for name, task in TASKS.items() if any(column in task.columns for column in columns)]
+
+
+# --- Memoization ---
+
+def analysis_record_path(archive: Path) -> Path:
+    """Location of the memoized task results of an archive."""
+    return archive.parent / CACHE_DIRNAME / f"{archive.name}{ANALYSIS_RECORD_SUFFIX}"
+
+
+def _load_analysis_record(archive: Path) -> Dict[str, Any]:
     try:
-        # Hypothetical path
-        band_gap = data.get("results", {}).get("properties", {}).get("electronic", {}).get("band_structure", {}).get("band_gap", [{}])[0].get("value")
-        results["band_gap_eV"] = band_gap
-    except (AttributeError, TypeError, KeyError, IndexError):
-        log.debug(f"Could not extract band gap for {identifier}")
-        results["band_gap_eV"] = None
-
-    # Check for convergence (adjust path based on parser output structure)
+        with open(analysis_record_path(archive), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(record, dict) or record.get("schema") != ANALYSIS_RECORD_SCHEMA:
+        return {}
+    return record
+
+
+def _write_analysis_record(archive: Path, record: Dict[str, Any]):
+    """Writes the record through a temporary file, so readers never see half of it."""
+    record_path = analysis_record_path(archive)
     try:
-        # Hypothetical path
-        converged = data.get("results", {}).get("workflow", [{}])[0].get("calculation_converged")
-        results["converged"] = converged
-    except (AttributeError, TypeError, KeyError, IndexError):
-         log.debug(f"Could not determine convergence status for {identifier}")
-         results["converged"] = None
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = record_path.with_name(f"{record_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, record_path)
+    except OSError as e:
+        log.warning(f"Could not write analysis record {record_path}: {e}")
 
 
-    # Add more analysis based on `config` if needed
-    # if config.get("calculate_dos_features"):
-    #     dos_features = calculate_dos(...)
-    #     results.update(dos_features)
+def analyze_archive(data: Dict[str, Any], tasks: Optional[TaskSelection] = None) -> Dict[str, Any]:
+    """
+    Runs analysis tasks on one parsed calculation.
 
-    log.info(f"Analysis summary for {identifier}: Energy={results.get('total_energy_eV')}, Gap={results.get('band_gap_eV')}, Converged={results.get('converged')}")
+    Args:
+        data: The (possibly sparse) archive; it must hold the paths of the tasks.
+        tasks: (name, options) pairs; DEFAULT_TASKS by default.
+
+    Returns:
+        Dict mapping the task name to its results, or to None if the task failed.
+    """
+    calc = _Calculation(data)
+    results = {}
+    for name, options in tasks or [(name, {}) for name in DEFAULT_TASKS]:
+        try:
+            results[name] = TASKS[name].run(calc, options)
+        except Exception as e:
+            log.warning(f"Analysis task '{name}' failed: {e}")
+            results[name] = None
+    return results
+
+
+def analyze_file(path: Path, tasks: Optional[TaskSelection] = None) -> Dict[str, Any]:
+    """
+    Returns the results row of an archive.
+
+    Task results are memoized per archive digest, task version and options
+    (see analysis_record_path), so only tasks that are new or changed since
+    the last run are computed, from just the archive subtrees they need.
+    """
+    tasks = tasks or [(name, {}) for name in DEFAULT_TASKS]
+    record = _load_analysis_record(path)
+    fingerprint = input_fingerprint(path, record)
+    memo = record.get("tasks") or {}
+    keys = {name: TASKS[name].key(fingerprint["sha256"], options) for name, options in tasks}
+
+    pending = [(name, options) for name, options in tasks if (memo.get(name) or {}).get("key") != keys[name]]
+    if pending:
+        paths = sorted({p for name, _ in pending for p in TASKS[name].paths})
+        computed = analyze_archive(load_archive(path, paths=paths), pending)
+        for name, values in computed.items():
+            if values is not None:
+                memo[name] = {"key": keys[name], "version": TASKS[name].version, "values": values}
+        _write_analysis_record(path, {"schema": ANALYSIS_RECORD_SCHEMA, "input": fingerprint, "tasks": memo})
+        log.debug(f"{path.name}: computed {', '.join(name for name, _ in pending)}")
+
+    row = {"archive": path.as_posix(), "analyzed": time.time()}
+    for name, _ in tasks:
+        entry = memo.get(name) or {}
+        values = entry.get("values") if entry.get("key") == keys[name] else None
+        row.update(values or dict.fromkeys(TASKS[name].columns))
+    return row
+
+
+def _analyze_batch(files: List[Path], tasks: TaskSelection) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """
+    Analyzes a batch of archives inside one worker process.
+
+    Returns:
+        list: One (row, error message) tuple per file; row is None if the file failed.
+    """
+    results = []
+    for file in files:
+        try:
+            results.append((analyze_file(file, tasks), None))
+        except Exception as e:
+            results.append((None, str(e)))
     return results
 
+
+def _worker_batch_size(n_files: int, workers: int) -> int:
+    """About four batches per worker, so one slow batch does not leave the others idle."""
+    return max(1, min(MAX_WORKER_BATCH, math.ceil(n_files / (workers * 4))))
+
+
+def iter_analysis_rows(files: List[Path], tasks: TaskSelection,
+                       jobs: int = 1) -> Iterator[Tuple[Path, Optional[dict], Optional[str]]]:
+    """
+    Yields (archive, row, error message) for every file, in the order of files.
+
+    With jobs > 1 the files are split into batches analyzed on a process
+    pool. Batches are collected in submission order, so the rows come out
+    in the same order as in a serial run while the workers keep going.
+    """
+    if jobs <= 1 or len(files) <= 1:
+        for file in files:
+            row, error = _analyze_batch([file], tasks)[0]
+            yield file, row, error
+        return
+
+    size = _worker_batch_size(len(files), jobs)
+    batches = [files[start:start + size] for start in range(0, len(files), size)]
+    workers = min(jobs, len(batches))
+    log.info(f"Analyzing {len(files)} archive(s) in {len(batches)} batch(es) with {workers} worker process(es).")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_analyze_batch, batch, tasks) for batch in batches]
+        for batch, future in zip(batches, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OOM killer); fail the whole batch
+                results = [(None, str(e))] * len(batch)
+            for file, (row, error) in zip(batch, results):
+                yield file, row, error
+
+
+def run_analysis(input_path: Path, output_dir: Path, config_path: Optional[Path],
+                 jobs: int = 1) -> Optional[Path]:
+    """
+    Performs analysis on parsed data (an archive or a directory of archives).
+
+    One row per archive is appended to a columnar results table
+    (fair_analysis.parquet, or fair_analysis.csv without pyarrow) in batches,
+    so the table can be queried without opening the archives again.
+
+    Each run deliberately rewrites the whole table instead of appending to
+    the previous one. A Parquet file cannot be extended in place, and part
+    files keyed by archive would leave superseded rows that every reader
+    (export, find_results, the `--where` scans) had to drop. The expensive
+    part is incremental instead: task results are memoized per archive (see
+    analyze_file), so an unchanged archive costs one small record read and
+    the rewrite is a sequential write of the rows.
+
+    With jobs > 1, worker processes analyze batches of archives and this
+    process writes their rows, in the same order as a serial run; an
+    archive that fails only loses its own row.
+
+    Args:
+        input_path: Path to a parsed archive or a directory holding them.
+        output_dir: Directory to save the results table in.
+        config_path: Optional YAML file; 'tasks' selects the TASKS to run
+            (see select_tasks; default: DEFAULT_TASKS), 'batch_size' the rows
+            written at once.
+        jobs: Number of worker processes (1 analyzes in this process).
+
+    Returns:
+        The path of the results table, or None if nothing was analyzed.
+    """
+    config = {}
+    if config_path:
+        log.info(f"Loading analysis configuration from: {config_path}")
+        try:
+            with open(config_path, 'r') as f:
+                config = yaml.safe_load(f) or {}
+        except Exception as e:
+            log.error(f"Failed to load config file {config_path}: {e}")
+    tasks = select_tasks(config)
+
+    # --- Find input files ---
+    if input_path.is_file() and is_parsed_archive(input_path):
+        files_to_analyze = [input_path]
+    elif input_path.is_dir():
+        log.info(f"Searching for parsed archives (fair_parsed_*.json/*.msgpack) in: {input_path}")
+        files_to_analyze = find_parsed_archives(input_path)
+        if not files_to_analyze:
+             log.warning(f"No 'fair_parsed_*' archives found in {input_path}")
+             return None
+    else:
+        log.error(f"Input path must be a parsed archive or a directory containing them: {input_path}")
+        return None
+
+    log.info(f"Found {len(files_to_analyze)} archive(s) to analyze.")
+
+    table_path = results_path(output_dir)
+    n_failed = 0
+    # Only this process writes the table, so workers never contend for it
+    with ResultsStore(table_path, result_columns(tasks),
+                      batch_size=config.get("batch_size", DEFAULT_BATCH_SIZE)) as store:
+        for file, row, error in iter_analysis_rows(files_to_analyze, tasks, jobs):
+            if row is None:
+                log.error(f"Error analyzing {file.name}: {error}")
+                n_failed += 1
+                continue
+            log.debug(f"Analyzed {file.name}")
+            store.append(row)
+
+    log.info(f"Saved analysis results of {store.n_rows} archive(s) to {table_path}"
+             + (f" ({n_failed} failed)" if n_failed else ""))
+    log.info("Analysis process completed.")
+    return table_path
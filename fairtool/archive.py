@@ -0,0 +1,428 @@
+# fairtool/archive.py
+
+"""Reading and writing of the parsed archives (fair_parsed_*.json / *.msgpack)."""
+
+import json
+import logging
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import msgpack
+import numpy as np
+
+from .prune import path_tree
+
+log = logging.getLogger("fairtool")
+
+# Supported on-disk formats of the parsed archive and their file suffixes.
+ARCHIVE_FORMATS = ("json", "msgpack")
+ARCHIVE_SUFFIXES = {"json": ".json", "msgpack": ".msgpack"}
+ARCHIVE_PREFIX = "fair_parsed_"
+
+# msgpack extension types: a numeric array as raw little-endian bytes, and a
+# reference to a subtree stored in another segment of the file.
+_EXT_NDARRAY = 1
+_EXT_SEGMENT = 2
+# Segmented msgpack archives start with this magic, followed by the length
+# of the segment table ([offset, length] per segment; segment 0 is the root).
+_SEGMENTED_MAGIC = b"\x89FAIRPK\x01"
+# Containers packing to at least this many bytes get their own segment.
+SEGMENT_MIN_BYTES = 16 * 1024
+# Shorter numeric lists are cheaper to keep as plain msgpack arrays.
+_MIN_BLOB_SIZE = 8
+_BLOB_DTYPES = {"f": "<f8", "i": "<i8", "u": "<u8"}
+
+
+def archive_path(output_dir: Path, base_name: str, archive_format: str = "json") -> Path:
+    """Returns the path of the parsed archive for base_name in the given format."""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format '{archive_format}'. Choose from: {', '.join(ARCHIVE_FORMATS)}")
+    return output_dir / f"{ARCHIVE_PREFIX}{base_name}{ARCHIVE_SUFFIXES[archive_format]}"
+
+
+def is_parsed_archive(path: Path) -> bool:
+    """True for fair_parsed_* files in one of the supported formats."""
+    return path.name.startswith(ARCHIVE_PREFIX) and path.suffix in ARCHIVE_SUFFIXES.values()
+
+
+def find_archives(path: Path, recursive: bool = True) -> List[Path]:
+    """
+    Finds the parsed archives below path (or path itself if it is one).
+
+    When the same calculation was saved in several formats, only the most
+    recently written file is returned.
+
+    Args:
+        path: A parsed archive or a directory to search.
+        recursive: If True, search all subdirectories.
+
+    Returns:
+        List[Path]: Sorted list of archive paths.
+    """
+    if path.is_file():
+        return [path] if is_parsed_archive(path) else []
+    if not path.is_dir():
+        return []
+
+    search_method = path.rglob if recursive else path.glob
+    newest: Dict[Path, Path] = {}
+    for candidate in search_method(f"{ARCHIVE_PREFIX}*"):
+        if not candidate.is_file() or not is_parsed_archive(candidate):
+            continue
+        key = candidate.with_suffix("")
+        current = newest.get(key)
+        if current is None or candidate.stat().st_mtime > current.stat().st_mtime:
+            newest[key] = candidate
+    return sorted(newest.values())
+
+
+# --- msgpack encoding ---
+
+def _leading_scalar(value: list) -> Any:
+    """Returns the first non-list element reached by following first items."""
+    while isinstance(value, list) and value:
+        value = value[0]
+    return value
+
+
+def _uniform_scalar_type(value: list) -> Optional[type]:
+    """int or float if every leaf of the nested list has that type, otherwise None."""
+    kind = None
+    stack = [value]
+    while stack:
+        for item in stack.pop():
+            if isinstance(item, list):
+                stack.append(item)
+                continue
+            if isinstance(item, bool) or not isinstance(item, (int, float)):
+                return None
+            item_kind = float if isinstance(item, float) else int
+            if kind is None:
+                kind = item_kind
+            elif item_kind is not kind:
+                return None
+    return kind
+
+
+def _encode_array(value: list) -> Optional[msgpack.ExtType]:
+    """
+    Packs a rectangular (nested) list of only ints or only floats into a typed
+    binary blob, or returns None. Mixed lists stay msgpack lists, so that
+    their integers do not come back as floats.
+    """
+    leading = _leading_scalar(value)
+    if isinstance(leading, bool) or not isinstance(leading, (int, float)):
+        return None
+    try:
+        array = np.asarray(value)
+    except (ValueError, OverflowError):
+        return None
+    dtype = _BLOB_DTYPES.get(array.dtype.kind)
+    if dtype is None or array.size < _MIN_BLOB_SIZE or _uniform_scalar_type(value) is None:
+        return None
+    array = np.ascontiguousarray(array, dtype=dtype)
+    header = struct.pack(f"<3sB{array.ndim}q", dtype.encode("ascii"), array.ndim, *array.shape)
+    return msgpack.ExtType(_EXT_NDARRAY, header + array.tobytes())
+
+
+def _pack(value: Any, packer: msgpack.Packer, segments: List[bytes], depth: int = 0) -> bytes:
+    """
+    Packs value bottom-up, moving every large container into its own segment.
+
+    Each container is packed exactly once: a parent is assembled from the
+    packed bytes of its children, which are only references for segments.
+    """
+    if isinstance(value, dict):
+        parts = [packer.pack_map_header(len(value))]
+        for key, item in value.items():
+            parts.append(packer.pack(key))
+            parts.append(_pack(item, packer, segments, depth + 1))
+        kind = b"d"
+    elif isinstance(value, list):
+        blob = _encode_array(value)
+        if blob is not None:
+            parts = [packer.pack(blob)]
+        else:
+            parts = [packer.pack_array_header(len(value))]
+            parts.extend(_pack(item, packer, segments, depth + 1) for item in value)
+        kind = b"l"
+    else:
+        return packer.pack(value)
+
+    packed = b"".join(parts)
+    if depth > 0 and len(packed) >= SEGMENT_MIN_BYTES:
+        segments.append(packed)
+        return packer.pack(msgpack.ExtType(_EXT_SEGMENT, struct.pack("<Qc", len(segments) - 1, kind)))
+    return packed
+
+
+def _decode_array(data: bytes) -> np.ndarray:
+    dtype, ndim = struct.unpack_from("<3sB", data)
+    shape = struct.unpack_from(f"<{ndim}q", data, 4)
+    offset = 4 + 8 * ndim
+    return np.frombuffer(data, dtype=dtype.decode("ascii"), offset=offset).reshape(shape)
+
+
+_MISSING = object()
+
+
+class _SegmentRef:
+    """Placeholder for a subtree stored in another segment of the archive."""
+    __slots__ = ("segment", "kind")
+
+    def __init__(self, segment: int, kind: bytes):
+        self.segment = segment
+        self.kind = kind
+
+    def stub(self):
+        return {} if self.kind == b"d" else []
+
+
+def _ext_hook(arrays: bool, load_segment=None):
+    """
+    Builds the msgpack ext_hook. Segment references are returned as
+    _SegmentRef placeholders, or decoded right away by load_segment if given.
+    """
+    def hook(code: int, data: bytes):
+        if code == _EXT_SEGMENT:
+            ref = _SegmentRef(*struct.unpack("<Qc", data))
+            return load_segment(ref.segment) if load_segment else ref
+        if code != _EXT_NDARRAY:
+            return msgpack.ExtType(code, data)
+        array = _decode_array(data)
+        return array if arrays else array.tolist()
+    return hook
+
+
+def _stub(value: Any) -> Any:
+    """Empty stand-in keeping list positions for items that were not requested."""
+    if isinstance(value, _SegmentRef):
+        return value.stub()
+    if isinstance(value, dict):
+        return {}
+    if isinstance(value, list):
+        return []
+    return None
+
+
+# --- Public API ---
+
+class ArchiveReader:
+    """
+    Path-addressed access to a parsed archive.
+
+    For segmented msgpack archives the file is memory-mapped and only the
+    segments on the requested paths are decoded, so reading a few subtrees
+    costs what those subtrees cost, not what the whole archive costs. JSON
+    archives (and msgpack archives written before segmentation) are loaded
+    in full and then served the same way.
+
+    Paths are dot-separated: dict keys, list indices (negative ones count
+    from the end) or '*' for every key/item, e.g. 'run.0.calculation.-1.energy'.
+    """
+
+    def __init__(self, path: Path, arrays: bool = False):
+        self.path = Path(path)
+        self._ext_hook = _ext_hook(arrays)
+        self._eager_hook = _ext_hook(arrays, self._load_segment)
+        self._file = None
+        self._map = None
+        self._table: List[List[int]] = []
+        self._segments: Dict[int, Any] = {}
+        self._root = None
+
+        if self.path.suffix != ARCHIVE_SUFFIXES["msgpack"]:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._root = json.load(f)
+            return
+
+        self._file = open(self.path, "rb")
+        header = self._file.read(len(_SEGMENTED_MAGIC) + 8)
+        if not header.startswith(_SEGMENTED_MAGIC):
+            # Plain msgpack document
+            self._file.seek(0)
+            self._root = self._unpack(self._file.read())
+            self.close()
+            return
+        (table_length,) = struct.unpack_from("<Q", header, len(_SEGMENTED_MAGIC))
+        self._table = self._unpack(self._file.read(table_length))
+        self._data_offset = len(header) + table_length
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _unpack(self, data) -> Any:
+        return msgpack.unpackb(data, raw=False, ext_hook=self._ext_hook)
+
+    def _segment_bytes(self, segment: int):
+        offset, length = self._table[segment]
+        start = self._data_offset + offset
+        return self._map[start:start + length]
+
+    def _load_segment(self, segment: int) -> Any:
+        """Decodes a segment including everything it references."""
+        return msgpack.unpackb(self._segment_bytes(segment), raw=False, ext_hook=self._eager_hook)
+
+    def _open(self, node: Any, cache: bool = True) -> Any:
+        """Decodes node if it is a segment reference (its children may still be references)."""
+        if not isinstance(node, _SegmentRef):
+            return node
+        segment = self._segments.get(node.segment)
+        if segment is None:
+            segment = self._unpack(self._segment_bytes(node.segment))
+            if cache:
+                self._segments[node.segment] = segment
+        return segment
+
+    def _resolve(self, node: Any) -> Any:
+        """Fully materializes node, loading every segment below it."""
+        if isinstance(node, _SegmentRef):
+            return self._load_segment(node.segment)
+        if not self._table:
+            return node
+        if isinstance(node, dict):
+            return {key: self._resolve(item) for key, item in node.items()}
+        if isinstance(node, list):
+            return [self._resolve(item) for item in node]
+        return node
+
+    def _root_node(self) -> Any:
+        if self._root is None:
+            self._root = self._open(_SegmentRef(0, b"d"))
+        return self._root
+
+    def load(self) -> Any:
+        """Returns the complete archive, as json.load would."""
+        if self._table and self._root is None:
+            return self._load_segment(0)
+        return self._resolve(self._root_node())
+
+    def _walk(self, path: str) -> Any:
+        """The (possibly still encoded) node at path, or _MISSING."""
+        node = self._root_node()
+        for part in [part for part in str(path).split(".") if part]:
+            node = self._open(node)
+            if isinstance(node, dict) and part in node:
+                node = node[part]
+            elif isinstance(node, list) and part.lstrip("-").isdigit() and -len(node) <= int(part) < len(node):
+                node = node[int(part)]
+            else:
+                return _MISSING
+        return node
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Returns the fully materialized subtree at path, or default if it does not exist."""
+        node = self._walk(path)
+        return default if node is _MISSING else self._resolve(node)
+
+    def select(self, paths: List[str]) -> Any:
+        """
+        Returns a sparse copy of the archive holding only the given subtrees.
+
+        Dict keys off the requested paths are left out; list items off the
+        paths are replaced by empty stand-ins so indices keep their meaning.
+        """
+        return self._sparse(self._root_node(), path_tree(paths))
+
+    def length(self, path: str) -> int:
+        """Number of items (or keys) at path, without materializing them; 0 if absent."""
+        node = self._walk(path)
+        if node is _MISSING:
+            return 0
+        node = self._open(node)
+        return len(node) if isinstance(node, (dict, list)) else 0
+
+    def iter_items(self, path: str, paths: Optional[List[str]] = None) -> Iterator[Any]:
+        """
+        Yields the items of the list at path one at a time.
+
+        With paths (relative to an item, e.g. 'energy.total') each item is a
+        sparse copy as in select(). Segments below the items are decoded per
+        item and not kept, so iterating over thousands of calculations holds
+        only one of them in memory at a time.
+        """
+        node = self._open(self._walk(path))
+        if not isinstance(node, list):
+            return
+        tree = path_tree(paths) if paths else True
+        for item in node:
+            yield self._sparse(item, tree, cache=False)
+
+    def _sparse(self, node: Any, tree: Any, cache: bool = True) -> Any:
+        if tree is True:
+            return self._resolve(node)
+        node = self._open(node, cache)
+        if isinstance(node, dict):
+            sparse = {}
+            for key, item in node.items():
+                sub = tree.get(key, tree.get("*"))
+                if sub is not None:
+                    sparse[key] = self._sparse(item, sub, cache)
+            return sparse
+        if isinstance(node, list):
+            sparse = []
+            for i, item in enumerate(node):
+                sub = tree.get(str(i), tree.get(str(i - len(node)), tree.get("*")))
+                sparse.append(self._sparse(item, sub, cache) if sub is not None else _stub(item))
+            return sparse
+        return node
+
+
+def save_archive(data: Dict[str, Any], path: Path):
+    """
+    Writes a parsed archive; the format follows the file suffix.
+
+    JSON is written indented for readability. msgpack stores numeric arrays
+    (positions, eigenvalues, DOS values, ...) as typed binary blobs and
+    splits large subtrees into separately addressable segments, which is
+    much smaller and faster to reload (see ArchiveReader).
+    """
+    if path.suffix == ARCHIVE_SUFFIXES["msgpack"]:
+        packer = msgpack.Packer(use_bin_type=True)
+        segments: List[bytes] = [b""]
+        segments[0] = _pack(data, packer, segments)
+        table, offset = [], 0
+        for segment in segments:
+            table.append([offset, len(segment)])
+            offset += len(segment)
+        packed_table = packer.pack(table)
+        with open(path, "wb") as f:
+            f.write(_SEGMENTED_MAGIC + struct.pack("<Q", len(packed_table)))
+            f.write(packed_table)
+            for segment in segments:
+                f.write(segment)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def load_archive(path: Path, arrays: bool = False, paths: Optional[List[str]] = None) -> Any:
+    """
+    Loads a parsed archive written by save_archive, whatever its format.
+
+    Args:
+        path: Path to a fair_parsed_*.json or fair_parsed_*.msgpack file.
+        arrays: If True, numeric blobs of msgpack archives are returned as
+            read-only numpy arrays instead of (nested) lists.
+        paths: If given, only these subtrees are materialized (see
+            ArchiveReader.select); the rest of the archive is not decoded.
+
+    Returns:
+        The archive content, as it would be returned by json.load.
+    """
+    with ArchiveReader(path, arrays=arrays) as reader:
+        return reader.select(paths) if paths else reader.load()
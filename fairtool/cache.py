@@ -0,0 +1,130 @@
+# fairtool/cache.py
+
+"""Content-hash based parse cache, so unchanged inputs are not parsed again."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import __version__
+
+log = logging.getLogger("fairtool")
+
+# One small record per parsed archive lives in this directory next to the outputs.
+CACHE_DIRNAME = ".fair_cache"
+CACHE_RECORD_SUFFIX = ".record"
+CACHE_SCHEMA = 1
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def tool_versions() -> Dict[str, Optional[str]]:
+    """Versions that change the parse result: fairtool itself and nomad-lab."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            nomad_version = version("nomad-lab")
+        except PackageNotFoundError:
+            nomad_version = None
+    except ImportError:
+        nomad_version = None
+    return {"fairtool": __version__, "nomad-lab": nomad_version}
+
+
+def cache_record_path(archive_path: Path) -> Path:
+    """Location of the cache record describing archive_path."""
+    return archive_path.parent / CACHE_DIRNAME / f"{archive_path.name}{CACHE_RECORD_SUFFIX}"
+
+
+def load_cache_record(archive_path: Path) -> Optional[Dict[str, Any]]:
+    """Reads the cache record of an archive, or None if there is no usable one."""
+    try:
+        with open(cache_record_path(archive_path), "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or record.get("schema") != CACHE_SCHEMA:
+        return None
+    return record
+
+
+def input_fingerprint(input_file: Path, record: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Describes the content of an input file.
+
+    The SHA-256 digest is taken over from record when size and mtime (in ns)
+    are unchanged, so an untouched file is not read again. Any other change,
+    including a copy that gives the file a new timestamp, falls back to hashing.
+    """
+    stat = input_file.stat()
+    sha256 = None
+    if record:
+        previous = record.get("input", {})
+        if previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+            sha256 = previous.get("sha256")
+    if sha256 is None:
+        sha256 = file_sha256(input_file)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+
+def cache_key(fingerprint: Dict[str, Any], options: Dict[str, Any]) -> str:
+    """Digest of everything that determines the parsed archive."""
+    payload = {
+        "input": fingerprint["sha256"],
+        "versions": tool_versions(),
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_cache_hit(archive_path: Path, record: Optional[Dict[str, Any]], key: str) -> bool:
+    """True if record matches key and every output it lists still exists."""
+    if not record or record.get("key") != key:
+        return False
+    outputs = record.get("outputs") or [archive_path.name]
+    return all((archive_path.parent / name).exists() for name in outputs)
+
+
+def write_cache_record(archive_path: Path, input_file: Path, fingerprint: Dict[str, Any],
+                       key: str, outputs: List[str], scalars: Optional[Dict[str, Any]] = None):
+    """
+    Stores the cache record of a freshly written archive.
+
+    The record is written to a temporary file first and then renamed, so a
+    crash or a concurrent reader never sees half a record. `scalars` are
+    key results (energy, band gap, ...) that the project index picks up
+    without opening the archive.
+    """
+    record_path = cache_record_path(archive_path)
+    record = {
+        "schema": CACHE_SCHEMA,
+        "key": key,
+        "input": dict(fingerprint, path=str(input_file)),
+        "versions": tool_versions(),
+        "outputs": outputs,
+        "scalars": scalars or {},
+        "created": time.time(),
+    }
+    try:
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = record_path.with_name(f"{record_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, record_path)
+    except OSError as e:
+        log.warning(f"Could not write parse cache record {record_path}: {e}")
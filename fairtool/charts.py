@@ -0,0 +1,83 @@
+# fairtool/charts.py
+
+"""Chart rows shared by the summary reports and the viewer data (DOS, down-sampling)."""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .units import J_PER_EV
+
+log = logging.getLogger("fairtool")
+
+
+def extract_dos_arrays(dos_data: Dict[str, Any]) -> Tuple[np.ndarray, bool]:
+    """
+    Builds the DOS chart rows from one dos_electronic block.
+
+    Returns:
+        A tuple of (rows, is_spin_polarized). rows is an (n, 2) array of
+        [energy_ev, dos], or (n, 3) with [energy_ev, dos_up, -dos_down] for
+        spin-polarized data. Energies are relative to the Fermi energy, the
+        DOS is in states/eV (the archive stores states/J).
+    """
+    empty = np.empty((0, 2))
+    energies_j = np.asarray(dos_data.get("energies", []), dtype=float)
+    fermi_j = dos_data.get("energy_fermi")
+    dos_total = dos_data.get("total", []) # List of value objects
+
+    if not (energies_j.any() and fermi_j is not None and dos_total):
+        log.info("No complete DOS data found (missing energies, fermi, or total).")
+        return empty, False
+
+    # Convert energies to eV and shift relative to Fermi
+    energies_ev = (energies_j - fermi_j) / J_PER_EV
+    is_spin_polarized = bool(dos_data.get("spin_polarized", False))
+
+    if is_spin_polarized and len(dos_total) >= 2:
+        dos_up = np.asarray(dos_total[0].get("value", []), dtype=float) * J_PER_EV
+        dos_down = -np.asarray(dos_total[1].get("value", []), dtype=float) * J_PER_EV # Negate for plotting
+        if not len(energies_ev) == len(dos_up) == len(dos_down):
+            log.warning("DOS energy and value array lengths mismatch (spin-polarized).")
+            return empty, is_spin_polarized
+        return np.column_stack((energies_ev, dos_up, dos_down)), is_spin_polarized
+
+    if not is_spin_polarized and len(dos_total) >= 1:
+        dos = np.asarray(dos_total[0].get("value", []), dtype=float) * J_PER_EV
+        if len(energies_ev) != len(dos):
+            log.warning("DOS energy and value array lengths mismatch (non-spin-polarized).")
+            return empty, is_spin_polarized
+        return np.column_stack((energies_ev, dos)), is_spin_polarized
+
+    return empty, is_spin_polarized
+
+
+def downsample_minmax(rows: np.ndarray, max_points: Optional[int]) -> np.ndarray:
+    """
+    Reduces chart rows to at most max_points while keeping every peak.
+
+    The rows (x in column 0, one series per further column) are cut into
+    equal bins; from each bin the rows holding the minimum and maximum of
+    every series are kept, plus the first and last row. Unlike plain
+    decimation this never drops a spike, so the drawn line looks the same
+    at chart resolution.
+    """
+    n_rows, n_cols = rows.shape
+    n_series = max(n_cols - 1, 1)
+    if not max_points or n_rows <= max_points:
+        return rows
+    n_bins = (max_points - 2) // (2 * n_series)
+    if n_bins < 1:
+        return rows[[0, -1]]
+
+    # Interior rows 1 .. n_rows-2 split into n_bins contiguous bins
+    starts = np.linspace(1, n_rows - 1, n_bins + 1).astype(int)
+    bins = np.repeat(np.arange(n_bins), np.diff(starts))
+    keep = [np.array([0, n_rows - 1])]
+    for column in range(1, n_cols):
+        # Sorting by (bin, value) puts each bin's minimum first and maximum last
+        order = np.lexsort((rows[1:-1, column], bins)) + 1
+        keep.append(order[starts[:-1] - 1])
+        keep.append(order[starts[1:] - 2])
+    return rows[np.unique(np.concatenate(keep))]
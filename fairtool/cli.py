@@ -3,19 +3,59 @@ import os
 import typer
 from typing_extensions import Annotated
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import logging
 import rich
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from rich.logging import RichHandler
-# Import subcommand functions
-from . import parse as parse_module
-from . import analyze as analyze_module
-from . import summarize as summarize_module
-from . import visualize as visualize_module
-from . import export as export_module
+from rich.progress import Progress, BarColumn, MofNCompleteColumn, TextColumn, TimeElapsedColumn
+from rich.table import Table
+import importlib.util
+from . import prune as prune_module
 from . import __version__
 
+
+def _lazy_import(name: str):
+    """
+    Returns the fairtool submodule `name` without executing it yet.
+
+    The module body (and with it pymatgen, pandas, nomad, ...) only runs on
+    the first attribute access, so `fair --version`, `fair about` or a
+    command that does not need a module never pay for its imports.
+    """
+    fullname = f"{__package__}.{name}"
+    if fullname in sys.modules:
+        return sys.modules[fullname]
+    spec = importlib.util.find_spec(fullname)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    loader.exec_module(module)
+    setattr(sys.modules[__package__], name, module)
+    return module
+
+
+def _load_now(module) -> None:
+    """
+    Executes a module returned by _lazy_import right away instead of on first
+    use, e.g. to pay for its imports once when a worker process starts.
+    """
+    # Reading the namespace is what makes LazyLoader run the module body
+    vars(module)
+
+
+# Subcommand modules, imported on first use
+parse_module = _lazy_import("parse")
+analyze_module = _lazy_import("analyze")
+summarize_module = _lazy_import("summarize")
+visualize_module = _lazy_import("visualize")
+export_module = _lazy_import("export")
+archive_module = _lazy_import("archive")
+index_module = _lazy_import("index")
+
 console = rich.console.Console()
 
 # Configure logging
@@ -154,7 +194,7 @@ def _find_calc_files(path: Path, recursive: bool = True, assume_yes: bool = Fals
 
 def _find_json_files(path: Path, recursive: bool = True) -> list[Path]:
     """
-    Finds relevant parsed JSON files (fair_parsed_*.json) for subsequent steps.
+    Finds the parsed archives (fair_parsed_*.json / *.msgpack) for subsequent steps.
 
     Args:
         path (Path): The root path or file to inspect.
@@ -169,24 +209,346 @@ def _find_json_files(path: Path, recursive: bool = True) -> list[Path]:
         raise typer.Exit(code=1)
 
     if path.is_file():
-        if path.name.startswith("fair_parsed_") and path.suffix == ".json":
+        if archive_module.is_parsed_archive(path):
             files_to_process.append(path)
         else:
-            log.warning(f"Input file {path} is not a 'fair_parsed_*.json' file. Skipping.")
+            log.warning(f"Input file {path} is not a 'fair_parsed_*.json' or '*.msgpack' file. Skipping.")
     
     elif path.is_dir():
-        search_method = path.rglob if recursive else path.glob
-        potential_files = list(search_method("fair_parsed_*.json"))
+        # Answered from the project index (fair_index.sqlite) when there is one
+        potential_files = index_module.find_parsed_archives(path, recursive=recursive)
         
         if not potential_files:
-            log.warning(f"No 'fair_parsed_*.json' files found in {path}")
+            log.warning(f"No 'fair_parsed_*' archives found in {path}")
         else:
-            log.info(f"Found {len(potential_files)} parsed JSON files for processing.")
-            files_to_process.extend(sorted(potential_files))
+            log.info(f"Found {len(potential_files)} parsed archives for processing.")
+            files_to_process.extend(potential_files)
     
     return files_to_process
 
 
+# Outcome names used by the parse runners -> status stored in the project index
+_INDEX_STATUS = {"success": "parsed", "skipped": "skipped", "failed": "failed"}
+
+
+def _resolve_jobs(jobs: int) -> int:
+    """Turns the --jobs value into a worker count (0 or less means one per CPU core)."""
+    if jobs is None or jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _progress() -> Progress:
+    """Creates the live progress display shared by the batch commands."""
+    return Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=rich.get_console(),
+        transient=True,
+    )
+
+
+def _parse_chain(chain: list[tuple[Path, Path]], force: bool, engine: str,
+                 archive_format: str = "json", profile: Optional[dict] = None,
+                 ) -> list[tuple[Path, str, Optional[str], Optional[dict]]]:
+    """
+    Parses a chain of files in order inside a single worker process.
+
+    fair-structure.json is not written here: its data is returned so the
+    parent can write it in file order (see _run_parse_jobs).
+
+    Args:
+        chain: (input file, target directory) pairs that must run sequentially.
+        force: Whether to overwrite existing output files.
+        engine: Parser backend passed to run_parser.
+        archive_format: Format of the parsed archives passed to run_parser.
+        profile: Resolved field-pruning profile passed to run_parser.
+
+    Returns:
+        list: One (input file, status, error message, structure data) tuple per
+        file, where status is 'success', 'skipped' or 'failed' and structure data
+        is the fair-structure.json content of a parsed file (None otherwise).
+    """
+    results = []
+    for file, target_dir in chain:
+        structures = []
+        try:
+            skipped = parse_module.run_parser(
+                file, target_dir, force, engine=engine, archive_format=archive_format, profile=profile,
+                structures=structures,
+            )
+            results.append((file, "skipped" if skipped else "success", None, structures[-1] if structures else None))
+        except Exception as e:
+            results.append((file, "failed", str(e), None))
+    return results
+
+
+def _run_parse_jobs(files: list[Path], output_dir: Optional[Path], force: bool, engine: str, jobs: int = 1,
+                    archive_format: str = "json", profile: Optional[dict] = None,
+                    index_path: Optional[Path] = None) -> tuple[int, int, int]:
+    """
+    Parses calculation files either serially or on a pool of worker processes.
+
+    Every file is parsed on the pool, also when all of them share one output
+    directory. Only files writing the same archive (same target directory and
+    stem) are chained and parsed in the original order by a single worker.
+    fair-structure.json, which all files of a directory share, is written by
+    this process in the original file order as results come in. The files on
+    disk therefore end up the same as after a serial run, whatever the
+    completion order of the pool.
+
+    Args:
+        files: Calculation files in processing order.
+        output_dir: Directory for all outputs; if None, each file's own directory.
+        force: Whether to overwrite existing output files.
+        engine: Parser backend passed to run_parser.
+        jobs: Number of worker processes (1 runs in this process, 0 uses all cores).
+        archive_format: Format of the parsed archives passed to run_parser.
+        profile: Resolved field-pruning profile passed to run_parser.
+        index_path: Project index (fair_index.sqlite) to record every outcome in, if any.
+
+    Returns:
+        tuple: (success, skipped, failed) counts.
+    """
+    count_success = 0
+    count_skip = 0
+    count_fail = 0
+    jobs = _resolve_jobs(jobs)
+    index = index_module.ProjectIndex(index_path) if index_path else None
+
+    def record(file: Path, target_dir: Path, status: str, error: Optional[str] = None):
+        if index is None:
+            return
+        archive = archive_module.archive_path(target_dir, file.stem, archive_format)
+        index.record_parse(file, archive, _INDEX_STATUS[status], error)
+
+    try:
+        if jobs == 1 or len(files) == 1:
+            for file in files:
+                # If no --output given, use file’s directory
+                target_dir = output_dir if output_dir else file.parent
+                try:
+                    target_dir.mkdir(parents=True, exist_ok=True)
+
+                    # The logic to check for existing files and mtime is now
+                    # handled *inside* parse_module.run_parser.
+                    # We call it directly.
+
+                    log.info(f"Parsing file: {file}")
+                    # run_parser will return True if skipped, False if parsed/failed
+                    skipped = parse_module.run_parser(
+                        file, target_dir, force, engine=engine, archive_format=archive_format, profile=profile
+                    )
+
+                    if skipped:
+                        count_skip += 1
+                    else:
+                        count_success += 1
+                    record(file, target_dir, "skipped" if skipped else "success")
+
+                except Exception as e:
+                    log.error(f"Failed to parse {file}: {e}", exc_info=False) # exc_info=False to reduce noise, parser logs it
+                    count_fail += 1
+                    record(file, target_dir, "failed", str(e))
+            return count_success, count_skip, count_fail
+
+        # Chain files that write the same archive, keeping the serial order inside each chain
+        chains: dict[tuple[Path, str], list[tuple[int, Path, Path]]] = {}
+        for position, file in enumerate(files):
+            target_dir = output_dir if output_dir else file.parent
+            target_dir.mkdir(parents=True, exist_ok=True)
+            archive = archive_module.archive_path(target_dir, file.stem, archive_format)
+            chains.setdefault((target_dir, archive.name), []).append((position, file, target_dir))
+
+        workers = min(jobs, len(chains))
+        log.info(f"Parsing {len(files)} file(s) in {len(chains)} chain(s) with {workers} worker process(es).")
+
+        # Structure data of finished files by position; written once all earlier files are done
+        finished: dict[int, tuple[Path, Optional[dict]]] = {}
+        next_position = 0
+
+        with _progress() as progress, ProcessPoolExecutor(max_workers=workers) as pool:
+            task = progress.add_task("Parsing", total=len(files))
+            futures = {
+                pool.submit(_parse_chain, [(file, target_dir) for _, file, target_dir in chain],
+                            force, engine, archive_format, profile): chain
+                for chain in chains.values()
+            }
+            for future in as_completed(futures):
+                chain = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # The worker itself died (e.g. killed by the OOM killer); fail the whole chain
+                    results = [(file, "failed", str(e), None) for _, file, _ in chain]
+
+                # Only this process writes to the index, so workers never contend for it
+                for (file, status, error, structure), (position, _, target_dir) in zip(results, chain):
+                    if status == "skipped":
+                        count_skip += 1
+                    elif status == "success":
+                        count_success += 1
+                    else:
+                        log.error(f"Failed to parse {file}: {error}", exc_info=False)
+                        count_fail += 1
+                    record(file, target_dir, status, error)
+                    finished[position] = (target_dir, structure)
+                progress.advance(task, len(results))
+
+                while next_position in finished:
+                    target_dir, structure = finished.pop(next_position)
+                    if structure is not None:
+                        parse_module.write_structure_json(structure, target_dir)
+                    next_position += 1
+
+        return count_success, count_skip, count_fail
+    finally:
+        if index is not None:
+            index.close()
+
+
+def _summary_output_path(json_file: Path, output_dir: Optional[Path]) -> Path:
+    """The Markdown report written for a parsed archive."""
+    return summarize_module.report_path(json_file, output_dir if output_dir else json_file.parent)
+
+
+def _summarize_one(json_file: Path, target_dir: Path, template: Optional[str],
+                   dos_max_points: Optional[int]) -> tuple[str, Optional[str], float]:
+    """Writes one report. Returns (status, error message, seconds taken)."""
+    start = time.perf_counter()
+    try:
+        ok = summarize_module.run_summarization(json_file, target_dir, template, dos_max_points=dos_max_points)
+        status, error = ("success", None) if ok is not False else ("failed", "see the log above")
+    except Exception as e:
+        status, error = "failed", str(e)
+    return status, error, time.perf_counter() - start
+
+
+def _summarize_chain(chain: list[tuple[Path, Path]], template: Optional[str],
+                     dos_max_points: Optional[int]) -> list[tuple[Path, str, Optional[str], float]]:
+    """
+    Summarizes a chain of archives in order inside a single worker process.
+
+    Returns:
+        list: One (archive, status, error message, seconds) tuple per file.
+    """
+    return [(json_file, *_summarize_one(json_file, target_dir, template, dos_max_points))
+            for json_file, target_dir in chain]
+
+
+def _init_summarize_worker(template: Optional[str] = None):
+    """Loads the report code, and compiles the template, once per worker instead of once per task."""
+    _load_now(summarize_module)
+    if template:
+        from .templating import load_template
+        try:
+            load_template(template)
+        except Exception as e:
+            # Every task reports the problem itself
+            log.debug(f"Could not precompile template {template}: {e}")
+
+
+def _run_summarize_jobs(json_files: list[Path], output_dir: Optional[Path], force: bool,
+                        template: Optional[str] = None, jobs: int = 1,
+                        dos_max_points: Optional[int] = None) -> tuple[int, int, int]:
+    """
+    Writes the Markdown reports of parsed archives, serially or on a process pool.
+
+    Reports whose archive, template, options and tool versions are unchanged
+    since they were written are skipped (see summarize.is_report_current).
+    Archives that map to the same report (same name, same --output) form one
+    chain handled in order by one worker, like in _run_parse_jobs, so the
+    result does not depend on the completion order. The time each report took
+    is logged (debug) and the slowest one is named at the end.
+
+    Args:
+        json_files: Parsed archives in processing order.
+        output_dir: Directory for all reports; if None, each archive's own directory.
+        force: Whether to rewrite reports that are up to date.
+        template: Optional summary template passed to run_summarization.
+        jobs: Number of worker processes (1 runs in this process, 0 uses all cores).
+        dos_max_points: Maximum rows of the DOS charts (None: the summarize default).
+
+    Returns:
+        tuple: (success, skipped, failed) counts.
+    """
+    dos_max_points = _dos_max_points(dos_max_points)
+    count_skip = 0
+    chains: dict[Path, list[tuple[Path, Path]]] = {}
+    for json_file in json_files:
+        md_output_path = _summary_output_path(json_file, output_dir)
+        if not force and summarize_module.is_report_current(
+            json_file, md_output_path.parent, template, dos_max_points
+        ):
+            log.info(f"Skipping summary for {json_file.name}; report is up to date.")
+            count_skip += 1
+            continue
+        md_output_path.parent.mkdir(parents=True, exist_ok=True)
+        chains.setdefault(md_output_path, []).append((json_file, md_output_path.parent))
+
+    timings: list[tuple[float, Path]] = []
+    count_success = 0
+    count_fail = 0
+
+    def collect(results: list[tuple[Path, str, Optional[str], float]]):
+        nonlocal count_success, count_fail
+        for json_file, status, error, seconds in results:
+            timings.append((seconds, json_file))
+            if status == "success":
+                count_success += 1
+                log.debug(f"Summarized {json_file} in {seconds:.2f} s")
+            else:
+                count_fail += 1
+                log.error(f"Summarization failed for {json_file.name}: {error}", exc_info=False)
+
+    jobs = _resolve_jobs(jobs)
+    n_files = sum(len(chain) for chain in chains.values())
+    if jobs == 1 or len(chains) <= 1:
+        for chain in chains.values():
+            for json_file, target_dir in chain:
+                log.info(f"Summarizing {json_file.name} -> {target_dir}")
+                collect([(json_file, *_summarize_one(json_file, target_dir, template, dos_max_points))])
+    else:
+        workers = min(jobs, len(chains))
+        log.info(f"Summarizing {n_files} archive(s) with {workers} worker process(es).")
+        with _progress() as progress, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_summarize_worker, initargs=(template,)
+        ) as pool:
+            task = progress.add_task("Summarizing", total=n_files)
+            futures = {pool.submit(_summarize_chain, chain, template, dos_max_points): chain for chain in chains.values()}
+            for future in as_completed(futures):
+                chain = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [(json_file, "failed", str(e), 0.0) for json_file, _ in chain]
+                collect(results)
+                progress.advance(task, len(results))
+
+    if timings:
+        slowest, slowest_file = max(timings, key=lambda t: t[0])
+        log.info(f"Summarized {len(timings)} archive(s) in {sum(t for t, _ in timings):.2f} s of work "
+                 f"(slowest: {slowest_file.name}, {slowest:.2f} s).")
+    return count_success, count_skip, count_fail
+
+
+def _index_path_for(input_path: Path, output_dir: Optional[Path]) -> Path:
+    """
+    Picks the project index a parse run maintains: an existing index covering
+    the output location, or a new one at the output (or input) root.
+    """
+    root = output_dir if output_dir else (input_path if input_path.is_dir() else input_path.parent)
+    root.mkdir(parents=True, exist_ok=True)
+    return index_module.locate_index(root) or root / index_module.INDEX_FILENAME
+
+
+def _dos_max_points(dos_points: Optional[int]) -> int:
+    """The --dos-points value, or the default of the summarize module."""
+    return summarize_module.DOS_MAX_POINTS if dos_points is None else dos_points
+
+
 def version_callback(value: bool):
     """Prints the version and exits."""
     if value:
@@ -226,44 +588,65 @@ def parse(
         "--yes", "-y",
         help="Assume yes for all interactive prompts (non-interactive/batch mode)."
     )] = False,
+
+    engine: Annotated[str, typer.Option(
+        "--engine",
+        help="NOMAD parser backend: 'inprocess' (import the parsers once and reuse them), "
+             "'subprocess' (run `nomad parse` per file) or 'auto' (inprocess when nomad-lab is importable)."
+    )] = "auto",
+
+    jobs: Annotated[int, typer.Option(
+        "--jobs", "-j",
+        help="Number of worker processes for parsing (0 uses one per CPU core)."
+    )] = 1,
+
+    archive_format: Annotated[str, typer.Option(
+        "--archive-format",
+        help="Format of the parsed archives: 'json' (readable) or 'msgpack' (compact binary, faster to reload)."
+    )] = "json",
+
+    profile: Annotated[str, typer.Option(
+        "--profile",
+        help="Field-pruning profile for the parsed archives: 'minimal', 'summary', 'full' "
+             "or a YAML file with 'include'/'exclude' path lists."
+    )] = prune_module.DEFAULT_PROFILE,
+
+    include: Annotated[Optional[List[str]], typer.Option(
+        "--include",
+        help="Extra dotted path to keep on top of the profile (e.g. run.calculation.eigenvalues). Repeatable."
+    )] = None,
+
+    exclude: Annotated[Optional[List[str]], typer.Option(
+        "--exclude",
+        help="Dotted path to drop from the parsed archives (e.g. run.calculation.scf_iteration). Repeatable."
+    )] = None,
 ):
     """
     Parse calculation output files (e.g., vasprun.xml) into structured JSON.
     """
     log.info(f"Starting parsing process for: {input_path}")
     log.info(f"Recursive search: {recursive}")
+    if engine not in parse_module.PARSE_ENGINES:
+        log.error(f"Unknown parser engine '{engine}'. Choose from: {', '.join(parse_module.PARSE_ENGINES)}")
+        raise typer.Exit(code=1)
+    if archive_format not in archive_module.ARCHIVE_FORMATS:
+        log.error(f"Unknown archive format '{archive_format}'. Choose from: {', '.join(archive_module.ARCHIVE_FORMATS)}")
+        raise typer.Exit(code=1)
+    try:
+        prune_profile = prune_module.resolve_profile(profile, include, exclude)
+    except ValueError as e:
+        log.error(str(e))
+        raise typer.Exit(code=1)
 
     files_to_process = _find_calc_files(input_path, recursive=recursive, assume_yes=yes)
     if not files_to_process:
         log.warning("No files found to parse.")
         return # Exit gracefully
 
-    count_success = 0
-    count_fail = 0
-    count_skip = 0
-
-    for file in files_to_process:
-        try:
-            # If no --output given, use file’s directory
-            target_dir = output_dir if output_dir else file.parent
-            target_dir.mkdir(parents=True, exist_ok=True)
-            
-            # The logic to check for existing files and mtime is now
-            # handled *inside* parse_module.run_parser.
-            # We call it directly.
-            
-            log.info(f"Parsing file: {file}")
-            # run_parser will return True if skipped, False if parsed/failed
-            skipped = parse_module.run_parser(file, target_dir, force)
-            
-            if skipped:
-                count_skip += 1
-            else:
-                count_success += 1
-                
-        except Exception as e:
-            log.error(f"Failed to parse {file}: {e}", exc_info=False) # exc_info=False to reduce noise, parser logs it
-            count_fail += 1
+    count_success, count_skip, count_fail = _run_parse_jobs(
+        files_to_process, output_dir, force, engine, jobs=jobs, archive_format=archive_format, profile=prune_profile,
+        index_path=_index_path_for(input_path, output_dir),
+    )
 
     log.info("--- Parsing Finished ---")
     log.info(f"[green]Success: {count_success}[/green]")
@@ -282,20 +665,29 @@ def analyze(
     )],
      output_dir: Annotated[Path, typer.Option(
         "--output", "-o",
-        help="Directory to save analysis results (e.g., plots, summary tables).",
+        help="Directory to save the analysis results table (fair_analysis.parquet, or .csv without pyarrow).",
         resolve_path=True,
     )] = Path("."),
      config: Annotated[Path, typer.Option(
         "--config", "-c",
-        help="Path to an optional analysis configuration file (e.g., YAML).",
+        help="Path to an optional analysis configuration file (YAML) selecting the analysis tasks.",
         exists=True,
         file_okay=True,
         dir_okay=False,
         resolve_path=True,
     )] = None,
+    jobs: Annotated[int, typer.Option(
+        "--jobs", "-j",
+        help="Number of worker processes analyzing archives (0 uses one per CPU core).",
+    )] = 1,
 ):
     """
     Perform analysis on parsed calculation data. Get derived properties.
+
+    Energies, band gap, forces, stress, magnetization and convergence flags
+    of every archive are collected into one columnar results table. The
+    config file can select other analysis tasks (e.g. dos_features,
+    effective_mass, formation_energy); results are reused on later runs.
     """
     log.info(f"Starting analysis process for: {input_path}")
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -303,15 +695,9 @@ def analyze(
     if config:
         log.info(f"Using analysis configuration: {config}")
 
-    # TODO: Implement logic to find relevant JSON files if input_path is a directory
-    # Similar to _find_calc_files but looking for *.json or specific names
-    # For now, we assume run_analysis can handle a directory.
-    # json_files = _find_json_files(input_path, recursive=True) # If run_analysis can't handle dirs
-    
     try:
         log.info("Analysis started.")
-        # We assume run_analysis can handle a directory input_path
-        analyze_module.run_analysis(input_path, output_dir, config)
+        analyze_module.run_analysis(input_path, output_dir, config, jobs=_resolve_jobs(jobs))
     except Exception as e:
         log.error(f"Analysis failed for {input_path}: {e}", exc_info=True)
         raise typer.Exit(code=1)
@@ -340,18 +726,30 @@ def summarize(
     )] = True,
     template: Annotated[str, typer.Option(
         "--template", "-t",
-        help="Optional template for generating the summary report."
+        help="Optional Jinja2 template file for the summary report (default: built-in layout)."
     )] = None,
     force: Annotated[bool, typer.Option(
         "--force", "-f",
-        help="Overwrite existing summary files."
+        help="Rewrite summaries even when they are up to date."
     )] = False, # Added force option
+    dos_points: Annotated[Optional[int], typer.Option(
+        "--dos-points",
+        help="Maximum points of the DOS chart; finer grids are downsampled keeping every peak "
+             "(0 keeps all, default 1000).",
+    )] = None,
+    jobs: Annotated[int, typer.Option(
+        "--jobs", "-j",
+        help="Number of worker processes writing reports (0 uses one per CPU core).",
+    )] = 1,
 ):
     """
     Generate human-readable summaries from parsed data.
     """
     log.info(f"Starting summarization process for: {input_path}")
     if template:
+        if not Path(template).expanduser().is_file():
+            log.error(f"Summary template not found: {template}")
+            raise typer.Exit(code=1)
         log.info(f"Using summary template: {template}")
 
     json_files = _find_json_files(input_path, recursive=recursive)
@@ -360,34 +758,10 @@ def summarize(
         return
 
     log.info(f"Found {len(json_files)} JSON files to summarize.")
-    
-    count_success = 0
-    count_fail = 0
-    count_skip = 0
 
-    for json_file in json_files:
-        try:
-            # If no --output given, use JSON file's directory
-            target_dir = output_dir if output_dir else json_file.parent
-            target_dir.mkdir(parents=True, exist_ok=True)
-            
-            # --- Prepare output path ---
-            base_name = json_file.stem # e.g., "fair_parsed_my_calc"
-            summary_base_name = base_name.replace("fair_parsed_", "fair_summarized_")
-            md_output_path = target_dir / f"{summary_base_name}.md"
-
-            if not force and md_output_path.exists():
-                log.info(f"Skipping summary for {json_file.name}; output already exists.")
-                count_skip += 1
-                continue
-
-            log.info(f"Summarizing {json_file.name} -> {md_output_path.name}")
-            summarize_module.run_summarization(json_file, target_dir, template)
-            count_success += 1
-
-        except Exception as e:
-            log.error(f"Summarization failed for {json_file.name}: {e}", exc_info=True)
-            count_fail += 1
+    count_success, count_skip, count_fail = _run_summarize_jobs(
+        json_files, output_dir, force, template, jobs=jobs, dos_max_points=dos_points
+    )
 
     log.info("--- Summarization Finished ---")
     log.info(f"[green]Success: {count_success}[/green]")
@@ -398,7 +772,7 @@ def summarize(
 @app.command(rich_help_panel="Processing")
 def export(
     input_path: Annotated[Path, typer.Argument(
-        help="Path to parsed/analyzed data (JSON/directory) to export.",
+        help="Analysis results table, parsed archive, or a directory holding either.",
          exists=True,
         file_okay=True,
         dir_okay=True,
@@ -411,22 +785,62 @@ def export(
     )] = Path("."),
     format: Annotated[str, typer.Option(
         "--format", "-fmt",
-        help="Export format (e.g., 'csv', 'json_summary', 'yaml').",
+        help="Export format: 'csv', 'jsonl', 'parquet', 'arrow', 'yaml' or 'json_summary' for the results table; "
+             "'optimade', 'extxyz' or 'ase-db' for all structures with their key properties.",
     )] = "csv",
+    compression: Annotated[Optional[str], typer.Option(
+        "--compression",
+        help="Compression codec: gzip/bz2/xz for text formats, snappy/zstd/gzip/brotli/lz4 for parquet, "
+             "lz4/zstd for arrow, or 'none' (default: the format's default).",
+    )] = None,
+    chunk_size: Annotated[Optional[int], typer.Option(
+        "--chunk-size",
+        help="Records read and written at a time; bounds the memory used (default 10000).",
+        min=1,
+    )] = None,
+    columns: Annotated[Optional[str], typer.Option(
+        "--columns",
+        help="Comma-separated columns to export, in this order (default: all), e.g. 'formula,energy_total,band_gap'.",
+    )] = None,
+    where: Annotated[Optional[str], typer.Option(
+        "--where",
+        help="Only export records matching this filter, e.g. \"scf_converged and band_gap > 1 and 'Si' in formula\". "
+             "Supports comparisons, 'in', 'and', 'or', 'not' and parentheses.",
+    )] = None,
+    jobs: Annotated[int, typer.Option(
+        "--jobs", "-j",
+        help="Worker processes loading per-calculation results or analyzing archives (0 uses one per CPU core).",
+    )] = 1,
+    benchmark: Annotated[bool, typer.Option(
+        "--benchmark",
+        help="Time writing the data in every format and codec (into a temporary directory) instead of exporting.",
+    )] = False,
 ):
     """
     Export processed data into different file formats.
     """
     log.info(f"Starting export process for: {input_path}")
+    chunk_size = chunk_size or export_module.DEFAULT_CHUNK_SIZE
+    if benchmark:
+        results = export_module.benchmark_export(input_path, chunk_size=chunk_size)
+        table = Table(title=f"Export benchmark: {input_path.name}")
+        for column in ("Format", "Compression", "Rows", "Write time", "Rows/s", "Size"):
+            table.add_column(column, justify="left" if column in ("Format", "Compression") else "right")
+        for result in results:
+            table.add_row(result["format"], result["compression"], str(result["rows"]),
+                          f"{result['seconds'] * 1000:.1f} ms", f"{result['rows_per_s']:,.0f}",
+                          f"{result['bytes'] / 1024:.1f} KiB")
+        console.print(table)
+        return
+
+    selected = [column.strip() for column in columns.split(",") if column.strip()] if columns else None
     output_dir.mkdir(parents=True, exist_ok=True)
     log.info(f"Exported files will be saved to: {output_dir} in format '{format}'")
 
-    # TODO: Assumes run_export can handle a directory.
-    # If not, add _find_json_files and loop like in summarize.
-
     try:
         log.info("Export started.")
-        export_module.run_export(input_path, output_dir, format)
+        export_module.run_export(input_path, output_dir, format, compression=compression, chunk_size=chunk_size,
+                                 jobs=_resolve_jobs(jobs), columns=selected, where=where)
     except Exception as e:
         log.error(f"Export failed for {input_path} (format: {format}): {e}", exc_info=True)
         raise typer.Exit(code=1)
@@ -510,6 +924,44 @@ def visualize(
             raise typer.Exit(code=1)
 
 
+@app.command(rich_help_panel="Processing")
+def index(
+    input_path: Annotated[Path, typer.Argument(
+        help="Project directory holding (or to hold) the fair_index.sqlite index.",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+    )] = Path.cwd(),
+    rebuild: Annotated[bool, typer.Option(
+        "--rebuild",
+        help="Recreate the index by scanning the directory tree once for parsed archives.",
+    )] = False,
+):
+    """
+    Show or rebuild the project index of parsed calculations.
+    """
+    index_file = input_path / index_module.INDEX_FILENAME
+    if rebuild:
+        count = index_module.rebuild_index(input_path)
+        log.info(f"Indexed {count} parsed archive(s) in {index_file}")
+        return
+
+    index_file = index_module.locate_index(input_path)
+    if index_file is None:
+        log.warning(f"No {index_module.INDEX_FILENAME} found for {input_path}. Run 'fair parse' or 'fair index --rebuild'.")
+        return
+
+    with index_module.ProjectIndex(index_file) as project_index:
+        rows = project_index.rows(under=input_path)
+    counts = {status: sum(1 for row in rows if row["status"] == status) for status in index_module.INDEX_STATUSES}
+    log.info(f"Index: {index_file}")
+    log.info(f"Calculations: {len(rows)} ({', '.join(f'{status}: {n}' for status, n in counts.items())})")
+    for row in rows:
+        if row["status"] == "failed":
+            log.warning(f"Failed: {row['input_path']}: {row['error']}")
+
+
 @app.command(rich_help_panel="Automated Workflow")
 def all(
     input_path: Annotated[Path, typer.Argument(
@@ -546,16 +998,44 @@ def all(
     )] = None,
     template: Annotated[str, typer.Option(
         "--template", "-t",
-        help="Optional summary template (passed to summarize).",
+        help="Optional Jinja2 summary template (passed to summarize).",
     )] = None,
     export_format: Annotated[str, typer.Option(
         "--format", "-fmt",
-        help="Export format for the export step (e.g., csv, yaml, json_summary).",
+        help="Export format for the export step (csv, jsonl, parquet, arrow, yaml, json_summary).",
     )] = "csv",
     embed: Annotated[bool, typer.Option(
         "--embed", "-e",
         help="Generate Markdown embedding snippets during visualization.",
     )] = False,
+    engine: Annotated[str, typer.Option(
+        "--engine",
+        help="NOMAD parser backend for the parse step: 'inprocess', 'subprocess' or 'auto'.",
+    )] = "auto",
+    jobs: Annotated[int, typer.Option(
+        "--jobs", "-j",
+        help="Number of worker processes for the parse, analyze and summarize steps (0 uses one per CPU core).",
+    )] = 1,
+    archive_format: Annotated[str, typer.Option(
+        "--archive-format",
+        help="Format of the parsed archives: 'json' or 'msgpack' (compact binary).",
+    )] = "json",
+    profile: Annotated[str, typer.Option(
+        "--profile",
+        help="Field-pruning profile for the parse step: 'minimal', 'summary', 'full' or a YAML file.",
+    )] = prune_module.DEFAULT_PROFILE,
+    include: Annotated[Optional[List[str]], typer.Option(
+        "--include",
+        help="Extra dotted path to keep on top of the profile. Repeatable.",
+    )] = None,
+    exclude: Annotated[Optional[List[str]], typer.Option(
+        "--exclude",
+        help="Dotted path to drop from the parsed archives. Repeatable.",
+    )] = None,
+    dos_points: Annotated[Optional[int], typer.Option(
+        "--dos-points",
+        help="Maximum points of the DOS chart in the summaries (0 keeps all, default 1000).",
+    )] = None,
 ):
     """
     Run the full FAIR workflow: parse -> analyze -> summarize -> export -> visualize.
@@ -563,6 +1043,17 @@ def all(
     log.info("--- Starting Full FAIR Workflow (all steps) ---")
     log.info(f"Input path: {input_path}")
     log.info(f"Output directory: {output_dir}")
+    if engine not in parse_module.PARSE_ENGINES:
+        log.error(f"Unknown parser engine '{engine}'. Choose from: {', '.join(parse_module.PARSE_ENGINES)}")
+        raise typer.Exit(code=1)
+    if archive_format not in archive_module.ARCHIVE_FORMATS:
+        log.error(f"Unknown archive format '{archive_format}'. Choose from: {', '.join(archive_module.ARCHIVE_FORMATS)}")
+        raise typer.Exit(code=1)
+    try:
+        prune_profile = prune_module.resolve_profile(profile, include, exclude)
+    except ValueError as e:
+        log.error(str(e))
+        raise typer.Exit(code=1)
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # --- Step 1: Parse ---
@@ -575,22 +1066,16 @@ def all(
         log.warning("No files found to parse. Aborting workflow.")
         return
 
-    parse_success = 0
-    parse_fail = 0
-    for file in files_to_process:
-        try:
-            # The 'all' command *requires* an output_dir, so we use it.
-            log.info(f"Parsing file: {file}")
-            parse_module.run_parser(file, output_dir, force)
-            parse_success += 1
-        except Exception as e:
-            log.error(f"Failed to parse {file}: {e}", exc_info=False)
-            parse_fail += 1
-    
-    if parse_success == 0:
+    # The 'all' command *requires* an output_dir, so we use it.
+    parse_success, parse_skip, parse_fail = _run_parse_jobs(
+        files_to_process, output_dir, force, engine, jobs=jobs, archive_format=archive_format, profile=prune_profile,
+        index_path=_index_path_for(input_path, output_dir),
+    )
+
+    if parse_success + parse_skip == 0:
         log.error("No files were successfully parsed. Aborting workflow.")
         raise typer.Exit(code=1)
-    log.info(f"Parsing complete. Success: {parse_success}, Failed: {parse_fail}")
+    log.info(f"Parsing complete. Success: {parse_success}, Skipped: {parse_skip}, Failed: {parse_fail}")
 
 
     # Subsequent steps operate on the output_dir
@@ -599,7 +1084,7 @@ def all(
     # --- Step 2: Analyze ---
     try:
         log.info("--- STEP 2/5: Analyze ---")
-        analyze_module.run_analysis(output_dir, output_dir, config)
+        analyze_module.run_analysis(output_dir, output_dir, config, jobs=_resolve_jobs(jobs))
     except Exception as e:
         log.error(f"Analysis step failed: {e}", exc_info=True)
         raise typer.Exit(code=1)
@@ -614,18 +1099,7 @@ def all(
         if not json_files:
             log.warning("No parsed JSON files found in output directory to summarize.")
         else:
-            for json_file in json_files:
-                try:
-                    summary_base_name = json_file.stem.replace("fair_parsed_", "fair_summarized_")
-                    md_output_path = output_dir / f"{summary_base_name}.md"
-                    
-                    if not force and md_output_path.exists():
-                        log.info(f"Skipping summary for {json_file.name}; output exists.")
-                        continue
-                        
-                    summarize_module.run_summarization(json_file, output_dir, template)
-                except Exception as e:
-                    log.error(f"Summarization failed for {json_file.name}: {e}", exc_info=False)
+            _run_summarize_jobs(json_files, output_dir, force, template, jobs=jobs, dos_max_points=dos_points)
     except Exception as e:
         log.error(f"Summarization step failed: {e}", exc_info=True)
         raise typer.Exit(code=1)
@@ -2,120 +2,511 @@
 
 """Handles exporting processed data into various formats."""
 
+import abc
+import bz2
+import gzip
 import json
 import logging
+import lzma
+import math
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import pandas as pd # For CSV export
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
 import yaml # For YAML export
 
+from .analyze import (
+    TaskSelection, iter_analysis_rows, known_column_types, result_columns, select_tasks, tasks_for_columns,
+)
+from .archive import is_parsed_archive
+from .index import find_parsed_archives
+from .query import RecordFilter, parse_where
+from .results import RESULTS_BASENAME, RESULTS_FORMATS, find_results, iter_results, results_columns, typed_frame
+from .structures import STRUCTURE_FORMATS, run_structure_export
+
 log = logging.getLogger("fairtool")
 
-def run_export(input_path: Path, output_dir: Path, export_format: str):
-    """
-    Exports parsed or analyzed data into the specified format.
+# Records are read and written in chunks of at most this many rows.
+DEFAULT_CHUNK_SIZE = 10000
 
-    Args:
-        input_path: Path to the data source (e.g., analysis_summary.csv, directory of JSON/YAML).
-        output_dir: Directory to save the exported files.
-        export_format: The desired output format (e.g., 'csv', 'yaml', 'json_summary').
+# Per-calculation result files (from older `fair analyze` runs or other tools)
+RESULT_FILE_PATTERNS = ("*_analysis.yaml", "*_analysis.yml", "*_analysis.json")
+# Upper bound on the result files one worker loads per task.
+MAX_LOAD_BATCH = 256
+
+# libyaml's loader is many times faster than the pure-Python one.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Compression of the text formats, with the suffix appended to the file name.
+TEXT_CODECS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+_TEXT_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet and Arrow export need the 'pyarrow' package (pip install pyarrow).") from e
+    return pyarrow
+
+
+# --- Sources ---
+
+def _check_columns(available: List[str], columns: Optional[List[str]], where: Optional[RecordFilter]):
+    requested = [*(columns or []), *(where.columns if where is not None else [])]
+    unknown = [column for column in dict.fromkeys(requested) if column not in available]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+
+
+def _select(chunks: Iterator[pd.DataFrame], columns: Optional[List[str]],
+            where: Optional[RecordFilter]) -> Iterator[pd.DataFrame]:
     """
-    # --- Determine Input Data ---
-    # This logic assumes common scenarios, adjust as needed.
-    data_to_export = None
-    source_desc = ""
-
-    analysis_summary_csv = input_path / "analysis_summary.csv" if input_path.is_dir() else None
-    if analysis_summary_csv and analysis_summary_csv.is_file():
-        log.info(f"Using analysis summary CSV as data source: {analysis_summary_csv}")
+    Filters and projects chunks of a source that cannot do it while reading.
+    If no row matches, a single empty chunk still carries the columns to the writer.
+    """
+    matched, empty = False, None
+    for chunk in chunks:
+        if where is not None:
+            chunk = chunk[where.mask(chunk)].reset_index(drop=True)
+        if columns is not None:
+            chunk = chunk[columns]
+        if len(chunk):
+            matched = True
+            yield chunk
+        elif empty is None:
+            empty = chunk
+    if not matched and empty is not None:
+        yield empty
+
+
+def _chunks(rows: Iterator[Dict[str, Any]], columns: Dict[str, str], chunk_size: int) -> Iterator[pd.DataFrame]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield typed_frame(chunk, columns)
+            chunk = []
+    if chunk:
+        yield typed_frame(chunk, columns)
+
+
+def _archive_rows(archives: List[Path], tasks: TaskSelection, jobs: int = 1) -> Iterator[Dict[str, Any]]:
+    for archive, row, error in iter_analysis_rows(archives, tasks, jobs):
+        if row is None:
+            log.error(f"Skipping {archive.name}: {error}")
+        else:
+            yield row
+
+
+def find_result_files(root: Path) -> List[Path]:
+    """Per-calculation result files (RESULT_FILE_PATTERNS) below root, sorted."""
+    return sorted({path for pattern in RESULT_FILE_PATTERNS for path in root.rglob(pattern) if path.is_file()})
+
+
+def _load_result_file(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        record = json.load(f) if path.suffix == ".json" else yaml.load(f, Loader=_YAML_LOADER)
+    if not isinstance(record, dict):
+        raise ValueError("expected a mapping of result names to values")
+    return record
+
+
+def _load_result_batch(paths: List[Path]) -> List[Tuple[Optional[dict], Optional[str]]]:
+    """Loads a batch of result files in one worker: (record, error message) per file."""
+    results = []
+    for path in paths:
         try:
-            data_to_export = pd.read_csv(analysis_summary_csv)
-            source_desc = analysis_summary_csv.name
+            results.append((_load_result_file(path), None))
         except Exception as e:
-            log.error(f"Failed to load {analysis_summary_csv}: {e}. Cannot export from this source.")
-            return # Or try other sources
-    elif input_path.is_file() and input_path.suffix == '.csv':
-         log.info(f"Using provided CSV as data source: {input_path}")
-         try:
-            data_to_export = pd.read_csv(input_path)
-            source_desc = input_path.name
-         except Exception as e:
-            log.error(f"Failed to load {input_path}: {e}. Cannot export from this source.")
-            return
+            results.append((None, str(e)))
+    return results
+
+
+def load_result_files(paths: List[Path], jobs: int = 1) -> pd.DataFrame:
+    """
+    Loads per-calculation result files (YAML or JSON) and merges them into one table.
+
+    With jobs > 1 batches of files are loaded on a process pool; rows keep
+    the order of paths either way. YAML goes through libyaml's C loader when
+    PyYAML was built with it. Files that cannot be read are logged and left
+    out. Each row gets a 'source' column with the path of its file.
+    """
+    start = time.perf_counter()
+    if jobs <= 1 or len(paths) <= 1:
+        loaded = _load_result_batch(paths)
+    else:
+        size = max(1, min(MAX_LOAD_BATCH, math.ceil(len(paths) / (jobs * 4))))
+        batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as pool:
+            loaded = [result for batch in pool.map(_load_result_batch, batches) for result in batch]
+
+    rows = []
+    for path, (record, error) in zip(paths, loaded):
+        if record is None:
+            log.error(f"Skipping {path}: {error}")
+            continue
+        rows.append({"source": path.as_posix(), **record})
+    seconds = time.perf_counter() - start
+    loader = "C" if _YAML_LOADER is not yaml.SafeLoader else "pure-Python"
+    log.info(f"Loaded {len(rows)} of {len(paths)} result file(s) in {seconds:.2f} s "
+             f"({len(paths) / seconds if seconds else float('inf'):,.0f} files/s, {loader} YAML loader).")
+    return pd.DataFrame(rows).convert_dtypes()
+
+
+def iter_records(input_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE, jobs: int = 1,
+                 columns: Optional[List[str]] = None, where: Optional[RecordFilter] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams the records to export as DataFrames of at most chunk_size rows.
+
+    Sources, by priority:
+        - a results table (fair_analysis.parquet/.csv) or any other CSV file;
+        - a directory holding a results table (from `fair analyze`);
+        - a directory of per-calculation result files (RESULT_FILE_PATTERNS),
+          loaded on jobs processes and merged into one table;
+        - a parsed archive, or a directory of them: one row per archive with
+          the default analysis tasks, computed (or taken from the analysis
+          memo) on jobs processes.
+
+    columns (in output order) and where (see query.RecordFilter) restrict the
+    records as early as the source allows: a Parquet table only reads the
+    needed columns and matching row groups, a CSV table only parses the
+    needed columns, and archives only run the tasks producing them.
+
+    Raises:
+        FileNotFoundError: If input_path holds nothing to export.
+        ValueError: For columns the source does not have.
+    """
+    types = known_column_types()
+    table = None
+    if input_path.is_file() and input_path.suffix in (".csv", ".parquet"):
+        table = input_path
     elif input_path.is_dir():
-        # TODO: Implement logic to load data from multiple JSON or YAML files in the directory
-        # Example: Load all *_analysis.yaml files into a list of dicts
-        log.warning(f"Directory input for export currently only checks for 'analysis_summary.csv'. Implement loading of other file types (JSON/YAML) if needed.")
-        # yaml_files = sorted(list(input_path.rglob("*_analysis.yaml")))
-        # if yaml_files: ... load and combine ...
-        # data_to_export = list_of_loaded_dicts
-        # source_desc = f"data from {input_path}"
-        pass # Placeholder
-
-    if data_to_export is None:
-        log.error(f"Could not find or load suitable data to export from: {input_path}")
+        table = find_results(input_path)
+    if table is not None:
+        log.info(f"Exporting records of {table}")
+        _check_columns(results_columns(table), columns, where)
+        chunks = iter_results(table, chunk_size, columns=columns, column_types=types, where=where)
+        # The filter was applied while reading; this only restores the column order
+        yield from _select(chunks, columns, None)
         return
 
-    log.info(f"Preparing to export data from '{source_desc}' to format '{export_format}'...")
+    result_files = find_result_files(input_path) if input_path.is_dir() else []
+    if result_files:
+        log.info(f"Exporting records of {len(result_files)} per-calculation result file(s)")
+        merged = load_result_files(result_files, jobs)
+        _check_columns(list(merged.columns), columns, where)
+        chunks = (merged.iloc[start:start + chunk_size].reset_index(drop=True)
+                  for start in range(0, len(merged), chunk_size))
+        yield from _select(chunks, columns, where)
+        return
 
-    # --- Perform Export based on Format ---
-    try:
-        if export_format.lower() == 'csv':
-            if isinstance(data_to_export, pd.DataFrame):
-                output_file = output_dir / "exported_data.csv"
-                data_to_export.to_csv(output_file, index=False)
-                log.info(f"Data exported successfully to: {output_file}")
-            else:
-                log.error("CSV export requires data loaded as a Pandas DataFrame (e.g., from analysis_summary.csv).")
-                return
-
-        elif export_format.lower() == 'yaml':
-            output_file = output_dir / "exported_data.yaml"
-            export_payload = None
-            if isinstance(data_to_export, pd.DataFrame):
-                # Convert DataFrame to list of dictionaries for better YAML structure
-                export_payload = data_to_export.to_dict(orient='records')
-            elif isinstance(data_to_export, (list, dict)):
-                 export_payload = data_to_export
-            else:
-                 log.error(f"Cannot convert data of type {type(data_to_export)} directly to YAML.")
-                 return
-
-            with open(output_file, 'w') as f:
-                yaml.dump(export_payload, f, default_flow_style=False, sort_keys=False)
-            log.info(f"Data exported successfully to: {output_file}")
-
-        elif export_format.lower() == 'json_summary':
-            # Example: Export a simplified JSON summary
-            output_file = output_dir / "exported_summary.json"
-            export_payload = None
-            if isinstance(data_to_export, pd.DataFrame):
-                 # Example: Convert DataFrame to dict {identifier: {col: value}}
-                 if 'identifier' in data_to_export.columns:
-                     export_payload = data_to_export.set_index('identifier').to_dict(orient='index')
-                 else:
-                     # Fallback: list of records
-                     export_payload = data_to_export.to_dict(orient='records')
-            elif isinstance(data_to_export, (list, dict)):
-                 export_payload = data_to_export # Assume it's already suitable
-            else:
-                 log.error(f"Cannot convert data of type {type(data_to_export)} directly to JSON.")
-                 return
-
-            with open(output_file, 'w') as f:
-                json.dump(export_payload, f, indent=2)
-            log.info(f"Data exported successfully to: {output_file}")
-
-        # Add more formats as needed (e.g., specific database formats, other text formats)
-        # elif export_format.lower() == 'some_other_format':
-        #     ...
+    if input_path.is_file() and is_parsed_archive(input_path):
+        archives = [input_path]
+    else:
+        archives = find_parsed_archives(input_path) if input_path.is_dir() else []
+    if not archives:
+        raise FileNotFoundError(
+            f"Nothing to export in {input_path}: no {RESULTS_BASENAME}.{'/.'.join(RESULTS_FORMATS)} table, "
+            f"no per-calculation result files and no parsed archives."
+        )
+    tasks = select_tasks({})
+    if columns is not None or where is not None:
+        # Only run the tasks producing the requested columns (all default ones without a projection)
+        wanted = columns if columns is not None else list(result_columns(tasks))
+        tasks = tasks_for_columns([*wanted, *(where.columns if where is not None else [])]) or tasks
+    log.info(f"Exporting records of {len(archives)} parsed archive(s)")
+    chunks = _chunks(_archive_rows(archives, tasks, jobs), result_columns(tasks), chunk_size)
+    yield from _select(chunks, columns, where)
+
+
+# --- Writers ---
+
+class Exporter(abc.ABC):
+    """
+    Writes a stream of DataFrame chunks to one file.
+
+    Subclasses set the file extension, the supported compression codecs
+    (the first one is the default) and implement _write/_close. The time
+    spent writing is accumulated in `seconds` for benchmarks.
+    """
+
+    extension = ""
+    codecs: tuple = (None,)
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        compression = compression if compression is not None else self.codecs[0]
+        if compression == "none":
+            compression = None
+        if compression not in self.codecs:
+            supported = ", ".join(codec or "none" for codec in self.codecs)
+            raise ValueError(f"Unsupported compression '{compression}' for {self.extension} export. Choose from: {supported}")
+        self.path = Path(path)
+        self.compression = compression
+        self.n_rows = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, chunk: pd.DataFrame):
+        start = time.perf_counter()
+        self._write(chunk)
+        self.n_rows += len(chunk)
+        self.seconds += time.perf_counter() - start
+
+    def close(self):
+        start = time.perf_counter()
+        self._close()
+        self.seconds += time.perf_counter() - start
+
+    @abc.abstractmethod
+    def _write(self, chunk: pd.DataFrame):
+        """Writes one chunk of rows."""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Finishes and closes the file."""
 
+
+class _TextExporter(Exporter):
+    """Text formats, optionally compressed with gzip, bz2 or xz."""
+
+    codecs = (None, *TEXT_CODECS)
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        super().__init__(path, compression)
+        if self.compression:
+            self.path = self.path.with_name(self.path.name + TEXT_CODECS[self.compression])
+            self._file = _TEXT_OPENERS[self.compression](self.path, "wt", encoding="utf-8", newline="")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+
+    def _close(self):
+        self._file.close()
+
+
+class CsvExporter(_TextExporter):
+    extension = ".csv"
+
+    def _write(self, chunk: pd.DataFrame):
+        chunk.to_csv(self._file, header=self.n_rows == 0, index=False)
+
+
+class JsonLinesExporter(_TextExporter):
+    """One JSON object per line (missing values as null)."""
+
+    extension = ".jsonl"
+
+    def _write(self, chunk: pd.DataFrame):
+        if len(chunk):
+            self._file.write(chunk.to_json(orient="records", lines=True, double_precision=15).rstrip("\n") + "\n")
+
+
+class JsonArrayExporter(_TextExporter):
+    """A single JSON array of records, written element by element."""
+
+    extension = ".json"
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        super().__init__(path, compression)
+        self._file.write("[")
+
+    def _write(self, chunk: pd.DataFrame):
+        if len(chunk):
+            records = chunk.to_json(orient="records", double_precision=15)[1:-1]
+            self._file.write(("," if self.n_rows else "") + "\n" + records)
+
+    def _close(self):
+        self._file.write("\n]\n")
+        super()._close()
+
+
+class YamlExporter(_TextExporter):
+    """A YAML sequence of records; every chunk appends its items to it."""
+
+    extension = ".yaml"
+
+    def _write(self, chunk: pd.DataFrame):
+        if len(chunk):
+            records = json.loads(chunk.to_json(orient="records", double_precision=15))
+            yaml.dump(records, self._file, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+                      default_flow_style=False, sort_keys=False)
+
+
+class ParquetExporter(Exporter):
+    """Parquet; every chunk becomes a row group."""
+
+    extension = ".parquet"
+    codecs = ("snappy", "zstd", "gzip", "brotli", "lz4", None)
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        super().__init__(path, compression)
+        self._pyarrow = _import_pyarrow()
+        self._writer = None
+
+    def _write(self, chunk: pd.DataFrame):
+        pyarrow = self._pyarrow
+        if self._writer is None:
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            self._writer = pyarrow.parquet.ParquetWriter(str(self.path), table.schema,
+                                                         compression=self.compression or "none")
         else:
-            log.error(f"Unsupported export format: '{export_format}'. Supported formats: csv, yaml, json_summary.")
-            return
+            table = pyarrow.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
 
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            self._pyarrow.parquet.write_table(self._pyarrow.table({}), str(self.path))
+
+
+class ArrowExporter(Exporter):
+    """Arrow IPC file format (memory-mappable by pyarrow, polars, DuckDB, ...)."""
+
+    extension = ".arrow"
+    codecs = (None, "lz4", "zstd")
+
+    def __init__(self, path: Path, compression: Optional[str] = None):
+        super().__init__(path, compression)
+        self._pyarrow = _import_pyarrow()
+        self._sink = None
+        self._writer = None
+
+    def _write(self, chunk: pd.DataFrame):
+        pyarrow = self._pyarrow
+        if self._writer is None:
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            self._sink = pyarrow.OSFile(str(self.path), "wb")
+            options = pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pyarrow.ipc.new_file(self._sink, table.schema, options=options)
+            self._schema = table.schema
+        else:
+            table = pyarrow.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is None:
+            self._sink = self._pyarrow.OSFile(str(self.path), "wb")
+            self._writer = self._pyarrow.ipc.new_file(self._sink, self._pyarrow.schema([]))
+        self._writer.close()
+        self._sink.close()
+
+
+# Export format -> (writer, output file stem)
+EXPORTERS = {
+    "csv": (CsvExporter, "exported_data"),
+    "jsonl": (JsonLinesExporter, "exported_data"),
+    "parquet": (ParquetExporter, "exported_data"),
+    "arrow": (ArrowExporter, "exported_data"),
+    "yaml": (YamlExporter, "exported_data"),
+    "json_summary": (JsonArrayExporter, "exported_summary"),
+}
+
+
+def open_exporter(output_dir: Path, export_format: str, compression: Optional[str] = None) -> Exporter:
+    """Creates the writer of export_format in output_dir (e.g. exported_data.parquet)."""
+    if export_format.lower() not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: '{export_format}'. Supported formats: {', '.join(EXPORTERS)}.")
+    exporter, stem = EXPORTERS[export_format.lower()]
+    return exporter(output_dir / f"{stem}{exporter.extension}", compression)
+
+
+def run_export(input_path: Path, output_dir: Path, export_format: str, compression: Optional[str] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, jobs: int = 1, columns: Optional[List[str]] = None,
+               where: Optional[str] = None) -> Optional[Path]:
+    """
+    Exports parsed or analyzed data into the specified format.
+
+    Records are streamed from the source (see iter_records) to the writer in
+    chunks of chunk_size rows, so memory use does not grow with the number
+    of calculations.
+
+    Args:
+        input_path: A results table or CSV file, a parsed archive, or a directory holding
+            a results table, per-calculation result files or archives.
+        output_dir: Directory to save the exported file.
+        export_format: One of EXPORTERS (csv, jsonl, parquet, arrow, yaml, json_summary),
+            or one of STRUCTURE_FORMATS (optimade, extxyz, ase-db).
+        compression: Codec of the format (see the Exporter classes); None uses its default.
+        chunk_size: Maximum rows held in memory at a time.
+        jobs: Worker processes loading result files or analyzing archives (see iter_records).
+        columns: Only export these columns, in this order.
+        where: Only export the records matching this filter, e.g. "scf_converged and band_gap > 1"
+            (see query.RecordFilter).
+
+    Returns:
+        The path of the exported file, or None if there was nothing to export.
+    """
+    record_filter = parse_where(where) if where else None
+    if export_format.lower() in STRUCTURE_FORMATS:
+        if columns or where:
+            raise ValueError("Column and row selections apply to the table formats only, "
+                             f"not to '{export_format}'.")
+        # Structures with their properties rather than a table (see structures.py)
+        return run_structure_export(input_path, output_dir, export_format.lower())
+    output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        with open_exporter(output_dir, export_format, compression) as exporter:
+            for chunk in iter_records(input_path, chunk_size, jobs, columns=columns, where=record_filter):
+                exporter.write(chunk)
+    except FileNotFoundError as e:
+        log.error(str(e))
+        exporter.path.unlink(missing_ok=True)
+        return None
     except Exception as e:
         log.error(f"An error occurred during export (format: {export_format}): {e}", exc_info=True)
         raise # Re-raise to be caught by CLI
 
+    log.info(f"Exported {exporter.n_rows} record(s) to {exporter.path} in {exporter.seconds:.2f} s of writing.")
     log.info("Export process completed.")
+    return exporter.path
+
+
+def benchmark_export(input_path: Path, formats: Optional[List[str]] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Writes the records of input_path in every format and codec into a temporary
+    directory and measures the time spent writing.
+
+    Formats needing a missing optional package are skipped.
 
+    Returns:
+        One dict per (format, codec) with rows, seconds, bytes and rows_per_s.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fair_export_bench_") as tmp:
+        for export_format in formats or list(EXPORTERS):
+            exporter_class, _ = EXPORTERS[export_format]
+            for codec in exporter_class.codecs:
+                target = Path(tmp) / f"{export_format}-{codec or 'none'}"
+                target.mkdir()
+                try:
+                    with open_exporter(target, export_format, codec or "none") as exporter:
+                        for chunk in iter_records(input_path, chunk_size):
+                            exporter.write(chunk)
+                except ImportError as e:
+                    log.warning(f"Skipping {export_format} in the benchmark: {e}")
+                    break
+                except Exception as e:
+                    log.warning(f"Benchmark of {export_format} ({codec or 'none'}) failed: {e}")
+                    continue
+                size = exporter.path.stat().st_size
+                results.append({
+                    "format": export_format,
+                    "compression": codec or "none",
+                    "rows": exporter.n_rows,
+                    "seconds": exporter.seconds,
+                    "bytes": size,
+                    "rows_per_s": exporter.n_rows / exporter.seconds if exporter.seconds else float("inf"),
+                })
+                exporter.path.unlink()
+    return results
@@ -0,0 +1,248 @@
+# fairtool/index.py
+
+"""Persistent project index (SQLite) of parsed calculations."""
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .archive import find_archives, is_parsed_archive
+from .cache import load_cache_record
+
+log = logging.getLogger("fairtool")
+
+INDEX_FILENAME = "fair_index.sqlite"
+INDEX_STATUSES = ("parsed", "skipped", "failed")
+
+# Key scalars are stored in the SI units of the archive (energies in J).
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    input_path   TEXT PRIMARY KEY,
+    archive_path TEXT,
+    outputs      TEXT,
+    input_sha256 TEXT,
+    status       TEXT NOT NULL,
+    error        TEXT,
+    program      TEXT,
+    formula      TEXT,
+    n_atoms      INTEGER,
+    energy_total REAL,
+    band_gap     REAL,
+    updated      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calculations_archive ON calculations (archive_path);
+"""
+_COLUMNS = (
+    "input_path", "archive_path", "outputs", "input_sha256", "status", "error",
+    "program", "formula", "n_atoms", "energy_total", "band_gap", "updated",
+)
+
+
+def _first(items: Any) -> dict:
+    return items[0] if isinstance(items, list) and items and isinstance(items[0], dict) else {}
+
+
+def _last(items: Any) -> dict:
+    return items[-1] if isinstance(items, list) and items and isinstance(items[-1], dict) else {}
+
+
+def extract_key_scalars(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Picks the scalars kept in the index from a (merged) NOMAD archive."""
+    results = data.get("results") or {}
+    material = results.get("material") or {}
+    run = _first(data.get("run"))
+    atoms = _last(run.get("system")).get("atoms") or {}
+    energy = (_last(run.get("calculation")).get("energy") or {}).get("total") or {}
+    band_gap = _first(((results.get("properties") or {}).get("electronic") or {}).get("band_gap"))
+    labels = atoms.get("labels")
+    return {
+        "program": (run.get("program") or {}).get("name"),
+        "formula": material.get("chemical_formula_reduced") or material.get("chemical_formula_hill"),
+        "n_atoms": len(labels) if isinstance(labels, list) else None,
+        "energy_total": energy.get("value"),
+        "band_gap": band_gap.get("value"),
+    }
+
+
+class ProjectIndex:
+    """
+    SQLite index of the calculations below one project directory.
+
+    Paths are stored relative to the directory holding the index file, so a
+    project can be moved or copied to another machine with its index.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.connection = sqlite3.connect(str(self.path), timeout=60)
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def _relative(self, path: Path) -> str:
+        path = Path(path).resolve()
+        try:
+            return path.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _absolute(self, stored: str) -> Path:
+        return (self.root / stored).resolve()
+
+    def upsert(self, entry: Dict[str, Any]):
+        """Inserts or replaces the row of entry['input_path']."""
+        row = dict.fromkeys(_COLUMNS)
+        row.update(entry)
+        row["input_path"] = self._relative(row["input_path"])
+        if row["archive_path"] is not None:
+            row["archive_path"] = self._relative(row["archive_path"])
+        if isinstance(row["outputs"], list):
+            row["outputs"] = json.dumps(row["outputs"])
+        row["updated"] = row["updated"] or time.time()
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO calculations ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+            [row[column] for column in _COLUMNS],
+        )
+
+    def record_parse(self, input_file: Path, archive: Path, status: str, error: Optional[str] = None):
+        """
+        Records the outcome of parsing input_file into archive.
+
+        Hash, outputs and key scalars come from the parse cache record, so
+        this never opens the archive itself.
+        """
+        if status not in INDEX_STATUSES:
+            raise ValueError(f"Unknown index status '{status}'")
+        entry = {"input_path": input_file, "archive_path": archive, "status": status, "error": error}
+        record = load_cache_record(archive) if status != "failed" else None
+        if record:
+            entry["input_sha256"] = record.get("input", {}).get("sha256")
+            entry["outputs"] = record.get("outputs")
+            entry.update(record.get("scalars") or {})
+        self.upsert(entry)
+
+    def rows(self, under: Optional[Path] = None) -> List[Dict[str, Any]]:
+        """Returns all rows (with absolute paths), optionally only archives below a directory."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM calculations"
+        parameters: list = []
+        if under is not None:
+            prefix = self._relative(under)
+            if prefix != ".":
+                # Range scan on the archive_path index: '0' is the character after '/'
+                query += " WHERE archive_path >= ? AND archive_path < ?"
+                parameters = [f"{prefix}/", f"{prefix}0"]
+        rows = []
+        for values in self.connection.execute(query + " ORDER BY input_path", parameters):
+            row = dict(zip(_COLUMNS, values))
+            row["input_path"] = self._absolute(row["input_path"])
+            if row["archive_path"] is not None:
+                row["archive_path"] = self._absolute(row["archive_path"])
+            if row["outputs"]:
+                row["outputs"] = json.loads(row["outputs"])
+            rows.append(row)
+        return rows
+
+    def archives(self, under: Optional[Path] = None, recursive: bool = True) -> List[Path]:
+        """Parsed archives from successful parses that still exist on disk."""
+        found = set()
+        directory = Path(under).resolve() if under is not None else None
+        for row in self.rows(under):
+            archive = row["archive_path"]
+            if row["status"] == "failed" or archive is None:
+                continue
+            if directory is not None and not recursive and archive.parent != directory:
+                continue
+            if archive.exists():
+                found.add(archive)
+        return sorted(found)
+
+
+def locate_index(path: Path) -> Optional[Path]:
+    """Finds the index covering path: in path itself or the nearest parent directory."""
+    path = Path(path).resolve()
+    start = path if path.is_dir() else path.parent
+    for directory in (start, *start.parents):
+        candidate = directory / INDEX_FILENAME
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def find_parsed_archives(path: Path, recursive: bool = True) -> List[Path]:
+    """
+    Lists the parsed archives below path, from the project index when there is one.
+
+    The tree is still scanned for archives the index has no row for (written
+    by run_parser directly, copied in, or parsed before the index existed).
+    They are included with a warning suggesting `fair index --rebuild`.
+    Archives the index knows about are taken from it, so a failed re-parse
+    does not bring back its stale archive. Without an index (e.g. archives
+    produced by an older fairtool) only the scan is used.
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path] if is_parsed_archive(path) else []
+
+    scanned = find_archives(path, recursive=recursive)
+    index_file = locate_index(path)
+    if index_file is None:
+        return scanned
+    try:
+        with ProjectIndex(index_file) as index:
+            archives = index.archives(under=path, recursive=recursive)
+            known = {row["archive_path"].with_suffix("") for row in index.rows(under=path)
+                     if row["archive_path"] is not None}
+    except sqlite3.Error as e:
+        log.warning(f"Could not read project index {index_file} ({e}); scanning the directory instead.")
+        return scanned
+
+    unindexed = [archive.resolve() for archive in scanned if archive.resolve().with_suffix("") not in known]
+    if unindexed:
+        log.warning(f"{len(unindexed)} archive(s) below {path} are missing from {index_file}; including them. "
+                    f"Run 'fair index --rebuild {index_file.parent}' to index them.")
+    log.debug(f"Found {len(archives)} archive(s) for {path} in {index_file}")
+    return sorted({*archives, *unindexed})
+
+
+def rebuild_index(root: Path) -> int:
+    """
+    Recreates the index of root by crawling it once for parsed archives.
+
+    Returns:
+        int: Number of calculations indexed.
+    """
+    from .archive import load_archive
+
+    index_file = Path(root) / INDEX_FILENAME
+    if index_file.exists():
+        index_file.unlink()
+    count = 0
+    with ProjectIndex(index_file) as index:
+        for archive in find_archives(Path(root), recursive=True):
+            record = load_cache_record(archive)
+            if record:
+                input_path = Path(record.get("input", {}).get("path", archive))
+                index.record_parse(input_path, archive, "parsed")
+            else:
+                try:
+                    scalars = extract_key_scalars(load_archive(archive))
+                except Exception as e:
+                    log.warning(f"Could not read {archive} for the index: {e}")
+                    scalars = {}
+                # The input is unknown without a cache record; key the row on the archive
+                index.upsert(dict(scalars, input_path=archive, archive_path=archive, status="parsed"))
+            count += 1
+    return count
@@ -2,30 +2,61 @@
 
 """Handles the parsing of calculation files."""
 
+import importlib.util
 import json
 import logging
-import pint
 from pathlib import Path
+import re
 import subprocess
+import tempfile
 import time
 import numpy as np
-from typing import Optional  
+from typing import Optional, Tuple, Callable, BinaryIO, Iterator, Union
 from pymatgen.core import Structure, Lattice 
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 
+from .archive import archive_path, save_archive
+from .prune import prune_archive, resolve_profile
+from .cache import cache_key, input_fingerprint, is_cache_hit, load_cache_record, write_cache_record
+from .index import extract_key_scalars
+
 import os
 # from electronic_parsers import auto
 ELEMENTARY_CHARGE_VALUE = 1.602176634e-19  # Elementary charge in Coulombs, used for energy conversion if needed
 
 
 log = logging.getLogger(__name__)
-u = pint.UnitRegistry()
 
-def _create_structure_json(full_data: dict, output_dir: Path, base_name: str):
+# Parser backends understood by run_parser. 'auto' prefers the in-process
+# engine when nomad-lab is importable and falls back to the `nomad` CLI.
+PARSE_ENGINES = ("auto", "inprocess", "subprocess")
+
+# Conventional cell for the structure viewer; one per output directory.
+STRUCTURE_JSON_NAME = "fair-structure.json"
+
+# Cached (parse, normalize_all) pair from nomad.client; imported on first use
+# so the import cost is paid once per process rather than once per file.
+_nomad_client: Optional[Tuple[Callable, Callable]] = None
+
+# Size of the reads from the `nomad parse` stdout pipe.
+STDOUT_CHUNK_SIZE = 1 << 20
+
+# Containers down to this depth are assembled incrementally while the NOMAD
+# output is read; deeper values are decoded one subtree at a time. Depth 5 is
+# archive -> run list -> run -> calculation list -> calculation, so the text
+# buffered at once is at most one calculation's sub-section (e.g. eigenvalues).
+STREAM_MANAGED_DEPTH = 5
+
+# Characters that change the nesting state of a JSON text.
+_JSON_STRUCTURAL = re.compile(rb'[{}\[\]"\\]')
+# Tokens between structural characters: separators and scalar literals.
+_JSON_GAP_TOKEN = re.compile(rb'[:,]|[^\s:,]+')
+
+def _structure_json_data(full_data: dict, base_name: str) -> Optional[dict]:
     """
-    Save only the conventional cell to fair-structure.json in a format compatible
-    with the existing viewer: lattice.matrix = 3 Cartesian vectors (Å),
-    sites[].xyz = Cartesian coordinates (Å). Also include frac_coords for reference.
+    The conventional cell in the fair-structure.json format of the existing
+    viewer: lattice.matrix = 3 Cartesian vectors (Å), sites[].xyz = Cartesian
+    coordinates (Å), plus frac_coords for reference. None without a structure.
     """
     structure = None
 
@@ -55,7 +86,7 @@ def _create_structure_json(full_data: dict, output_dir: Path, base_name: str):
 
     if structure is None:
         log.info(f"No structure found for {base_name}; skipping fair-structure.json.")
-        return
+        return None
 
     # 3) Prepare JSON-friendly output: lattice as 3 vectors, sites with xyz (Cartesian)
     lattice_matrix = np.array(structure.lattice.matrix).tolist()  # [[ax,ay,az],[bx,by,bz],[cx,cy,cz]]
@@ -71,14 +102,16 @@ def _create_structure_json(full_data: dict, output_dir: Path, base_name: str):
             "frac_coords": frac
         })
 
-    data = {
+    return {
         "lattice": {"matrix": lattice_matrix},
         "sites": sites_out,
         "formula": structure.composition.reduced_formula
     }
 
-    # 4) Save file
-    output_path = output_dir / "fair-structure.json"
+
+def write_structure_json(data: dict, output_dir: Path):
+    """Saves structure data (see _structure_json_data) as output_dir/fair-structure.json."""
+    output_path = output_dir / STRUCTURE_JSON_NAME
     try:
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
@@ -123,132 +156,377 @@ def _nomad_atoms_to_pymatgen(atoms_block: dict) -> Optional[Structure]:
         return None
 
 
-def run_parser(input_file: Path, output_dir: Path, force: bool) -> bool:
+def _load_nomad_client() -> Tuple[Callable, Callable]:
+    """
+    Imports the NOMAD parsing API once and caches it for the lifetime of the process.
+
+    Returns:
+        A tuple of (nomad.client.parse, nomad.client.normalize_all).
+    """
+    global _nomad_client
+    if _nomad_client is None:
+        from nomad.client import parse as nomad_parse, normalize_all
+        _nomad_client = (nomad_parse, normalize_all)
+    return _nomad_client
+
+
+def _resolve_engine(engine: str) -> str:
+    """Maps the requested parser engine onto 'inprocess' or 'subprocess'."""
+    if engine not in PARSE_ENGINES:
+        raise ValueError(f"Unknown parser engine '{engine}'. Choose from: {', '.join(PARSE_ENGINES)}")
+    if engine == "auto":
+        if _nomad_client is not None or importlib.util.find_spec("nomad") is not None:
+            return "inprocess"
+        return "subprocess"
+    return engine
+
+
+def _select_parse_function(engine: str) -> Callable[[Path], dict]:
+    """
+    Returns the function that turns an input file into the merged NOMAD dictionary.
+
+    In 'auto' mode a failing in-process import falls back to the subprocess engine.
+    """
+    resolved = _resolve_engine(engine)
+    if resolved == "inprocess":
+        try:
+            _load_nomad_client()
+        except ImportError as e:
+            if engine != "auto":
+                raise
+            log.warning(f"Could not import the NOMAD parsers in-process ({e}); falling back to `nomad parse`.")
+            return _parse_with_subprocess
+        return _parse_in_process
+    return _parse_with_subprocess
+
+
+def _parse_in_process(input_file: Path) -> dict:
+    """
+    Parses a file with the NOMAD parsers imported into this interpreter.
+
+    Mirrors `nomad parse --show-archive --show-metadata`: every entry archive is
+    normalized and its archive and metadata dictionaries are merged, in that order.
+    """
+    nomad_parse, normalize_all = _load_nomad_client()
+    full_data = {}
+    for entry_archive in nomad_parse(str(input_file)):
+        normalize_all(entry_archive)
+        metadata = entry_archive.metadata
+        if metadata is not None and hasattr(metadata, "apply_archive_metadata"):
+            metadata.apply_archive_metadata(entry_archive)
+        full_data.update(entry_archive.m_to_dict())
+        if metadata is not None:
+            full_data.update(metadata.m_to_dict())
+    return full_data
+
+
+class _JsonStreamDecoder:
+    """
+    Incremental decoder for a byte stream of concatenated JSON documents.
+
+    Objects and arrays down to `managed_depth` are created here as their
+    tokens arrive. Anything nested deeper is buffered as text and handed to
+    json.loads as soon as it is complete, so the memory held for raw text is
+    bounded by the largest such subtree rather than by the whole output.
+    Scalars follow json.loads semantics (NaN and Infinity are accepted).
+    """
+
+    _GAP, _STRING, _NESTED = range(3)
+
+    def __init__(self, managed_depth: int = STREAM_MANAGED_DEPTH):
+        self.managed_depth = managed_depth
+        self.documents = []   # Completed top-level documents, drained by the caller
+        self._frames = []     # [container, is_dict, pending key, expected token]
+        self._parts = []      # Text of the gap, string or subtree being captured
+        self._mode = self._GAP
+        self._nested_depth = 0
+        self._nested_in_string = False
+        self._escaped_at = -1
+        self._offset = 0
+
+    def feed(self, chunk: bytes):
+        """Consumes the next chunk of the stream."""
+        mark = 0
+        for match in _JSON_STRUCTURAL.finditer(chunk):
+            index = match.start()
+            if self._offset + index == self._escaped_at:
+                continue
+            char = match.group()
+
+            if self._mode == self._STRING or (self._mode == self._NESTED and self._nested_in_string):
+                if char == b"\\":
+                    self._escaped_at = self._offset + index + 1
+                elif char == b'"':
+                    if self._mode == self._STRING:
+                        text = self._take(chunk, mark, index + 1)
+                        mark = index + 1
+                        self._mode = self._GAP
+                        self._string(json.loads(text))
+                    else:
+                        self._nested_in_string = False
+                continue
+
+            if self._mode == self._NESTED:
+                if char == b'"':
+                    self._nested_in_string = True
+                elif char in (b"{", b"["):
+                    self._nested_depth += 1
+                elif char in (b"}", b"]"):
+                    self._nested_depth -= 1
+                    if self._nested_depth == 0:
+                        text = self._take(chunk, mark, index + 1)
+                        mark = index + 1
+                        self._mode = self._GAP
+                        self._value(json.loads(text))
+                continue
+
+            # Between tokens of a container we assemble ourselves (or between documents)
+            self._gap(self._take(chunk, mark, index))
+            mark = index
+            if char == b'"':
+                self._mode = self._STRING
+            elif char in (b"{", b"["):
+                if len(self._frames) < self.managed_depth:
+                    self._open(char == b"{")
+                    mark = index + 1
+                else:
+                    self._expect_value()
+                    self._mode = self._NESTED
+                    self._nested_depth = 1
+            elif char in (b"}", b"]"):
+                self._close(char == b"}")
+                mark = index + 1
+            else:
+                self._error("Unexpected backslash outside of a string", chunk[index:index + 200])
+        self._parts.append(chunk[mark:])
+        self._offset += len(chunk)
+
+    def close(self):
+        """Checks that the stream ended between documents."""
+        tail = b"".join(self._parts)
+        self._parts = []
+        if self._mode != self._GAP or self._frames:
+            self._error("Unterminated JSON document in parser output", tail[-200:])
+        self._gap(tail)
+
+    def _take(self, chunk: bytes, start: int, end: int) -> bytes:
+        text = b"".join(self._parts) + chunk[start:end] if self._parts else chunk[start:end]
+        self._parts = []
+        return text
+
+    def _error(self, message: str, text: bytes):
+        raise json.JSONDecodeError(message, text.decode("utf-8", errors="replace"), 0)
+
+    def _gap(self, gap: bytes):
+        for token in _JSON_GAP_TOKEN.findall(gap):
+            if not self._frames:
+                self._error("Expecting value", gap.strip())
+            frame = self._frames[-1]
+            if token == b":":
+                if frame[3] != "colon":
+                    self._error("Unexpected ':'", gap)
+                frame[3] = "value"
+            elif token == b",":
+                if frame[3] != "comma":
+                    self._error("Unexpected ','", gap)
+                frame[3] = "key" if frame[1] else "value"
+            else:
+                self._value(json.loads(token))
+
+    def _expect_value(self):
+        if self._frames and self._frames[-1][3] != "value":
+            self._error(f"Expecting {self._frames[-1][3]}", b"")
+
+    def _value(self, value):
+        if not self._frames:
+            self.documents.append(value)
+            return
+        self._expect_value()
+        frame = self._frames[-1]
+        if frame[1]:
+            frame[0][frame[2]] = value
+            frame[2] = None
+        else:
+            frame[0].append(value)
+        frame[3] = "comma"
+
+    def _string(self, value: str):
+        if self._frames and self._frames[-1][1] and self._frames[-1][3] == "key":
+            self._frames[-1][2] = value
+            self._frames[-1][3] = "colon"
+        else:
+            self._value(value)
+
+    def _open(self, is_dict: bool):
+        container = {} if is_dict else []
+        if self._frames:
+            self._value(container)
+        self._frames.append([container, is_dict, None, "key" if is_dict else "value"])
+
+    def _close(self, is_dict: bool):
+        if not self._frames or self._frames[-1][1] != is_dict:
+            self._error("Unbalanced brackets in parser output", b"}" if is_dict else b"]")
+        frame = self._frames.pop()
+        if frame[3] not in ("comma", "key" if is_dict else "value"):
+            self._error(f"Expecting {frame[3]}", b"")
+        if not self._frames:
+            self.documents.append(frame[0])
+
+
+def _iter_json_documents(stream: BinaryIO, chunk_size: int = STDOUT_CHUNK_SIZE,
+                         managed_depth: int = STREAM_MANAGED_DEPTH) -> Iterator:
+    """
+    Yields the top-level JSON documents of a byte stream one at a time.
+
+    Args:
+        stream: Binary file-like object, e.g. the stdout pipe of `nomad parse`.
+        chunk_size: Number of bytes per read.
+        managed_depth: Nesting depth assembled incrementally (see _JsonStreamDecoder).
+
+    Raises:
+        json.JSONDecodeError: If the output is malformed or truncated.
+    """
+    decoder = _JsonStreamDecoder(managed_depth)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        decoder.feed(chunk)
+        while decoder.documents:
+            yield decoder.documents.pop(0)
+    decoder.close()
+    while decoder.documents:
+        yield decoder.documents.pop(0)
+
+
+def _parse_with_subprocess(input_file: Path) -> dict:
+    """
+    Parses a file by running the `nomad parse` command and decoding its stdout.
+
+    The command prints several JSON documents back to back (archive, metadata).
+    They are decoded incrementally from the stdout pipe and merged into one
+    dictionary, so the raw output is never held as a single string.
+    """
+    # The command to run, broken into a list for subprocess
+    command = [
+        "nomad", "parse",
+        "--show-archive",
+        "--show-metadata",
+        str(input_file)
+    ]
+
+    # stderr goes to a temporary file so a chatty parser cannot fill the pipe
+    # and block while we are still reading stdout.
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+        full_data = {}
+        try:
+            with process.stdout:
+                for document in _iter_json_documents(process.stdout):
+                    full_data.update(document)
+        except json.JSONDecodeError as decode_error:
+            # A failing command usually leaves broken output behind; report the failure itself.
+            returncode = process.wait()
+            if returncode != 0:
+                raise _called_process_error(returncode, command, stderr_file) from decode_error
+            raise
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+        returncode = process.wait()
+        if returncode != 0:
+            raise _called_process_error(returncode, command, stderr_file)
+    return full_data
+
+
+def _called_process_error(returncode: int, command: list, stderr_file) -> subprocess.CalledProcessError:
+    """Builds a CalledProcessError carrying the stderr captured in stderr_file."""
+    stderr_file.seek(0)
+    stderr = stderr_file.read().decode("utf-8", errors="replace")
+    return subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
+
+def run_parser(input_file: Path, output_dir: Path, force: bool, engine: str = "auto",
+               archive_format: str = "json", profile: Union[str, Path, dict, None] = None,
+               structures: Optional[list] = None) -> bool:
     """
-    Parses a single calculation file using electronic-parsers.
+    Parses a single calculation file using the NOMAD parsers.
 
     Args:
         input_file: Path to the calculation output file.
         output_dir: Directory to save the parsed JSON and Markdown.
-        force: Whether to overwrite existing output files.
-        
+        force: Whether to parse even if the cache says the output is up to date.
+        engine: Parser backend, one of PARSE_ENGINES. 'inprocess' reuses the
+            NOMAD parsers imported into this process, 'subprocess' runs the
+            `nomad parse` command, 'auto' picks 'inprocess' when available.
+        archive_format: On-disk format of the parsed archive, one of
+            archive.ARCHIVE_FORMATS ('json' or the compact 'msgpack').
+        profile: Field-pruning profile applied before saving: a name from
+            prune.PRUNE_PROFILES, a YAML file or a resolved profile dict
+            (default 'full').
+        structures: If given, the fair-structure.json data is appended to this
+            list instead of being written. fair-structure.json is shared by
+            every file parsed into output_dir, so parallel callers collect it
+            and write it themselves in file order (see write_structure_json).
+
     Returns:
         bool: True if parsing was skipped, False otherwise.
     """
     # Define output file paths
     base_name = input_file.stem
-    json_output_path = output_dir / f"fair_parsed_{base_name}.json"
+    json_output_path = archive_path(output_dir, base_name, archive_format)
     
     # Unused variable removed
     # md_output_path = output_dir / f"fair_summarized_{base_name}.md"
 
     log.info(f"Preparing to parse {input_file.name} -> {json_output_path.name}")
 
-    # If not forcing, check existing parsed JSON metadata to decide whether to skip
-    if not force and json_output_path.exists():
-        try:
-            with open(json_output_path, 'r', encoding='utf-8') as jf:
-                existing = json.load(jf)
-            fair_time = None
-            if isinstance(existing, dict):
-                md = existing.get('metadata')
-                if isinstance(md, dict):
-                    fair_time = md.get('fair_parse_time')
-            try:
-                file_mtime = input_file.stat().st_mtime
-            except Exception:
-                file_mtime = None
-
-            if fair_time is not None and file_mtime is not None:
-                try:
-                    if float(fair_time) >= float(file_mtime):
-                        log.info(f"Skipping parse for {input_file.name} — unchanged since last parse.")
-                        return True # Return True to indicate skipped
-                except Exception:
-                    log.debug(f"Could not compare times; will re-parse.")
-        except Exception:
-            log.debug(f"Could not read existing parsed JSON {json_output_path}; will re-parse.")
+    # Skip when the cache record says this exact input was already parsed
+    # with the same fairtool/nomad versions and options. The decision only
+    # reads the small record, never the (possibly large) archive itself.
+    prune_profile = resolve_profile(profile)
+    key_options = {"archive_format": archive_format, "profile": prune_profile}
+    record = load_cache_record(json_output_path)
+    fingerprint = input_fingerprint(input_file, record)
+    key = cache_key(fingerprint, key_options)
+    if not force and is_cache_hit(json_output_path, record, key):
+        if record["input"].get("mtime_ns") != fingerprint["mtime_ns"]:
+            # Same content under a new timestamp (copied, restored, touched)
+            write_cache_record(json_output_path, input_file, fingerprint, key, record["outputs"], record.get("scalars"))
+        log.info(f"Skipping parse for {input_file.name} — unchanged since last parse.")
+        return True # Return True to indicate skipped
 
     log.info(f"Attempting to parse {input_file.name} ...")
 
-    # The command to run, broken into a list for subprocess
-    command = [
-        "nomad", "parse",
-        "--show-archive",
-        "--show-metadata",
-        str(input_file)
-    ]
-
     try:
-        # Run the NOMAD parser command
-        process = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,  # To get stdout/stderr as strings
-            check=True, # To raise CalledProcessError on non-zero exit codes
-            encoding='utf-8'
-        )
-
-        raw_json_output = process.stdout
-        if not raw_json_output:
+        parse_function = _select_parse_function(engine)
+        full_data = parse_function(input_file)
+        if not full_data:
             log.warning(f"Parser returned no data for {input_file.name}.")
             return False
 
-        # Parse the full JSON output into a Python dictionary
-        decoder = json.JSONDecoder()
-        pos = 0
-        full_data = {}
-        raw_json_output = raw_json_output.strip()
-        while pos < len(raw_json_output):
-            obj, pos = decoder.raw_decode(raw_json_output, pos)
-            full_data.update(obj)
-
-        # --- Filter for necessary fields (using safe .pop()) ---
-        if "run" in full_data and isinstance(full_data["run"], list):
-            for run_item in full_data["run"]:
-                if "method" in run_item and isinstance(run_item["method"], list):
-                    for method_item in run_item["method"]:
-                        if "k_mesh" in method_item and isinstance(method_item["k_mesh"], dict):
-                            if "points" in method_item["k_mesh"] and isinstance(method_item["k_mesh"]["points"], dict):
-                                method_item["k_mesh"]["points"].pop("im", None) # Safe pop
-                
-                if "calculation" in run_item and isinstance(run_item["calculation"], list):
-                    for calc_item in run_item["calculation"]:
-                        # calc_item.pop("dos_electronic", None) # Safe pop
-                        # calc_item.pop("eigenvalues", None) # Safe pop
-                        pass
-
-        # Safe-pop top-level keys
-        full_data.pop("entry_name", None)
-        full_data.pop("entry_type", None)
-        full_data.pop("mainfile", None)
-        full_data.pop("domain", None)
-        full_data.pop("n_quantities", None)
-        full_data.pop("quantities", None)
-        full_data.pop("optimade", None)
-        full_data.pop("sections", None)
-        full_data.pop("section_defs", None)
-        full_data.pop("workflow2", None)
-
-        if "metadata" in full_data and isinstance(full_data["metadata"], dict):
-            full_data["metadata"].pop("n_quantities", None)
-            full_data["metadata"].pop("quantities", None)
-            full_data["metadata"].pop("sections", None)
-            full_data["metadata"].pop("section_defs", None)
+        archive = prune_archive(full_data, prune_profile)
 
         log.info(f"Saving filtered parsed data to {json_output_path}")
         try:
             # Add fair_parse_time *after* filtering
-            if "metadata" not in full_data or not isinstance(full_data.get('metadata'), dict):
-                full_data["metadata"] = {}
-            full_data["metadata"]["fair_parse_time"] = time.time()
+            if "metadata" not in archive or not isinstance(archive.get('metadata'), dict):
+                archive["metadata"] = {}
+            archive["metadata"]["fair_parse_time"] = time.time()
             
-            with open(json_output_path, 'w', encoding='utf-8') as f:
-                json.dump(full_data, f, indent=2,ensure_ascii=False)
-            log.info(f"Successfully saved JSON: {json_output_path.name}")
+            save_archive(archive, json_output_path)
+            log.info(f"Successfully saved parsed archive: {json_output_path.name}")
 
-            # Also create structure JSON
-            _create_structure_json(full_data, output_dir, base_name)
+            # Also create structure JSON (from the unpruned data, so any profile gets one)
+            structure_data = _structure_json_data(full_data, base_name)
+            if structure_data is not None:
+                if structures is not None:
+                    structures.append(structure_data)
+                else:
+                    write_structure_json(structure_data, output_dir)
+
+            write_cache_record(
+                json_output_path, input_file, fingerprint, key, [json_output_path.name], extract_key_scalars(full_data)
+            )
 
         except Exception as json_err:
             log.error(f"Failed to save JSON for {input_file.name}: {json_err}")
@@ -259,12 +537,15 @@ def run_parser(input_file: Path, output_dir: Path, force: bool) -> bool:
     except FileNotFoundError:
         log.error("`nomad` command not found. Is NOMAD installed and in your system's PATH?")
         raise
+    except ImportError as e:
+        log.error(f"Could not import the NOMAD parsers in-process ({e}). Install nomad-lab or use the 'subprocess' engine.")
+        raise
     except subprocess.CalledProcessError as e:
             log.error(f"NOMAD parsing command failed for {input_file.name} with exit code {e.returncode}: {e.stderr}", exc_info=False)
             raise
     except json.JSONDecodeError as e:
         log.error(f"Failed to decode JSON output from NOMAD parser for {input_file.name}: {e}")
-        log.error(f"Problematic output snippet: {raw_json_output[e.pos:e.pos+200]}...")
+        log.error(f"Problematic output snippet: {e.doc[e.pos:e.pos+200]}...")
         raise
     except Exception as e:
         log.error(f"An unexpected error occurred during parsing of {input_file.name}: {e}", exc_info=True)
@@ -0,0 +1,208 @@
+# fairtool/prune.py
+
+"""Field-pruning profiles applied to the NOMAD archive before it is saved."""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import yaml
+
+log = logging.getLogger("fairtool")
+
+# Fields dropped whatever the profile: bulky or redundant NOMAD bookkeeping.
+BASE_EXCLUDE = [
+    "entry_name",
+    "entry_type",
+    "mainfile",
+    "domain",
+    "n_quantities",
+    "quantities",
+    "optimade",
+    "sections",
+    "section_defs",
+    "workflow2",
+    "metadata.n_quantities",
+    "metadata.quantities",
+    "metadata.sections",
+    "metadata.section_defs",
+    "run.method.k_mesh.points.im",
+]
+
+# Named profiles. Paths are dot-separated keys; lists are traversed
+# transparently (so 'run.calculation.energy' applies to every run and every
+# calculation) and '*' matches any key. With 'include', only the listed
+# subtrees are kept; 'exclude' is applied afterwards.
+PRUNE_PROFILES: Dict[str, Dict[str, Optional[List[str]]]] = {
+    # Energies, band gap and structure, for high-throughput screening
+    "minimal": {
+        "include": [
+            "metadata",
+            "results.material",
+            "results.method",
+            "results.properties",
+            "run.program",
+            "run.system",
+            "run.calculation.system_ref",
+            "run.calculation.method_ref",
+            "run.calculation.energy",
+            "run.calculation.band_gap",
+        ],
+        "exclude": [],
+    },
+    # Everything `fair summarize` and `fair analyze` report on
+    "summary": {
+        "include": [
+            "metadata",
+            "results",
+            "run.program",
+            "run.method",
+            "run.system",
+            "run.calculation.system_ref",
+            "run.calculation.method_ref",
+            "run.calculation.energy",
+            "run.calculation.band_gap",
+            "run.calculation.forces",
+            "run.calculation.stress",
+            "run.calculation.scf_iteration",
+            "run.calculation.dos_electronic",
+        ],
+        "exclude": [
+            "run.method.k_mesh.points",
+            "run.method.k_mesh.weights",
+        ],
+    },
+    # The complete archive (default)
+    "full": {
+        "include": None,
+        "exclude": [],
+    },
+}
+DEFAULT_PROFILE = "full"
+
+
+def resolve_profile(profile: Union[str, Path, dict, None] = None,
+                    include: Optional[List[str]] = None,
+                    exclude: Optional[List[str]] = None) -> Dict[str, Optional[List[str]]]:
+    """
+    Turns a profile name, YAML file or dict plus extra paths into a profile dict.
+
+    A YAML profile holds 'include' and/or 'exclude' lists and may name a
+    built-in profile to start from with 'extends'.
+
+    Args:
+        profile: Name from PRUNE_PROFILES, path to a YAML file, an already
+            resolved profile dict, or None for DEFAULT_PROFILE.
+        include: Extra subtrees to keep (only meaningful if the profile has an include list).
+        exclude: Extra subtrees to drop.
+
+    Returns:
+        dict: {'include': list or None, 'exclude': list} with BASE_EXCLUDE added.
+
+    Raises:
+        ValueError: If the profile is unknown or the file is malformed.
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+
+    if isinstance(profile, dict):
+        spec = profile
+    elif str(profile) in PRUNE_PROFILES:
+        spec = PRUNE_PROFILES[str(profile)]
+    elif Path(profile).suffix in (".yaml", ".yml") and Path(profile).is_file():
+        with open(profile, "r", encoding="utf-8") as f:
+            spec = yaml.safe_load(f) or {}
+        if not isinstance(spec, dict):
+            raise ValueError(f"Pruning profile file {profile} must contain a mapping.")
+        base = spec.get("extends")
+        if base is not None:
+            if base not in PRUNE_PROFILES:
+                raise ValueError(f"Pruning profile file {profile} extends unknown profile '{base}'.")
+            parent = PRUNE_PROFILES[base]
+            spec = {
+                "include": None if parent["include"] is None and spec.get("include") is None
+                else (parent["include"] or []) + (spec.get("include") or []),
+                "exclude": (parent["exclude"] or []) + (spec.get("exclude") or []),
+            }
+    else:
+        raise ValueError(
+            f"Unknown pruning profile '{profile}'. Choose from: {', '.join(PRUNE_PROFILES)} or give a YAML file."
+        )
+
+    resolved_include = spec.get("include")
+    if resolved_include is not None:
+        resolved_include = list(resolved_include) + list(include or [])
+    elif include:
+        log.warning("Ignoring --include paths: the profile keeps the whole archive already.")
+
+    resolved_exclude = []
+    for path in BASE_EXCLUDE + list(spec.get("exclude") or []) + list(exclude or []):
+        if path not in resolved_exclude:
+            resolved_exclude.append(path)
+    return {"include": resolved_include, "exclude": resolved_exclude}
+
+
+def path_tree(paths: List[str]) -> dict:
+    """Builds a nested dict of dotted path components; True marks a complete subtree."""
+    tree: dict = {}
+    for path in paths:
+        node = tree
+        parts = [part for part in str(path).split(".") if part]
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = True
+            else:
+                child = node.get(part)
+                if child is True:
+                    break  # A parent is already selected as a whole
+                node = node.setdefault(part, {})
+    return tree
+
+
+def _match(tree: dict, key: str):
+    return tree.get(key, tree.get("*"))
+
+
+def _keep(value: Any, tree: Union[dict, bool]) -> Any:
+    if tree is True:
+        return value
+    if isinstance(value, list):
+        return [_keep(item, tree) for item in value]
+    if isinstance(value, dict):
+        kept = {}
+        for key, item in value.items():
+            sub = _match(tree, key)
+            if sub is not None:
+                kept[key] = _keep(item, sub)
+        return kept
+    return value
+
+
+def _drop(value: Any, tree: dict) -> Any:
+    if isinstance(value, list):
+        return [_drop(item, tree) for item in value]
+    if isinstance(value, dict):
+        kept = {}
+        for key, item in value.items():
+            sub = _match(tree, key)
+            if sub is True:
+                continue
+            kept[key] = _drop(item, sub) if sub else item
+        return kept
+    return value
+
+
+def prune_archive(data: Dict[str, Any], profile: Union[str, Path, dict, None] = None) -> Dict[str, Any]:
+    """
+    Returns a pruned copy of the archive; the input is left untouched.
+
+    Only the containers on the selected paths are copied, leaves are shared.
+
+    Args:
+        data: Merged NOMAD archive and metadata.
+        profile: Anything accepted by resolve_profile.
+    """
+    spec = resolve_profile(profile)
+    if spec["include"] is not None:
+        data = _keep(data, path_tree(spec["include"]))
+    return _drop(data, path_tree(spec["exclude"]))
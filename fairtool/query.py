@@ -0,0 +1,180 @@
+# fairtool/query.py
+
+"""Row filters (`fair export --where`) for results tables and records."""
+
+import ast
+from typing import Any, List, Tuple
+
+import pandas as pd
+
+_COMPARISONS = {
+    ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=",
+}
+# The comparison seen from the other side, for `1 < band_gap`.
+_FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+def _constant(node: ast.AST, text: str) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float, str)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)) and not isinstance(node.operand.value, bool):
+        return -node.operand.value
+    raise ValueError(f"Expected a number, string or True/False in '{text}', got '{ast.unparse(node)}'")
+
+
+def _compile(node: ast.AST, text: str) -> Tuple:
+    """
+    Turns the AST of a filter into nested tuples:
+    ('and'|'or', [terms]), ('not', term), ('cmp', op, column, value),
+    ('in', column, values), ('contains', column, text) and ('true', column).
+    """
+    if isinstance(node, ast.BoolOp):
+        return ("and" if isinstance(node.op, ast.And) else "or", [_compile(value, text) for value in node.values])
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ("not", _compile(node.operand, text))
+    if isinstance(node, ast.Name):
+        return ("true", node.id)
+    if isinstance(node, ast.Compare):
+        if len(node.ops) > 1:
+            # Chained comparisons (1 < band_gap < 3) are a conjunction of pairs
+            operands = [node.left, *node.comparators]
+            return ("and", [_compile(ast.Compare(left=left, ops=[op], comparators=[right]), text)
+                            for left, op, right in zip(operands, node.ops, operands[1:])])
+        op, left, right = node.ops[0], node.left, node.comparators[0]
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if isinstance(left, ast.Name) and isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                term = ("in", left.id, [_constant(element, text) for element in right.elts])
+            elif isinstance(right, ast.Name) and isinstance(_constant(left, text), str):
+                term = ("contains", right.id, left.value)
+            else:
+                raise ValueError(f"Use 'column in [values]' or \"'text' in column\" in '{text}'")
+            return ("not", term) if isinstance(op, ast.NotIn) else term
+        if type(op) in _COMPARISONS:
+            if isinstance(left, ast.Name):
+                return ("cmp", _COMPARISONS[type(op)], left.id, _constant(right, text))
+            if isinstance(right, ast.Name):
+                return ("cmp", _FLIPPED[_COMPARISONS[type(op)]], right.id, _constant(left, text))
+            raise ValueError(f"A comparison needs a column name on one side in '{text}'")
+    raise ValueError(f"Unsupported expression '{ast.unparse(node)}' in '{text}'. "
+                     f"Use column names, constants, comparisons, 'in', 'and', 'or', 'not' and parentheses.")
+
+
+class RecordFilter:
+    """
+    A parsed `--where` expression, e.g.
+
+        scf_converged and band_gap > 1 and 'Si' in formula
+
+    The grammar is a small, safe subset of Python (nothing is evaluated):
+    column names, number/string/True/False constants, comparisons
+    (==, !=, <, <=, >, >=, chained too), `column in [values]`,
+    `'text' in column` (substring), `and`, `or`, `not` and parentheses.
+    A bare column name must be a boolean column and is true where it is True.
+
+    Missing values (null or NaN) never match a comparison, so `not band_gap > 1`
+    keeps the rows without a gap as well. The same filter can be applied to
+    DataFrames (mask) or pushed down to Arrow/Parquet scans (expression).
+    """
+
+    def __init__(self, text: str):
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid filter '{text}': {e.msg}") from e
+        self.text = text
+        self._term = _compile(tree.body, text)
+        self.columns: List[str] = []
+        self._collect_columns(self._term)
+
+    def __repr__(self):
+        return f"RecordFilter({self.text!r})"
+
+    def _collect_columns(self, term: Tuple):
+        if term[0] in ("and", "or"):
+            for sub in term[1]:
+                self._collect_columns(sub)
+        elif term[0] == "not":
+            self._collect_columns(term[1])
+        else:
+            column = term[2] if term[0] == "cmp" else term[1]
+            if column not in self.columns:
+                self.columns.append(column)
+
+    # --- pandas ---
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        """Boolean Series: True for the rows of frame matching the filter."""
+        missing = [column for column in self.columns if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Unknown column(s) in filter '{self.text}': {', '.join(missing)}")
+        return self._mask(self._term, frame).astype(bool)
+
+    def _mask(self, term: Tuple, frame: pd.DataFrame) -> pd.Series:
+        kind = term[0]
+        if kind == "and":
+            result = self._mask(term[1][0], frame)
+            for sub in term[1][1:]:
+                result = result & self._mask(sub, frame)
+            return result
+        if kind == "or":
+            result = self._mask(term[1][0], frame)
+            for sub in term[1][1:]:
+                result = result | self._mask(sub, frame)
+            return result
+        if kind == "not":
+            return ~self._mask(term[1], frame)
+        series = frame[term[2] if kind == "cmp" else term[1]]
+        if kind == "cmp":
+            op, value = term[1], term[3]
+            result = {"==": series.__eq__, "!=": series.__ne__, "<": series.__lt__,
+                      "<=": series.__le__, ">": series.__gt__, ">=": series.__ge__}[op](value)
+            # Missing values match nothing, not even '!='
+            return (result & series.notna()).fillna(False).astype(bool)
+        if kind == "in":
+            return series.isin(term[2]).fillna(False).astype(bool)
+        if kind == "contains":
+            return series.astype("string").str.contains(term[2], regex=False).fillna(False).astype(bool)
+        return (series == True).fillna(False).astype(bool)  # noqa: E712 (nullable columns)
+
+    # --- Arrow ---
+
+    def expression(self):
+        """The filter as a pyarrow.compute.Expression (for pyarrow.dataset scans)."""
+        import pyarrow.compute as pc
+        return self._expression(self._term, pc)
+
+    def _expression(self, term: Tuple, pc):
+        kind = term[0]
+        if kind == "and":
+            result = self._expression(term[1][0], pc)
+            for sub in term[1][1:]:
+                result = result & self._expression(sub, pc)
+            return result
+        if kind == "or":
+            result = self._expression(term[1][0], pc)
+            for sub in term[1][1:]:
+                result = result | self._expression(sub, pc)
+            return result
+        if kind == "not":
+            return ~self._expression(term[1], pc)
+        field = pc.field(term[2] if kind == "cmp" else term[1])
+        if kind == "cmp":
+            op, value = term[1], term[3]
+            result = {"==": field.__eq__, "!=": field.__ne__, "<": field.__lt__,
+                      "<=": field.__le__, ">": field.__gt__, ">=": field.__ge__}[op](value)
+            if op == "!=":
+                result = result & (field == field)  # False for NaN
+        elif kind == "in":
+            result = field.isin(term[2])
+        elif kind == "contains":
+            result = pc.match_substring(field, term[2])
+        else:
+            result = field == True  # noqa: E712
+        # Nulls do not match, as in mask()
+        return pc.coalesce(result, pc.scalar(False))
+
+
+def parse_where(text: str) -> RecordFilter:
+    """Parses a `--where` expression (see RecordFilter)."""
+    return RecordFilter(text)
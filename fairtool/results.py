@@ -0,0 +1,228 @@
+# fairtool/results.py
+
+"""Columnar table of analysis results (Parquet, or CSV without pyarrow)."""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+log = logging.getLogger("fairtool")
+
+RESULTS_BASENAME = "fair_analysis"
+RESULTS_FORMATS = ("parquet", "csv")
+# Rows are buffered and written in batches of this many calculations.
+DEFAULT_BATCH_SIZE = 1000
+
+# Column types of a results table and their pandas dtypes (nullable where needed).
+COLUMN_TYPES = {"string": "string", "int64": "Int64", "float64": "float64", "bool": "boolean"}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def typed_frame(rows: List[Dict[str, Any]], columns: Dict[str, str]) -> pd.DataFrame:
+    """DataFrame of rows with exactly the given columns, cast to their COLUMN_TYPES."""
+    frame = pd.DataFrame(rows, columns=list(columns))
+    return frame.astype({name: COLUMN_TYPES[ctype] for name, ctype in columns.items()})
+
+
+def _to_pandas(table) -> pd.DataFrame:
+    """Arrow table/batch -> DataFrame with the same nullable dtypes as typed_frame."""
+    pyarrow = _import_pyarrow()
+    types = {pyarrow.int64(): pd.Int64Dtype(), pyarrow.bool_(): pd.BooleanDtype(), pyarrow.string(): pd.StringDtype()}
+    return table.to_pandas(types_mapper=types.get)
+
+
+def default_results_format() -> str:
+    """'parquet' if pyarrow is installed, 'csv' otherwise."""
+    return "parquet" if _import_pyarrow() is not None else "csv"
+
+
+def results_path(output_dir: Path, results_format: Optional[str] = None) -> Path:
+    """Location of the results table in output_dir, e.g. fair_analysis.parquet."""
+    results_format = results_format or default_results_format()
+    if results_format not in RESULTS_FORMATS:
+        raise ValueError(f"Unknown results format '{results_format}'. Choose from: {', '.join(RESULTS_FORMATS)}")
+    return output_dir / f"{RESULTS_BASENAME}.{results_format}"
+
+
+def find_results(output_dir: Path) -> Optional[Path]:
+    """The most recently written results table in output_dir, or None."""
+    tables = [output_dir / f"{RESULTS_BASENAME}.{fmt}" for fmt in RESULTS_FORMATS]
+    tables = [table for table in tables if table.is_file()]
+    return max(tables, key=lambda table: table.stat().st_mtime) if tables else None
+
+
+class ResultsStore:
+    """
+    Append-only writer of a results table with a fixed set of typed columns.
+
+    Rows are buffered and flushed every batch_size rows: as one Parquet row
+    group (pyarrow) or as a block of CSV lines. The table is written to a
+    temporary file that replaces path on close(), so readers never see a
+    half-written table.
+    """
+
+    def __init__(self, path: Path, columns: Dict[str, str], batch_size: int = DEFAULT_BATCH_SIZE):
+        unknown = {ctype for ctype in columns.values() if ctype not in COLUMN_TYPES}
+        if unknown:
+            raise ValueError(f"Unknown column type(s): {', '.join(sorted(unknown))}")
+        self.path = Path(path)
+        self.columns = dict(columns)
+        self.batch_size = max(1, batch_size)
+        self.n_rows = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._writer = None
+        self._file = None
+        self._parquet = self.path.suffix == ".parquet"
+        if self._parquet:
+            pyarrow = _import_pyarrow()
+            if pyarrow is None:
+                raise ImportError("Parquet results need the 'pyarrow' package (pip install pyarrow).")
+            self._schema = pyarrow.schema([(name, pyarrow.type_for_alias(ctype)) for name, ctype in self.columns.items()])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, row: Dict[str, Any]):
+        """Adds one row; keys not in the columns are ignored, missing ones are null."""
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one batch."""
+        if not self._rows:
+            return
+        if self._parquet:
+            pyarrow = _import_pyarrow()
+            if self._writer is None:
+                self._writer = pyarrow.parquet.ParquetWriter(str(self._tmp_path), self._schema)
+            table = pyarrow.Table.from_pydict(
+                {name: [row.get(name) for row in self._rows] for name in self.columns}, schema=self._schema)
+            self._writer.write_table(table)
+        else:
+            header = self._file is None
+            if header:
+                self._file = open(self._tmp_path, "w", encoding="utf-8", newline="")
+            typed_frame(self._rows, self.columns).to_csv(self._file, header=header, index=False)
+        self.n_rows += len(self._rows)
+        log.debug(f"Wrote {len(self._rows)} row(s) to {self.path.name} ({self.n_rows} in total)")
+        self._rows = []
+
+    def close(self):
+        """Flushes the remaining rows and moves the table into place."""
+        self.flush()
+        if self._writer is None and self._file is None:
+            # No rows at all: still leave a valid, empty table behind.
+            if self._parquet:
+                pyarrow = _import_pyarrow()
+                self._writer = pyarrow.parquet.ParquetWriter(str(self._tmp_path), self._schema)
+            else:
+                self._file = open(self._tmp_path, "w", encoding="utf-8", newline="")
+                self._file.write(",".join(self.columns) + "\n")
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        self._writer = self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discards the table being written."""
+        for handle in (self._writer, self._file):
+            if handle is not None:
+                handle.close()
+        self._writer = self._file = None
+        self._rows = []
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def read_results(path: Path, columns: Optional[List[str]] = None,
+                 column_types: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Loads a results table into a DataFrame.
+
+    Args:
+        path: A fair_analysis.parquet or fair_analysis.csv file.
+        columns: Only read these columns (Parquet reads nothing else from disk).
+        column_types: Types of the CSV columns (see COLUMN_TYPES); Parquet
+            files carry their own schema.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pyarrow = _import_pyarrow()
+        if pyarrow is None:
+            raise ImportError("Reading Parquet results needs the 'pyarrow' package (pip install pyarrow).")
+        return _to_pandas(pyarrow.parquet.read_table(str(path), columns=columns))
+    dtypes = {name: COLUMN_TYPES[ctype] for name, ctype in (column_types or {}).items()
+              if columns is None or name in columns}
+    return pd.read_csv(path, usecols=columns, dtype=dtypes)
+
+
+def results_columns(path: Path) -> List[str]:
+    """Column names of a results table, read from its schema or CSV header only."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pyarrow = _import_pyarrow()
+        if pyarrow is None:
+            raise ImportError("Reading Parquet results needs the 'pyarrow' package (pip install pyarrow).")
+        return list(pyarrow.parquet.ParquetFile(str(path)).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def iter_results(path: Path, chunk_size: int = DEFAULT_BATCH_SIZE, columns: Optional[List[str]] = None,
+                 column_types: Optional[Dict[str, str]] = None, where=None) -> Iterator[pd.DataFrame]:
+    """
+    Reads a results table as DataFrames of at most chunk_size rows, so tables
+    larger than memory can be streamed. Arguments as in read_results.
+
+    where is an optional query.RecordFilter; only matching rows are returned.
+    For Parquet it is pushed down into the scan, which reads just the
+    projected and filtered columns and skips row groups whose statistics
+    rule out a match. CSV chunks are filtered as they are read. Filtered
+    chunks may be empty.
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pyarrow = _import_pyarrow()
+        if pyarrow is None:
+            raise ImportError("Reading Parquet results needs the 'pyarrow' package (pip install pyarrow).")
+        if where is None:
+            batches = pyarrow.parquet.ParquetFile(str(path)).iter_batches(batch_size=chunk_size, columns=columns)
+        else:
+            import pyarrow.dataset
+            batches = pyarrow.dataset.dataset(str(path), format="parquet").to_batches(
+                columns=columns, filter=where.expression(), batch_size=chunk_size)
+        for batch in batches:
+            yield _to_pandas(batch)
+        return
+    read_columns = columns
+    if where is not None and columns is not None:
+        read_columns = list(dict.fromkeys([*columns, *where.columns]))
+    dtypes = {name: COLUMN_TYPES[ctype] for name, ctype in (column_types or {}).items()
+              if read_columns is None or name in read_columns}
+    with pd.read_csv(path, usecols=read_columns, dtype=dtypes, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            if where is None:
+                yield chunk
+                continue
+            chunk = chunk[where.mask(chunk)]
+            yield (chunk[columns] if columns is not None else chunk).reset_index(drop=True)
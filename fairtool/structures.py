@@ -0,0 +1,256 @@
+# fairtool/structures.py
+
+"""Bulk export of final structures and key properties (OPTIMADE JSONL, extxyz, ASE db)."""
+
+import json
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .analyze import analyze_file
+from .archive import is_parsed_archive, load_archive
+from .index import find_parsed_archives
+from .units import M_TO_ANGSTROM
+
+log = logging.getLogger("fairtool")
+
+# Subtree of an archive holding the final structure of the calculation.
+STRUCTURE_PATHS = ["run.0.system.-1.atoms"]
+
+STRUCTURE_FORMATS = {
+    "optimade": "structures.jsonl",
+    "extxyz": "structures.extxyz",
+    "ase-db": "structures.db",
+}
+
+# Analysis columns that describe the calculation itself, not a property.
+_BOOKKEEPING = {"archive", "analyzed"}
+
+
+def structure_from_archive(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The last structure of the first run of an archive.
+
+    Returns:
+        Dict with 'species' (element symbols), 'positions' (Cartesian, Å,
+        (n, 3) array), 'cell' ((3, 3) array in Å, None for molecules) and
+        'pbc' (3 bools), or None if the archive has no atoms.
+    """
+    runs = data.get("run") or [{}]
+    systems = runs[0].get("system") if isinstance(runs[0], dict) else None
+    atoms = (systems[-1] if systems else {}).get("atoms") or {}
+    species, positions = atoms.get("labels"), atoms.get("positions")
+    if not species or positions is None:
+        return None
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3) * M_TO_ANGSTROM
+    if len(positions) != len(species):
+        raise ValueError(f"{len(species)} atom labels but {len(positions)} positions")
+    cell = atoms.get("lattice_vectors")
+    cell = np.asarray(cell, dtype=float).reshape(3, 3) * M_TO_ANGSTROM if cell is not None else None
+    pbc = [bool(p) for p in atoms.get("periodic") or [cell is not None] * 3]
+    return {"species": list(species), "positions": positions, "cell": cell, "pbc": pbc}
+
+
+def iter_structures(archives: List[Path]) -> Iterator[Tuple[Path, Dict[str, Any], Dict[str, Any]]]:
+    """
+    Yields (archive, structure, properties) for every archive with a structure.
+
+    Only the atoms subtree is loaded; properties are the row of the default
+    analysis tasks (memoized, see analyze.analyze_file). Archives that cannot
+    be read are logged and skipped.
+    """
+    for archive in archives:
+        try:
+            structure = structure_from_archive(load_archive(archive, paths=STRUCTURE_PATHS))
+            if structure is None:
+                log.warning(f"No structure in {archive.name}; skipped.")
+                continue
+            properties = analyze_file(archive)
+        except Exception as e:
+            log.error(f"Skipping {archive.name}: {e}")
+            continue
+        yield archive, structure, properties
+
+
+def _plain(value: Any) -> Any:
+    """JSON/extxyz friendly scalar: None for missing values, Python types otherwise."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _reduced_formula(species: List[str]) -> Tuple[List[str], List[int], str]:
+    elements = sorted(set(species))
+    counts = [species.count(element) for element in elements]
+    divisor = math.gcd(*counts)
+    reduced = [count // divisor for count in counts]
+    formula = "".join(f"{e}{n if n > 1 else ''}" for e, n in zip(elements, reduced))
+    return elements, counts, formula
+
+
+# --- Writers ---
+
+class OptimadeWriter:
+    """
+    OPTIMADE JSON Lines: a header line, then one 'structures' entry per line.
+    fairtool properties go into attributes with the provider prefix _fair_.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"x-optimade": {"meta": {"api_version": "1.1.0"}}}) + "\n")
+
+    def write(self, entry_id: str, structure: Dict[str, Any], properties: Dict[str, Any]):
+        species = structure["species"]
+        elements, counts, formula = _reduced_formula(species)
+        pbc = structure["pbc"]
+        attributes = {
+            "elements": elements,
+            "nelements": len(elements),
+            "elements_ratios": [count / len(species) for count in counts],
+            "chemical_formula_reduced": formula,
+            "nsites": len(species),
+            "species_at_sites": species,
+            "species": [{"name": e, "chemical_symbols": [e], "concentration": [1.0]} for e in elements],
+            "cartesian_site_positions": structure["positions"].tolist(),
+            "lattice_vectors": structure["cell"].tolist() if structure["cell"] is not None else None,
+            "dimension_types": [int(p) for p in pbc],
+            "nperiodic_dimensions": sum(pbc),
+            "structure_features": [],
+            "last_modified": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        attributes.update({f"_fair_{key}": _plain(value) for key, value in properties.items()
+                           if key not in _BOOKKEEPING})
+        self._file.write(json.dumps({"type": "structures", "id": entry_id, "attributes": attributes}) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ExtxyzWriter:
+    """Extended XYZ, one frame per structure; properties are frame info keys."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    @staticmethod
+    def _info_value(value: Any) -> Optional[str]:
+        value = _plain(value)
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "T" if value else "F"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return '"' + str(value).replace('"', "'") + '"'
+
+    def write(self, entry_id: str, structure: Dict[str, Any], properties: Dict[str, Any]):
+        info = [f'id="{entry_id}"']
+        if structure["cell"] is not None:
+            info.append('Lattice="' + " ".join(f"{x:.10f}" for x in structure["cell"].ravel()) + '"')
+        info.append("Properties=species:S:1:pos:R:3")
+        info.append('pbc="' + " ".join("T" if p else "F" for p in structure["pbc"]) + '"')
+        for key, value in properties.items():
+            text = self._info_value(value)
+            if text is not None and key not in _BOOKKEEPING:
+                info.append(f"{key}={text}")
+        lines = [str(len(structure["species"])), " ".join(info)]
+        lines += [f"{s:<3} {x:16.10f} {y:16.10f} {z:16.10f}"
+                  for s, (x, y, z) in zip(structure["species"], structure["positions"])]
+        self._file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class AseDbWriter:
+    """
+    ASE SQLite database; energies become the stored calculator results and
+    the other properties searchable key-value pairs (keys reserved by ASE
+    get a fair_ prefix). All rows are inserted in one transaction.
+    """
+
+    def __init__(self, path: Path):
+        try:
+            import ase
+            import ase.db
+            from ase.calculators.singlepoint import SinglePointCalculator
+        except ImportError as e:
+            raise ImportError("ASE database export needs the 'ase' package (pip install ase).") from e
+        from ase.db.core import reserved_keys
+        self._ase = ase
+        self._calculator = SinglePointCalculator
+        self._reserved = reserved_keys
+        self.path = path
+        path.unlink(missing_ok=True)
+        self._db = ase.db.connect(str(path), type="db", append=False)
+        self._transaction = self._db.__enter__()
+
+    def write(self, entry_id: str, structure: Dict[str, Any], properties: Dict[str, Any]):
+        atoms = self._ase.Atoms(symbols=structure["species"], positions=structure["positions"],
+                                cell=structure["cell"], pbc=structure["pbc"])
+        energy = _plain(properties.get("energy_total"))
+        if energy is not None:
+            atoms.calc = self._calculator(atoms, energy=energy, free_energy=_plain(properties.get("energy_free")))
+        pairs = {"fair_id": entry_id}
+        for key, value in properties.items():
+            value = _plain(value)
+            if value is None or key in _BOOKKEEPING:
+                continue
+            pairs[f"fair_{key}" if key in self._reserved else key] = value
+        self._transaction.write(atoms, key_value_pairs=pairs, data={"archive": properties.get("archive")})
+
+    def close(self):
+        self._db.__exit__(None, None, None)
+
+
+_WRITERS = {"optimade": OptimadeWriter, "extxyz": ExtxyzWriter, "ase-db": AseDbWriter}
+
+
+def run_structure_export(input_path: Path, output_dir: Path, export_format: str) -> Optional[Path]:
+    """
+    Writes the final structures and key properties of all parsed archives
+    below input_path into a single file (see STRUCTURE_FORMATS), so they can
+    be read sequentially instead of one small JSON file per calculation.
+
+    Entry ids are the archive paths relative to input_path.
+
+    Returns:
+        The path of the written file, or None if there were no archives.
+    """
+    if export_format not in STRUCTURE_FORMATS:
+        raise ValueError(f"Unknown structure format '{export_format}'. Choose from: {', '.join(STRUCTURE_FORMATS)}")
+    if input_path.is_file() and is_parsed_archive(input_path):
+        archives, root = [input_path], input_path.parent
+    else:
+        archives, root = find_parsed_archives(input_path), input_path
+    if not archives:
+        log.error(f"No parsed archives found in {input_path}")
+        return None
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / STRUCTURE_FORMATS[export_format]
+    start = time.perf_counter()
+    writer = _WRITERS[export_format](path)
+    n_written = 0
+    try:
+        for archive, structure, properties in iter_structures(archives):
+            try:
+                entry_id = archive.relative_to(root).as_posix()
+            except ValueError:
+                entry_id = archive.as_posix()
+            writer.write(entry_id, structure, properties)
+            n_written += 1
+    finally:
+        writer.close()
+    log.info(f"Exported {n_written} structure(s) to {path} in {time.perf_counter() - start:.2f} s.")
+    return path
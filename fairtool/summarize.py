@@ -12,49 +12,82 @@ This refactored version separates concerns into:
 The main 'run_summarization' function orchestrates this flow.
 """
 
+import html
 import json
 import logging
 from pathlib import Path
 from typing import Optional, List, Tuple, Dict, Any, Union
 import re
-import pint
 import numpy as np
+from functools import lru_cache
+
+from .archive import ArchiveReader, load_archive
+from .cache import cache_key, file_sha256, input_fingerprint, is_cache_hit, load_cache_record, write_cache_record
+from .charts import downsample_minmax, extract_dos_arrays
+from .templating import render_template
+from .trajectory import extract_trajectory, save_trajectory, trajectory_path
+from .units import J_PER_EV
 
 # --- Setup ---
-u = pint.UnitRegistry()
+# Archive subtrees read by extract_context; nothing else has to be loaded.
+SUMMARY_PATHS = [
+    "metadata",
+    "results.method",
+    "results.material",
+    "run.0.method.0.k_mesh",
+    "run.0.calculation.0.energy",
+    "run.0.calculation.0.band_gap",
+    "run.0.calculation.0.scf_iteration",
+    "run.0.calculation.0.dos_electronic",
+]
 log = logging.getLogger("fairtool")
-ELEMENTARY_CHARGE_VALUE = 1.602176634e-19  # Elementary charge in Coulombs
-J_PER_EV = ELEMENTARY_CHARGE_VALUE # Alias for clarity
+
+# Upper bound on the rows of the inline DOS chart; finer grids are downsampled.
+DOS_MAX_POINTS = 1000
+# Same for the trajectory charts of relaxations / MD runs.
+TRAJECTORY_MAX_POINTS = 2000
 
 # --- Original Helper Functions (Unchanged) ---
 # These functions are well-structured and perform specific tasks.
 
-def _extract_energy_lists(scf_iterations: List[dict], energy_key: str) -> Tuple[List[float], List[float]]:
+# Energies of scf_iteration[].energy shown in the SCF table and chart.
+SCF_ENERGY_KEYS = ("total", "free", "total_t0")
+
+def extract_scf_energies(scf_iterations: List[dict], keys: Tuple[str, ...] = SCF_ENERGY_KEYS) -> np.ndarray:
     """
-    Helper to safely extract energy lists from scf_iterations.
-    
+    Extracts SCF energies of any number of keys in a single pass.
+
     Args:
         scf_iterations: The list of scf_iteration blocks.
-        energy_key: The key of the energy to extract (e.g., "total", "xc").
+        keys: Energy keys to extract (e.g., "total", "xc").
 
     Returns:
-        A tuple of (energies_in_eV, energies_in_J).
+        A structured array with one row per iteration: 'step' (from 1) and
+        one float field per key, in eV. Missing values are NaN.
     """
-    energies_J = []
-    energies_eV = []
+    rows = []
     for iteration in scf_iterations:
-        value = iteration.get('energy', {}).get(energy_key, {}).get('value')
-        
-        if value is not None:
-            energies_J.append(value)
-            try:
-                energies_eV.append(value / J_PER_EV)
-            except (ZeroDivisionError, TypeError):
-                energies_eV.append(float('nan'))
-        else:
-            energies_J.append(float('nan'))
-            energies_eV.append(float('nan'))
-    return energies_eV, energies_J
+        energy = iteration.get('energy') if isinstance(iteration, dict) else None
+        energy = energy if isinstance(energy, dict) else {}
+        rows.append([(energy.get(key) or {}).get('value') for key in keys])
+
+    table = np.empty(len(rows), dtype=[('step', 'i8')] + [(key, 'f8') for key in keys])
+    table['step'] = np.arange(1, len(rows) + 1)
+    if rows:
+        try:
+            values = np.array(rows, dtype=float)  # None -> NaN
+        except (TypeError, ValueError):
+            values = np.array([[_float_or_nan(v) for v in row] for row in rows], dtype=float)
+        values /= J_PER_EV
+        for j, key in enumerate(keys):
+            table[key] = values[:, j]
+    return table
+
+def _float_or_nan(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
 
 def _scalar(x):
     """Unwrap 1-item list/tuple -> value; otherwise return as-is."""
@@ -62,28 +95,36 @@ def _scalar(x):
         return x[0]
     return x
 
-def _as_qty(v, unit):
-    """Attach a unit if v is numeric; return None for missing/sentinel."""
-    v = _scalar(v)
-    if v is None or v == "unavailable":
-        return None
-    try:
-        return float(v) * unit
-    except (TypeError, ValueError):
-        return None
-
+# SI unit of the archive value, factor from SI to the display unit, symbol, format.
+# Factors are written the way pint derives them, so results are bit-identical.
 FIELD_UNITS = {
-    "a": (u.m, u.angstrom, "Å", ".3f"),
-    "b": (u.m, u.angstrom, "Å", ".3f"),
-    "c": (u.m, u.angstrom, "Å", ".3f"),
-    "alpha": (u.radian, u.degree, "°", ".0f"),
-    "beta":  (u.radian, u.degree, "°", ".0f"),
-    "gamma": (u.radian, u.degree, "°", ".0f"),
-    "volume":          (u.m**3, u.angstrom**3, "Å^3", ".3f"),
-    "atomic_density":  (1/u.m**3, 1/u.angstrom**3, "Å^-3", ".3f"),
-    "mass_density":    (u.kg/u.m**3, u.kg/u.angstrom**3, "kg/Å^3", ".3e"),
+    "a": ("m", 1e10, "Å", ".3f"),
+    "b": ("m", 1e10, "Å", ".3f"),
+    "c": ("m", 1e10, "Å", ".3f"),
+    "alpha": ("rad", 180 / np.pi, "°", ".0f"),
+    "beta":  ("rad", 180 / np.pi, "°", ".0f"),
+    "gamma": ("rad", 180 / np.pi, "°", ".0f"),
+    "volume":          ("m**3", 1 / 1e-30, "Å^3", ".3f"),
+    "atomic_density":  ("1/m**3", 1e-30, "Å^-3", ".3f"),
+    "mass_density":    ("kg/m**3", 1e-30, "kg/Å^3", ".3e"),
 }
 
+def convert_fields(values, field: str) -> np.ndarray:
+    """
+    Converts SI values of a known field to its display unit in one go.
+
+    Args:
+        values: Scalar, list or array of SI values (None becomes NaN).
+        field: A key of FIELD_UNITS.
+
+    Returns:
+        A float array of the values in the display unit.
+    """
+    spec = FIELD_UNITS.get(field)
+    if not spec:
+        raise KeyError(f"Unknown field '{field}'. Known: {sorted(FIELD_UNITS)}")
+    return np.asarray(values, dtype=float) * spec[1]
+
 def _convert_field(value, field, default=None, return_numeric=False):
     """
     Convert a raw value for a known field to its display unit and format.
@@ -91,11 +132,14 @@ def _convert_field(value, field, default=None, return_numeric=False):
     spec = FIELD_UNITS.get(field)
     if not spec:
         raise KeyError(f"Unknown field '{field}'. Known: {sorted(FIELD_UNITS)}")
-    from_u, to_u, symbol, fmt = spec
-    q = _as_qty(value, from_u)
-    if q is None:
+    _, factor, symbol, fmt = spec
+    value = _scalar(value)
+    if value is None or value == "unavailable":
+        return default
+    try:
+        num = float(value) * factor
+    except (TypeError, ValueError):
         return default
-    num = q.to(to_u).magnitude
     return num if return_numeric else f"{format(num, fmt)} {symbol}"
 
 def _strip_parens(s: object, default: str = "unavailable") -> str:
@@ -124,26 +168,38 @@ def _format_field_numeric(value, field, default = None):
 
 # --- New Modular Functions ---
 
-def load_data(input_path: Path) -> Optional[Dict[str, Any]]:
-    """Loads and parses the JSON data file."""
+def load_data(input_path: Path, paths: Optional[List[str]] = None,
+              reader: Optional[ArchiveReader] = None) -> Optional[Dict[str, Any]]:
+    """
+    Loads the parsed archive (JSON or msgpack).
+
+    If paths is given, only those subtrees are materialized (see
+    archive.ArchiveReader); with msgpack archives the rest is never decoded.
+    An already open reader of input_path can be passed to share it with
+    later passes over the same archive.
+    """
     try:
         log.info(f"Loading parsed data from: {input_path}")
-        with open(input_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        log.info("Successfully loaded JSON data.")
+        if reader is not None:
+            data = reader.select(paths) if paths else reader.load()
+        else:
+            data = load_archive(input_path, paths=paths)
+        log.info("Successfully loaded parsed data.")
         if not isinstance(data, dict) or not data:
              log.warning("No valid data loaded.")
              return None
         return data
     except Exception as e:
-        log.error(f"Failed to load or parse JSON: {e}")
+        log.error(f"Failed to load or parse archive: {e}")
         return None
 
-def extract_context(data: Dict[str, Any]) -> Dict[str, Any]:
+def extract_context(data: Dict[str, Any], dos_max_points: Optional[int] = DOS_MAX_POINTS) -> Dict[str, Any]:
     """
     Extracts all necessary data from the raw JSON dict into a flat context.
     
-    This context is used by the Markdown generator.
+    This context is used by the Markdown generator. The DOS is kept as a
+    NumPy array and reduced to at most dos_max_points chart rows (None or
+    0 keeps every point).
     """
     context = {}
     
@@ -221,66 +277,26 @@ def extract_context(data: Dict[str, Any]) -> Dict[str, Any]:
 
     # --- **NEW:** Extract SCF Iteration Energies ---
     log.info("Extracting SCF energy data.")
-    total_ev, _ = _extract_energy_lists(scf_iterations, "total")
-    free_ev, _ = _extract_energy_lists(scf_iterations, "free")
-    total_t0_ev, _ = _extract_energy_lists(scf_iterations, "total_t0")
-
-    scf_table_data = []
-    # Use the longest list to determine the number of steps
-    n_steps = max(len(total_ev), len(free_ev), len(total_t0_ev))
-    for i in range(n_steps):
-        scf_table_data.append({
-            'step': i + 1,
-            'total_ev': total_ev[i] if i < len(total_ev) else None,
-            'free_ev': free_ev[i] if i < len(free_ev) else None,
-            'total_t0_ev': total_t0_ev[i] if i < len(total_t0_ev) else None,
-        })
-    context['scf_table_data'] = scf_table_data
+    context['scf_energies'] = extract_scf_energies(scf_iterations)
 
 
     # --- **NEW:** Extract DOS Data ---
     log.info("Extracting DOS data for charting.")
-    dos_chart_data = []
+    dos_chart_data = np.empty((0, 2))
     is_spin_polarized = False
+    n_dos_points = 0
     try:
         dos_electronic = calc.get("dos_electronic", [])
         if dos_electronic:
-            dos_data = dos_electronic[0]
-            energies_j = np.array(dos_data.get("energies", []))
-            fermi_j = dos_data.get("energy_fermi")
-            dos_total = dos_data.get("total", []) # List of value objects
-            
-            if energies_j.any() and fermi_j is not None and dos_total:
-                # Convert energies to eV and shift relative to Fermi
-                energies_ev = (energies_j - fermi_j) / J_PER_EV
-                
-                is_spin_polarized = dos_data.get("spin_polarized", False)
-                
-                if is_spin_polarized and len(dos_total) >= 2:
-                    dos_up = np.array(dos_total[0].get("value", []))
-                    dos_down = np.array(dos_total[1].get("value", [])) * -1 # Negate for plotting
-                    
-                    if len(energies_ev) == len(dos_up) == len(dos_down):
-                        for e, up, down in zip(energies_ev, dos_up, dos_down):
-                            dos_chart_data.append({'energy_ev': e, 'dos_up': up, 'dos_down': down})
-                    else:
-                        log.warning("DOS energy and value array lengths mismatch (spin-polarized).")
-                
-                elif not is_spin_polarized and len(dos_total) >= 1:
-                    dos = np.array(dos_total[0].get("value", []))
-                    if len(energies_ev) == len(dos):
-                         for e, d in zip(energies_ev, dos):
-                            dos_chart_data.append({'energy_ev': e, 'dos': d})
-                    else:
-                        log.warning("DOS energy and value array lengths mismatch (non-spin-polarized).")
-            else:
-                log.info("No complete DOS data found (missing energies, fermi, or total).")
+            dos_chart_data, is_spin_polarized = extract_dos_arrays(dos_electronic[0])
+            n_dos_points = len(dos_chart_data)
+            dos_chart_data = downsample_minmax(dos_chart_data, dos_max_points)
     except Exception as e:
         log.error(f"Failed to process DOS data: {e}", exc_info=True)
 
     context['dos_chart_data'] = dos_chart_data
     context['dos_is_spin_polarized'] = is_spin_polarized
-    log.info(f"Finished extracting DOS data. Found {len(dos_chart_data)} points.")
+    log.info(f"Finished extracting DOS data. Found {n_dos_points} points, charting {len(dos_chart_data)}.")
 
     return context
 
@@ -513,23 +529,17 @@ def _generate_final_energies_table(context: Dict[str, Any]) -> str:
 
 def _generate_scf_energies_table(context: Dict[str, Any]) -> str:
     """Generates the Markdown table for SCF iteration energies."""
-    scf_table_data = context.get('scf_table_data', [])
-    if not scf_table_data:
+    scf_energies = context.get('scf_energies')
+    if scf_energies is None or len(scf_energies) == 0:
         return ""
-        
-    rows = []
-    for item in scf_table_data:
-        step = item['step']
-        
-        def fmt_val(v):
-            if v is None or np.isnan(v):
-                return "N/A"
-            return f"{v:.5f}"
 
-        total = fmt_val(item['total_ev'])
-        free = fmt_val(item['free_ev'])
-        total_t0 = fmt_val(item['total_t0_ev'])
-        rows.append(f"| {step} | {total} | {free} | {total_t0} |")
+    def fmt_val(v):
+        return "N/A" if np.isnan(v) else f"{v:.5f}"
+
+    rows = [
+        f"| {step} | {fmt_val(total)} | {fmt_val(free)} | {fmt_val(total_t0)} |"
+        for step, total, free, total_t0 in scf_energies[['step', 'total', 'free', 'total_t0']].tolist()
+    ]
 
     table = [
         "- ### SCF Iteration Energies\n",
@@ -541,168 +551,209 @@ def _generate_scf_energies_table(context: Dict[str, Any]) -> str:
 
 
 
+# --- Chart Data Sidecars ---
+# Chart series are not inlined into the Markdown. Each chart gets a small
+# binary sidecar (raw little-endian floats, row-major) next to the report,
+# which js/charts.js fetches when the chart scrolls into view.
+
+CHART_DTYPES = {"scf": "float64", "dos": "float32", "trajectory_energy": "float64", "trajectory_forces": "float64"}
+
+# Trajectory charts: (chart, [(trajectory column, label), ...]); the step is the x axis.
+TRAJECTORY_CHARTS = [
+    ("trajectory_energy", [("energy_total", "Total Energy (eV)"), ("energy_free", "Free Energy (eV)")]),
+    ("trajectory_forces", [("force_max", "Max Force (eV/Å)"), ("force_rms", "RMS Force (eV/Å)"),
+                           ("pressure", "Pressure (GPa)")]),
+]
+
+def add_trajectory(context: Dict[str, Any], trajectory: Dict[str, np.ndarray],
+                   max_points: Optional[int] = TRAJECTORY_MAX_POINTS):
+    """
+    Adds the convergence charts of a multi-step calculation to the context.
+
+    Columns without any value (e.g. no stress computed) are left out, and
+    long runs are downsampled like the DOS.
+    """
+    steps = trajectory.get("step", np.empty(0))
+    context['trajectory_steps'] = len(steps)
+    if len(steps) < 2:
+        return
+    charts = {}
+    for chart, series in TRAJECTORY_CHARTS:
+        present = [(column, label) for column, label in series
+                   if column in trajectory and np.isfinite(trajectory[column]).any()]
+        if not present:
+            continue
+        rows = np.column_stack([steps] + [trajectory[column] for column, _ in present])
+        charts[chart] = (['Step'] + [label for _, label in present], downsample_minmax(rows, max_points))
+    context['trajectory_charts'] = charts
+
+def _scf_chart_rows(context: Dict[str, Any]) -> np.ndarray:
+    """SCF chart rows [step, total, free, total_t0] in eV (missing values as NaN)."""
+    scf_energies = context.get('scf_energies')
+    if scf_energies is None:
+        return np.empty((0, 4))
+    return np.column_stack([scf_energies[key].astype(float) for key in ('step',) + SCF_ENERGY_KEYS])
+
+def _chart_rows(context: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """The rows of every chart the report shows, keyed by chart name."""
+    charts = {"scf": _scf_chart_rows(context)}
+    dos_chart_data = context.get('dos_chart_data')
+    if dos_chart_data is not None:
+        charts["dos"] = np.asarray(dos_chart_data, dtype=float)
+    for chart, (_, rows) in context.get('trajectory_charts', {}).items():
+        charts[chart] = rows
+    return {name: rows for name, rows in charts.items() if len(rows)}
+
+def chart_data_path(output_dir: Path, summary_base_name: str, chart: str) -> Path:
+    """Location of a chart data sidecar, e.g. fair_summarized_vasprun.dos.bin."""
+    return output_dir / f"{summary_base_name}.{chart}.bin"
+
+def write_chart_data(context: Dict[str, Any], output_dir: Path, summary_base_name: str) -> Dict[str, str]:
+    """
+    Writes the chart series of a report as binary sidecar files.
+
+    Returns:
+        Dict mapping chart name ('scf', 'dos') to the sidecar file name,
+        relative to the report. The Markdown generator links these.
+    """
+    chart_files = {}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for chart, rows in _chart_rows(context).items():
+        path = chart_data_path(output_dir, summary_base_name, chart)
+        np.ascontiguousarray(rows, dtype=np.dtype(CHART_DTYPES[chart]).newbyteorder("<")).tofile(path)
+        chart_files[chart] = path.name
+    log.info(f"Wrote chart data: {', '.join(chart_files.values()) or 'none'}")
+    return chart_files
+
+def read_chart_data(path: Path, n_columns: int, chart: str) -> np.ndarray:
+    """Reads a chart data sidecar back into an (n, n_columns) array."""
+    return np.fromfile(path, dtype=np.dtype(CHART_DTYPES[chart]).newbyteorder("<")).reshape(-1, n_columns)
+
+def _chart_div(chart: str, src: str, columns: List[str], options: Dict[str, Any]) -> str:
+    """A placeholder div that js/charts.js turns into a Google LineChart."""
+    attributes = {
+        "id": f"{chart}_chart_div",
+        "class": "fair-chart",
+        "data-src": src,
+        "data-dtype": CHART_DTYPES[chart],
+        "data-columns": json.dumps(columns),
+        "data-options": json.dumps(options),
+    }
+    rendered = " ".join(f'{name}="{html.escape(value)}"' for name, value in attributes.items())
+    return f'\n<div {rendered} style="width: 100%; height: 500px; margin-bottom: 20px;"></div>\n'
+
 def _generate_scf_chart_html(context: Dict[str, Any]) -> str:
     """
-    Generates the HTML and JavaScript block for the Google Chart.
+    Generates the placeholder for the SCF convergence chart.
     """
-    scf_table_data = context.get('scf_table_data', [])
-    if not scf_table_data:
+    src = context.get('chart_files', {}).get('scf')
+    if not src or len(context.get('scf_energies', ())) == 0:
         return ""
-
-    # Serialize the Python data to a JSON string
-    # This is safe because we converted NaN to None in extract_context
-    scf_data_json = json.dumps(scf_table_data)
-
-    # Note: The backticks inside the f-string (for JSON.parse)
-    # must be escaped by doubling them (``) if the outer string uses
-    # f-strings, but here we use ''' so it's fine.
-    # We must be careful with indentation in the JS block.
-    html_js_block = f"""
-<script type="text/javascript" src="https://www.gstatic.com/charts/loader.js"></script>
-<div id="scf_chart_div" style="width: 100%; height: 500px; margin-bottom: 20px;"></div>
-<script type="text/javascript">
-  google.charts.load('current', {{'packages':['corechart']}});
-  google.charts.setOnLoadCallback(drawChart);
-
-  function drawChart() {{
-    // Parse the JSON data passed from Python
-    const scfData = JSON.parse('{scf_data_json}');
-
-    var data = new google.visualization.DataTable();
-    data.addColumn('number', 'Step');
-    data.addColumn('number', 'Total Energy (eV)');
-    data.addColumn('number', 'Free Energy (eV)');
-    data.addColumn('number', 'Total Energy (T=0) (eV)');
-
-    // Convert the list of objects into an array of arrays
-    // Google Charts expects null for missing values, which JSON.parse handles
-    const rows = scfData.map(item => [
-      item.step, 
-      item.total_ev, 
-      item.free_ev, 
-      item.total_t0_ev
-    ]);
-
-    data.addRows(rows);
-
-    var options = {{
-      title: '',
-      curveType: 'function',
-      legend: {{ position: 'bottom' }},
-      hAxis: {{
-        title: 'SCF Step'
-      }},
-      vAxis: {{
-        title: 'Energy (eV)'
-      }},
-      // This allows the chart to be responsive
-      chartArea: {{'width': '85%', 'height': '75%'}},
-    }};
-
-    var chart = new google.visualization.LineChart(document.getElementById('scf_chart_div'));
-    chart.draw(data, options);
-  }}
-</script>
-"""
-    return html_js_block
+    columns = ['Step', 'Total Energy (eV)', 'Free Energy (eV)', 'Total Energy (T=0) (eV)']
+    options = {
+        'curveType': 'function',
+        'legend': {'position': 'bottom'},
+        'hAxis': {'title': 'SCF Step'},
+        'vAxis': {'title': 'Energy (eV)'},
+        'chartArea': {'width': '85%', 'height': '75%'},
+    }
+    return _chart_div("scf", src, columns, options)
 
 def _generate_dos_chart_html(context: Dict[str, Any]) -> str:
     """
-    Generates the HTML and JavaScript block for the DOS Google Chart.
+    Generates the placeholder for the DOS chart.
     """
-    dos_chart_data = context.get('dos_chart_data', [])
-    if not dos_chart_data:
+    src = context.get('chart_files', {}).get('dos')
+    if not src:
         log.info("No DOS chart data found, skipping chart generation.")
         return ""
-
-    is_spin_polarized = context.get('dos_is_spin_polarized', False)
-    dos_data_json = json.dumps(dos_chart_data)
-
-    # We must be careful with indentation in the JS block.
-    html_js_block = f"""
-<div id="dos_chart_div" style="width: 100%; height: 500px; margin-bottom: 20px;"></div>
-<script type="text/javascript">
-  // We assume google.charts.load is already called by the SCF chart
-  google.charts.setOnLoadCallback(drawDosChart);
-
-  function drawDosChart() {{
-    // Parse the JSON data passed from Python
-    const dosData = JSON.parse('{dos_data_json}');
-    const isSpinPolarized = {str(is_spin_polarized).lower()};
-
-    var data = new google.visualization.DataTable();
-    data.addColumn('number', 'Energy (eV vs Fermi)');
-    
-    var rows;
-    
-    if (isSpinPolarized) {{
-      data.addColumn('number', 'Spin Up');
-      data.addColumn('number', 'Spin Down');
-      rows = dosData.map(item => [
-        item.energy_ev, 
-        item.dos_up, 
-        item.dos_down // Already negative
-      ]);
-    }} else {{
-      data.addColumn('number', 'DOS');
-      rows = dosData.map(item => [
-        item.energy_ev, 
-        item.dos
-      ]);
-    }}
-
-    data.addRows(rows);
-
-    var options = {{
-      title: '',
-      legend: {{ position: 'bottom' }},
-      hAxis: {{
-        title: 'Energy (eV) [Fermi Energy at 0 eV]'
-      }},
-      vAxis: {{
-        title: 'DOS (States/eV)'
-      }},
-      // This allows the chart to be responsive
-      chartArea: {{'width': '85%', 'height': '75%'}},
-      // Ensure spin down is a different color
-      series: {{
-        1: {{ color: 'red' }}
-      }}
-    }};
-
-    var chart = new google.visualization.LineChart(document.getElementById('dos_chart_div'));
-    chart.draw(data, options);
-  }}
-</script>
-"""
-    return html_js_block
+    if context.get('dos_is_spin_polarized', False):
+        columns = ['Energy (eV vs Fermi)', 'Spin Up', 'Spin Down']  # Spin down is stored negated
+    else:
+        columns = ['Energy (eV vs Fermi)', 'DOS']
+    options = {
+        'legend': {'position': 'bottom'},
+        'hAxis': {'title': 'Energy (eV) [Fermi Energy at 0 eV]'},
+        'vAxis': {'title': 'DOS (States/eV)'},
+        'chartArea': {'width': '85%', 'height': '75%'},
+        'series': {'1': {'color': 'red'}},
+    }
+    return _chart_div("dos", src, columns, options)
 
 
+def _generate_trajectory_chart_html(context: Dict[str, Any]) -> str:
+    """
+    Generates the convergence charts of a multi-step calculation (empty for single points).
+    """
+    chart_files = context.get('chart_files', {})
+    blocks = []
+    for chart, (columns, _) in context.get('trajectory_charts', {}).items():
+        src = chart_files.get(chart)
+        if not src:
+            continue
+        title = 'Energy (eV)' if chart == 'trajectory_energy' else 'Force (eV/Å) / Pressure (GPa)'
+        options = {
+            'legend': {'position': 'bottom'},
+            'hAxis': {'title': 'Ionic Step'},
+            'vAxis': {'title': title},
+            'chartArea': {'width': '85%', 'height': '75%'},
+        }
+        blocks.append(_chart_div(chart, src, columns, options))
+    if not blocks:
+        return ""
+    return f"### Trajectory ({context.get('trajectory_steps')} steps)\n" + "".join(blocks) + "\n"
 
-def generate_markdown(context: Dict[str, Any]) -> str:
+def report_sections(context: Dict[str, Any]) -> Dict[str, str]:
     """
-    Generates the full Markdown report string from the extracted context.
+    Renders the building blocks of a report (tables, charts) from the context.
+
+    The built-in layout and custom templates both place these blocks; a
+    template sees them as variables next to the context entries.
     """
-    # Pull data from context for readability
-    metadata = context.get('metadata', {})
     t_original_data = context.get('t_original_data', {})
     t_cell_data = context.get('t_cell_data', {})
+    return {
+        'title': context.get('metadata', {}).get('entry_name', 'FAIR Parsed Report'),
+        # mkdocs-macros call, kept verbatim so templates need no {% raw %} block
+        'structure_viewer': '{{ structure_viewer("fair-structure.json") }}',
+        'material_table': _generate_material_composition_table(context),
+        'lattice_original_table': _generate_lattice_table(context, 'original_cell', t_original_data.get('label', 'unavailable')),
+        'lattice_cell_table': _generate_lattice_table(context, 'cell_type_data', t_cell_data.get('label', 'unavailable')),
+        'symmetry_table': _generate_symmetry_table(context),
+        'kpoints_table': _generate_kpoints_table(context),
+        'metadata_table': _generate_metadata_table(context),
+        'final_energies_table': _generate_final_energies_table(context),
+        'scf_chart_html': _generate_scf_chart_html(context),
+        'scf_energies_table': _generate_scf_energies_table(context),
+        'dos_chart_html': _generate_dos_chart_html(context),
+        'trajectory_chart_html': _generate_trajectory_chart_html(context),
+    }
 
-    # --- Generate table strings ---
-    material_table = _generate_material_composition_table(context)
-    lattice_original_table = _generate_lattice_table(context, 'original_cell', t_original_data.get('label', 'unavailable'))
-    lattice_cell_table = _generate_lattice_table(context, 'cell_type_data', t_cell_data.get('label', 'unavailable'))
-    symmetry_table = _generate_symmetry_table(context)
-    kpoints_table = _generate_kpoints_table(context)
-    metadata_table = _generate_metadata_table(context)
-    final_energies_table = _generate_final_energies_table(context)
-
-    scf_chart_html = _generate_scf_chart_html(context)
-    scf_energies_table = _generate_scf_energies_table(context)
+def generate_markdown(context: Dict[str, Any], template_path: Optional[Union[str, Path]] = None) -> str:
+    """
+    Generates the full Markdown report string from the extracted context.
 
-    # --- **NEW:** Generate DOS Chart ---
-    dos_chart_html = _generate_dos_chart_html(context)
+    Without template_path the built-in layout below is used. Otherwise the
+    Jinja2 template at template_path is rendered with the context entries
+    and the blocks of report_sections() as variables.
+    """
+    sections = report_sections(context)
+    if template_path:
+        return render_template(template_path, dict(context, **sections))
 
+    # Pull data from context for readability
+    metadata = context.get('metadata', {})
+    material_table = sections['material_table']
+    lattice_original_table = sections['lattice_original_table']
+    lattice_cell_table = sections['lattice_cell_table']
+    symmetry_table = sections['symmetry_table']
+    kpoints_table = sections['kpoints_table']
+    metadata_table = sections['metadata_table']
+    final_energies_table = sections['final_energies_table']
+    scf_chart_html = sections['scf_chart_html']
+    scf_energies_table = sections['scf_energies_table']
+    dos_chart_html = sections['dos_chart_html']
+    trajectory_chart_html = sections['trajectory_chart_html']
 
     # --- Main Markdown f-string ---
     # This is now much cleaner, reading directly from the context.
@@ -752,67 +803,157 @@ def generate_markdown(context: Dict[str, Any]) -> str:
 
 </div>
 
-{scf_chart_html}
-
-### Density of States (DOS)
+{trajectory_chart_html}### Density of States (DOS)
 {dos_chart_html}
 
 """
     return markdown_content
 
-def save_report(content: str, input_path: Path, output_dir: Path):
-    """Saves the generated Markdown content to a file."""
+def summary_base_name(input_path: Path) -> str:
+    """Base name of the report for a parsed archive, e.g. 'fair_summarized_vasprun'."""
     # The output name is based on the *input* JSON file name
-    base_name = input_path.stem  # e.g., "fair_parsed_my_calc"
-    summary_base_name = base_name.replace("fair_parsed_", "fair_summarized_")
-    output_path = output_dir / f"{summary_base_name}.md"
+    return input_path.stem.replace("fair_parsed_", "fair_summarized_")
+
+def save_report(content: str, input_path: Path, output_dir: Path) -> bool:
+    """Saves the generated Markdown content to a file. Returns True on success."""
+    output_path = report_path(input_path, output_dir)
 
     try:
         output_dir.mkdir(parents=True, exist_ok=True)
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(content)
         log.info(f"Successfully generated markdown summary at: {output_path}")
+        return True
     except Exception as e:
         log.error(f"Failed to write summary file: {e}")
+        return False
+
+# --- Incremental Summaries ---
+# Like parsed archives, each report gets a record in .fair_cache/ holding the
+# content hash of its input archive and a key over everything else that
+# shapes the report, so unchanged reports are not written again.
+
+@lru_cache(maxsize=64)
+def _template_digest(path: str, size: int, mtime_ns: int) -> str:
+    return file_sha256(Path(path))
+
+def template_digest(template_path: Optional[Union[str, Path]]) -> Optional[str]:
+    """SHA-256 of a template file (None for the built-in layout), hashed once per version of the file."""
+    if not template_path:
+        return None
+    path = Path(template_path).expanduser().resolve()
+    stat = path.stat()
+    return _template_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+def _report_key(fingerprint: Dict[str, Any], template_path: Optional[Union[str, Path]],
+                dos_max_points: Optional[int]) -> str:
+    options = {"report": "markdown", "template": template_digest(template_path), "dos_max_points": dos_max_points}
+    return cache_key(fingerprint, options)
+
+def report_path(input_path: Path, output_dir: Path) -> Path:
+    """The Markdown report written for a parsed archive."""
+    return output_dir / f"{summary_base_name(input_path)}.md"
+
+def is_report_current(input_path: Path, output_dir: Path, template_path: Optional[Union[str, Path]] = None,
+                      dos_max_points: Optional[int] = DOS_MAX_POINTS) -> bool:
+    """
+    True if the report of input_path in output_dir is up to date.
+
+    That is: it was written from an archive with the same content, with the
+    same template, options and fairtool/nomad versions, and all of its files
+    (report and chart data) still exist. An untouched archive is not hashed
+    again (see cache.input_fingerprint).
+    """
+    report = report_path(input_path, output_dir)
+    record = load_cache_record(report)
+    if record is None:
+        return False
+    try:
+        key = _report_key(input_fingerprint(input_path, record), template_path, dos_max_points)
+    except OSError:
+        return False
+    return is_cache_hit(report, record, key)
 
 # --- Main Orchestration Function ---
 
-def run_summarization(input_path: Path, output_dir: Path, template_path: Optional[str] = None):
+def run_summarization(input_path: Path, output_dir: Path, template_path: Optional[str] = None,
+                      dos_max_points: Optional[int] = DOS_MAX_POINTS) -> bool:
     """
     Generates summary reports (e.g., Markdown) from parsed or analyzed data.
 
     Args:
         input_path: Path to input JSON file (e.g., fair_parsed_vasprun.json).
         output_dir: Directory to save the summary report.
-        template_path: Optional path to a custom template (not used here).
+        template_path: Optional Jinja2 template for the report (see generate_markdown).
+        dos_max_points: Maximum rows of the DOS chart (None or 0: no downsampling).
+
+    Returns:
+        bool: True if the report was written.
     """
     
-    # 1. Load Data
-    data = load_data(input_path)
-    if not data:
-        log.error("Aborting summarization due to data load failure.")
-        return
+    # Fingerprint the archive before reading it, so a concurrent change is never recorded as done
+    report = report_path(input_path, output_dir)
+    try:
+        fingerprint = input_fingerprint(input_path, load_cache_record(report))
+    except OSError as e:
+        log.error(f"Cannot read {input_path}: {e}")
+        return False
+
+    # 1. Load Data (only the parts the report shows), then stream over the calculation steps
+    try:
+        reader = ArchiveReader(input_path)
+    except Exception as e:
+        log.error(f"Failed to load or parse archive: {e}")
+        return False
+    with reader:
+        data = load_data(input_path, paths=SUMMARY_PATHS, reader=reader)
+        if not data:
+            log.error("Aborting summarization due to data load failure.")
+            return False
+        try:
+            trajectory = extract_trajectory(reader)
+        except Exception as e:
+            log.warning(f"Could not extract the trajectory of {input_path.name}: {e}")
+            trajectory = {}
 
     # 2. Extract Data
     try:
-        context = extract_context(data)
+        context = extract_context(data, dos_max_points=dos_max_points)
+        add_trajectory(context, trajectory)
         log.info("Successfully extracted data context.")
     except Exception as e:
         log.error(f"Failed during data extraction: {e}", exc_info=True)
-        return
+        return False
+
+    # 3. Write chart data (and the trajectory of multi-step runs) next to the report
+    outputs = [report.name]
+    try:
+        context['chart_files'] = write_chart_data(context, output_dir, summary_base_name(input_path))
+        outputs.extend(context['chart_files'].values())
+        if context.get('trajectory_charts'):
+            trajectory_file = trajectory_path(output_dir, input_path)
+            save_trajectory(trajectory, trajectory_file)
+            outputs.append(trajectory_file.name)
+    except Exception as e:
+        log.error(f"Failed to write chart data, charts are left out: {e}")
+        context['chart_files'] = {}
 
-    # 3. Generate Markdown
+    # 4. Generate Markdown
     try:
-        markdown_content = generate_markdown(context)
+        markdown_content = generate_markdown(context, template_path)
         log.info("Successfully generated Markdown content.")
     except Exception as e:
         log.error(f"Failed during Markdown generation: {e}", exc_info=True)
-        return
+        return False
 
-    # 4. Save Report
-    save_report(markdown_content, input_path, output_dir)
+    # 5. Save Report
+    if not save_report(markdown_content, input_path, output_dir):
+        return False
+    key = _report_key(fingerprint, template_path, dos_max_points)
+    write_cache_record(report, input_path, fingerprint, key, outputs)
 
     log.info("Summarization process completed.")
+    return True
 
 # --- Example Usage (if run as a script) ---
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+# fairtool/templating.py
+
+"""Compiled, cached Jinja2 templates for custom summary layouts."""
+
+import hashlib
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+log = logging.getLogger("fairtool")
+
+TEMPLATE_CACHE_DIRNAME = "templates"
+
+
+def template_cache_dir() -> Path:
+    """Directory holding compiled templates ($XDG_CACHE_HOME/fairtool/templates)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "fairtool" / TEMPLATE_CACHE_DIRNAME
+
+
+def _import_jinja2():
+    try:
+        import jinja2
+    except ImportError as e:
+        raise ImportError("Custom summary templates need the 'jinja2' package (pip install jinja2).") from e
+    return jinja2
+
+
+@lru_cache(maxsize=None)
+def _environment():
+    """
+    The Jinja2 environment of this process, created on first use.
+
+    Templates are looked up by absolute path and kept compiled in memory; a
+    template is only recompiled when its file changes. The compiled code is
+    also stored on disk under the SHA-256 of the template source, so other
+    processes (e.g. the workers of `fair summarize --jobs`) and later runs
+    skip compilation for any copy of the same template.
+    """
+    jinja2 = _import_jinja2()
+
+    class AbsolutePathLoader(jinja2.BaseLoader):
+        def get_source(self, environment, template):
+            path = Path(template)
+            try:
+                source = path.read_text(encoding="utf-8")
+            except OSError:
+                raise jinja2.TemplateNotFound(template)
+            mtime = path.stat().st_mtime_ns
+            return source, str(path), lambda: path.exists() and path.stat().st_mtime_ns == mtime
+
+    class ContentHashBytecodeCache(jinja2.FileSystemBytecodeCache):
+        def get_bucket(self, environment, name, filename, source):
+            key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+            bucket = jinja2.bccache.Bucket(environment, key, self.get_source_checksum(source))
+            self.load_bytecode(bucket)
+            return bucket
+
+    bytecode_cache = None
+    cache_dir = template_cache_dir()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = ContentHashBytecodeCache(str(cache_dir))
+    except OSError as e:
+        log.debug(f"Template cache {cache_dir} not usable ({e}); compiling in memory only.")
+
+    return jinja2.Environment(
+        loader=AbsolutePathLoader(),
+        bytecode_cache=bytecode_cache,
+        keep_trailing_newline=True,
+        undefined=jinja2.ChainableUndefined,
+    )
+
+
+def load_template(template_path: Union[str, Path]):
+    """
+    Returns the compiled template at template_path.
+
+    Raises:
+        ImportError: If jinja2 is not installed.
+        FileNotFoundError: If the template file does not exist.
+    """
+    path = Path(template_path).expanduser().resolve()
+    jinja2 = _import_jinja2()
+    try:
+        return _environment().get_template(str(path))
+    except jinja2.TemplateNotFound:
+        raise FileNotFoundError(f"Summary template not found: {template_path}") from None
+
+
+def render_template(template_path: Union[str, Path], variables: Optional[Dict[str, Any]] = None) -> str:
+    """Renders the template at template_path with the given variables."""
+    return load_template(template_path).render(**(variables or {}))
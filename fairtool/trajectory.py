@@ -0,0 +1,161 @@
+# fairtool/trajectory.py
+
+"""Per-step trajectories (energies, forces, stress) of multi-step calculations."""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import numpy as np
+
+from .archive import ArchiveReader
+from .units import J_PER_EV
+
+log = logging.getLogger("fairtool")
+
+EV_PER_ANGSTROM = J_PER_EV / 1e-10  # Force unit in J/m
+PA_PER_GPA = 1e9
+
+TRAJECTORY_PREFIX = "fair_trajectory_"
+
+# Subtrees of run[].calculation[] read per step; everything else is skipped.
+STEP_PATHS = [
+    "energy.total.value",
+    "energy.free.value",
+    "forces.total.value",
+    "stress.total.value",
+    "temperature",
+    "time_physical",
+]
+
+# Columns of a trajectory, in display units.
+TRAJECTORY_FIELDS = {
+    "energy_total": "eV",
+    "energy_free": "eV",
+    "force_max": "eV/Å",      # Largest atomic force norm
+    "force_rms": "eV/Å",      # Root mean square of the atomic force norms
+    "pressure": "GPa",        # -trace(stress) / 3
+    "stress_max": "GPa",      # Largest absolute stress component
+    "temperature": "K",
+    "time": "fs",
+}
+
+
+def _value(node: Any, *keys: str) -> Any:
+    for key in keys:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def step_scalars(calc: Dict[str, Any]) -> Dict[str, float]:
+    """Reduces one calculation step to the scalars of TRAJECTORY_FIELDS (NaN if absent)."""
+    scalars = dict.fromkeys(TRAJECTORY_FIELDS, np.nan)
+    scalars["energy_total"] = _number(_value(calc, "energy", "total", "value")) / J_PER_EV
+    scalars["energy_free"] = _number(_value(calc, "energy", "free", "value")) / J_PER_EV
+
+    forces = _value(calc, "forces", "total", "value")
+    if forces is not None:
+        forces = np.asarray(forces, dtype=float)
+        if forces.ndim == 2 and forces.shape[0] and forces.shape[1] == 3:
+            norms = np.linalg.norm(forces, axis=1) / EV_PER_ANGSTROM
+            scalars["force_max"] = norms.max()
+            scalars["force_rms"] = np.sqrt(np.mean(norms ** 2))
+
+    stress = _value(calc, "stress", "total", "value")
+    if stress is not None:
+        stress = np.asarray(stress, dtype=float)
+        if stress.shape == (3, 3):
+            scalars["pressure"] = -np.trace(stress) / 3 / PA_PER_GPA
+            scalars["stress_max"] = np.abs(stress).max() / PA_PER_GPA
+
+    scalars["temperature"] = _number(_value(calc, "temperature"))
+    scalars["time"] = _number(_value(calc, "time_physical")) * 1e15  # s -> fs
+    return scalars
+
+
+def iter_steps(reader: ArchiveReader) -> Iterator[Dict[str, Any]]:
+    """Yields the calculations of every run in order, each holding only STEP_PATHS."""
+    for run_index in range(reader.length("run")):
+        yield from reader.iter_items(f"run.{run_index}.calculation", STEP_PATHS)
+
+
+def extract_trajectory(archive: Union[Path, ArchiveReader]) -> Dict[str, np.ndarray]:
+    """
+    Collects the per-step scalars of all calculations of an archive.
+
+    The calculations are streamed one at a time (see
+    ArchiveReader.iter_items), so the cost grows linearly with the number of
+    steps and memory stays bounded; with segmented msgpack archives nothing
+    but the STEP_PATHS subtrees is decoded.
+
+    Args:
+        archive: Path of a parsed archive, or an open ArchiveReader of one.
+
+    Returns:
+        Dict mapping 'step' and each TRAJECTORY_FIELDS name to a float array
+        with one entry per step.
+    """
+    if not isinstance(archive, ArchiveReader):
+        with ArchiveReader(archive, arrays=True) as reader:
+            return extract_trajectory(reader)
+
+    columns: Dict[str, list] = {field: [] for field in TRAJECTORY_FIELDS}
+    for calc in iter_steps(archive):
+        for field, value in step_scalars(calc).items():
+            columns[field].append(value)
+    n_steps = len(columns["energy_total"])
+    trajectory = {"step": np.arange(1, n_steps + 1, dtype=float)}
+    trajectory.update({field: np.asarray(values, dtype=float) for field, values in columns.items()})
+    return trajectory
+
+
+def trajectory_path(output_dir: Path, archive: Path) -> Path:
+    """Location of the trajectory artifact of an archive, e.g. fair_trajectory_vasprun.npz."""
+    stem = archive.stem.replace("fair_parsed_", "", 1)
+    return output_dir / f"{TRAJECTORY_PREFIX}{stem}.npz"
+
+
+def save_trajectory(trajectory: Dict[str, np.ndarray], path: Path):
+    """Writes a trajectory as a compressed .npz holding one float array per column."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **trajectory)
+
+
+def load_trajectory(path: Path) -> Dict[str, np.ndarray]:
+    """Reads a trajectory written by save_trajectory."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def run_trajectory_extraction(archive: Path, output_dir: Optional[Path] = None,
+                              min_steps: int = 2) -> Optional[Path]:
+    """
+    Extracts the trajectory of a parsed archive and saves it next to it.
+
+    Args:
+        archive: A fair_parsed_* archive.
+        output_dir: Directory for the artifact (default: the archive's directory).
+        min_steps: Single-point calculations (fewer steps) get no artifact.
+
+    Returns:
+        The path of the written artifact, or None if there was no trajectory.
+    """
+    trajectory = extract_trajectory(archive)
+    n_steps = len(trajectory["step"])
+    if n_steps < min_steps:
+        log.debug(f"{archive.name} has {n_steps} calculation step(s); no trajectory written.")
+        return None
+    path = trajectory_path(output_dir or archive.parent, archive)
+    save_trajectory(trajectory, path)
+    log.info(f"Saved trajectory of {n_steps} steps to {path}")
+    return path
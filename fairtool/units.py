@@ -0,0 +1,8 @@
+# fairtool/units.py
+
+"""Conversion factors from the SI units of NOMAD archives to display units."""
+
+# Joule per electronvolt (the elementary charge in C)
+J_PER_EV = 1.602176634e-19
+# Ångström per metre
+M_TO_ANGSTROM = 1e10
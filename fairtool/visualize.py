@@ -2,6 +2,7 @@
 
 """Handles generation of data for visualizations."""
 
+import html
 import json
 import logging
 from pathlib import Path
@@ -13,6 +14,11 @@ import re
 import sys
 from datetime import datetime
 
+from .archive import is_parsed_archive, load_archive
+from .bands import band_structure_from_archive, dos_from_archive, sidecar_path, write_band_structure
+from .index import find_parsed_archives
+from .structures import structure_from_archive
+
 log = logging.getLogger(__name__)
 
 # Essential: pymatgen for structure/band/DOS objects
@@ -29,6 +35,9 @@ except ImportError:
 
 log = logging.getLogger("fairtool")
 
+# Maximum energies of a DOS plot
+DOS_MAX_POINTS = 1000
+
 # --- Data Preparation Functions ---
 
 def _hr_size(num_bytes: int) -> str:
@@ -74,52 +83,24 @@ def get_structure_data(parsed_data: dict) -> Optional[dict]:
         return None
 
     log.debug("Attempting to extract structure data...")
-    structure = None
     try:
-        # --- Strategy 1: Look for pymatgen structure directly (ideal if parser provides it) ---
-        # This depends heavily on electronic-parsers output format. Check its documentation.
-        # Example hypothetical path:
-        pmg_structure_dict = parsed_data.get("results", {}).get("properties", {}).get("structure", {}).get("pymatgen_structure")
-        if pmg_structure_dict:
-            structure = Structure.from_dict(pmg_structure_dict)
-            log.debug("Found structure data (pymatgen format).")
-
-        # --- Strategy 2: Look for primitive structure / ASE atoms ---
-        # Example hypothetical path for ASE Atoms object (needs AseAtomsAdaptor)
-        elif AseAtomsAdaptor:
-             ase_atoms_dict = parsed_data.get("results", {}).get("properties", {}).get("structure", {}).get("ase_atoms")
-             if ase_atoms_dict and hasattr(AseAtomsAdaptor, 'get_atoms'): # Check method exists
-                 # Need to reconstruct ASE Atoms object first if stored as dict
-                 # This part is complex and depends on how ASE atoms are serialized
-                 # atoms = ase.io.jsonio.read_json(io.StringIO(json.dumps(ase_atoms_dict))) # Hypothetical
-                 # structure = AseAtomsAdaptor.get_structure(atoms)
-                 log.warning("ASE Atoms reconstruction from JSON not fully implemented.") # Placeholder
-             else:
-                 # Look for basic lattice vectors and atomic positions
-                 # Example path (adjust based on parser output):
-                 lattice_vectors = parsed_data.get("results", {}).get("properties", {}).get("structure", {}).get("lattice_vectors")
-                 species = parsed_data.get("results", {}).get("properties", {}).get("structure", {}).get("species_at_sites")
-                 coords = parsed_data.get("results", {}).get("properties", {}).get("structure", {}).get("cartesian_site_positions") # Or fractional
-                 coords_are_cartesian = True # Assume cartesian, adjust if fractional
-
-                 if lattice_vectors and species and coords:
-                     log.debug("Found basic structure data (lattice, species, coords).")
-                     structure = Structure(
-                         lattice=lattice_vectors,
-                         species=species,
-                         coords=coords,
-                         coords_are_cartesian=coords_are_cartesian
-                     )
-                 else:
-                    log.warning("Could not find sufficient structure data in parsed output.")
-                    return None
-
-        if structure:
-             # Convert pymatgen Structure to a dictionary suitable for JSON serialization
-             # This is often needed for passing data to JavaScript/React
-             return structure.as_dict()
-        else:
+        # Final structure of the first run (run[0].system[-1].atoms, in Å)
+        structure_data = structure_from_archive(parsed_data)
+        if structure_data is None:
+            log.warning("Could not find sufficient structure data in parsed output.")
+            return None
+        if structure_data["cell"] is None:
+            log.warning("Structure has no lattice vectors; only periodic structures are supported.")
             return None
+        structure = Structure(
+            lattice=structure_data["cell"],
+            species=structure_data["species"],
+            coords=structure_data["positions"],
+            coords_are_cartesian=True,
+        )
+        # Convert pymatgen Structure to a dictionary suitable for JSON serialization
+        # This is often needed for passing data to JavaScript/React
+        return structure.as_dict()
 
     except Exception as e:
         log.error(f"Error processing structure data: {e}", exc_info=True)
@@ -127,49 +108,44 @@ def get_structure_data(parsed_data: dict) -> Optional[dict]:
 
 
 def get_band_structure_data(parsed_data: dict) -> Optional[dict]:
-    """ Extracts and formats band structure data. (Placeholder) """
+    """
+    Extracts the band structure along the k-path for plotting.
+
+    Args:
+        parsed_data: The dictionary loaded from the parser's JSON output.
+
+    Returns:
+        Plot-ready band structure (see bands.band_structure_from_archive; the
+        energies are a NumPy array, written with bands.write_band_structure),
+        or None if not found.
+    """
     log.debug("Attempting to extract band structure data...")
-    # TODO: Implement logic similar to get_structure_data
-    # - Look for BandStructureSymmLine object (ideal)
-    # - Look for raw k-points, eigenvalues, labels
-    # - Format into a dictionary suitable for plotting (e.g., segments, energies)
-    #   compatible with your React component.
     try:
-        # Example hypothetical path for pymatgen BS object
-        bs_dict = parsed_data.get("results", {}).get("properties", {}).get("electronic", {}).get("band_structure", {}).get("pymatgen_bandstructure")
-        if bs_dict:
-             # Potentially needs further processing or just return the dict
-             log.debug("Found band structure data (pymatgen format).")
-             # from pymatgen.electronic_structure.bandstructure import BandStructureSymmLine
-             # bs = BandStructureSymmLine.from_dict(bs_dict)
-             # return bs.as_dict() # Or a custom format
-             return bs_dict # Return as is for now
-        else:
-            log.warning("Band structure data not found or format not recognized.")
-            return None
+        bands = band_structure_from_archive(parsed_data)
+        if bands is None:
+            log.warning("Band structure data not found in parsed output.")
+        return bands
     except Exception as e:
         log.error(f"Error processing band structure data: {e}", exc_info=True)
         return None
 
-def get_dos_data(parsed_data: dict) -> Optional[dict]:
-    """ Extracts and formats Density of States (DOS) data. (Placeholder) """
+def get_dos_data(parsed_data: dict, max_points: Optional[int] = DOS_MAX_POINTS) -> Optional[dict]:
+    """
+    Extracts the total density of states for plotting.
+
+    Args:
+        parsed_data: The dictionary loaded from the parser's JSON output.
+        max_points: Maximum number of energies kept (peaks are preserved).
+
+    Returns:
+        A JSON-serializable dictionary (see bands.dos_from_archive), or None if not found.
+    """
     log.debug("Attempting to extract DOS data...")
-    # TODO: Implement logic similar to get_structure_data
-    # - Look for CompleteDos object (ideal)
-    # - Look for raw energy levels and DOS values
-    # - Format into a dictionary suitable for plotting
     try:
-        # Example hypothetical path for pymatgen DOS object
-        dos_dict = parsed_data.get("results", {}).get("properties", {}).get("electronic", {}).get("dos", {}).get("pymatgen_dos")
-        if dos_dict:
-             log.debug("Found DOS data (pymatgen format).")
-             # from pymatgen.electronic_structure.dos import CompleteDos
-             # dos = CompleteDos.from_dict(dos_dict)
-             # return dos.as_dict() # Or a custom format
-             return dos_dict # Return as is for now
-        else:
-            log.warning("DOS data not found or format not recognized.")
-            return None
+        dos = dos_from_archive(parsed_data, max_points)
+        if dos is None:
+            log.warning("DOS data not found in parsed output.")
+        return dos
     except Exception as e:
         log.error(f"Error processing DOS data: {e}", exc_info=True)
         return None
@@ -214,6 +190,30 @@ def generate_markdown_embedding(data_file_path: Path, viz_type: str, component_i
 """
     return snippet
 
+def generate_band_structure_embedding(json_path: Path, component_id: str) -> str:
+    """
+    Generates the placeholder div that js/charts.js turns into a band structure plot.
+
+    The div names both the JSON written by bands.write_band_structure and
+    its quantized sidecar, so the page fetches them together once the plot
+    scrolls into view.
+
+    Args:
+        json_path: Path of the *_bands.json file (the sidecar lies next to it).
+        component_id: A unique ID for the HTML element.
+
+    Returns:
+        A Markdown string holding the div.
+    """
+    attributes = {
+        "id": component_id,
+        "class": "fair-bands",
+        "data-src": json_path.name,
+        "data-sidecar": sidecar_path(json_path).name,
+    }
+    rendered = " ".join(f'{name}="{html.escape(value)}"' for name, value in attributes.items())
+    return f'\n<div {rendered} style="width: 100%; height: 500px; margin-bottom: 1em;"></div>\n\n'
+
 # --- Main Execution Logic ---
 
 def run_visualization(input_path: Path, output_dir: Path, embed: bool):
@@ -226,16 +226,16 @@ def run_visualization(input_path: Path, output_dir: Path, embed: bool):
         embed: Whether to generate Markdown embedding snippets.
     """
     # --- Find input files ---
-    if input_path.is_file() and input_path.suffix == '.json':
+    if input_path.is_file() and is_parsed_archive(input_path):
         files_to_process = [input_path]
     elif input_path.is_dir():
-        log.info(f"Searching for parsed JSON files (*_parsed.json) in: {input_path}")
-        files_to_process = sorted(list(input_path.rglob("*_parsed.json")))
+        log.info(f"Searching for parsed archives (fair_parsed_*.json/*.msgpack) in: {input_path}")
+        files_to_process = find_parsed_archives(input_path)
         if not files_to_process:
-            #  log.warning(f"No '*_parsed.json' files found in {input_path}")
+            #  log.warning(f"No 'fair_parsed_*' archives found in {input_path}")
              return
     else:
-        log.error(f"Input path must be a JSON file or a directory containing them: {input_path}")
+        log.error(f"Input path must be a parsed archive or a directory containing them: {input_path}")
         return
 
     log.info(f"Found {len(files_to_process)} JSON file(s) to process for visualization.")
@@ -248,8 +248,7 @@ def run_visualization(input_path: Path, output_dir: Path, embed: bool):
         viz_data_found = False
 
         try:
-            with open(file, 'r') as f:
-                parsed_data = json.load(f)
+            parsed_data = load_archive(file)
 
             # --- Generate Structure Visualization Data ---
             structure_viz_data = get_structure_data(parsed_data)
@@ -272,12 +271,12 @@ def run_visualization(input_path: Path, output_dir: Path, embed: bool):
                 viz_data_found = True
                 output_file = output_dir / f"{base_name}_bands.json"
                 log.info(f"Saving band structure visualization data to: {output_file.name}")
-                with open(output_file, 'w') as f:
-                    json.dump(bands_viz_data, f, indent=2)
+                # Path and labels as JSON, energies in a quantized binary sidecar loaded on demand
+                write_band_structure(bands_viz_data, output_file)
                 if embed:
                     component_id = f"viz-bands-{base_name}"
                     md_snippets.append(f"### Band Structure: `{base_name}`\n")
-                    md_snippets.append(generate_markdown_embedding(output_file, "bands", component_id))
+                    md_snippets.append(generate_band_structure_embedding(output_file, component_id))
                     md_snippets.append("\n")
 
             # --- Generate DOS Visualization Data ---
@@ -313,6 +312,7 @@ def run_visualization(input_path: Path, output_dir: Path, embed: bool):
             with open(md_output_file, 'w', encoding='utf-8') as f:
                 f.write(f"# Visualization Embeddings\n\n")
                 f.write(f"Place the generated JSON files (e.g., `{base_name}_structure.json`) in a location accessible by your mkdocs site (e.g., within the `docs/assets/viz_data/` directory).\n\n")
+                f.write("Band structures are `div.fair-bands` elements drawn by `js/charts.js`: it fetches the `*_bands.json` file and its binary sidecar (`*_bands.u16`, the quantized band energies) once the plot scrolls into view; keep both files next to the page.\n\n")
                 f.write(f"Ensure your mkdocs site has the necessary JavaScript to find `div.react-viz-mount` elements and render the appropriate React components using the `data-src` attribute.\n\n")
                 f.write("---\n\n")
                 f.write("\n".join(md_snippets))
@@ -0,0 +1,18 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+# The example VASP calculations shipped with the tests
+VASP = Path(__file__).parent / "VASP"
+
+
+@pytest.fixture
+def archives(tmp_path):
+    """Copies of the example archives (only the fair_parsed_* files)."""
+    root = tmp_path / "archives"
+    for archive in VASP.rglob("fair_parsed_*.json"):
+        target = root / archive.relative_to(VASP)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(archive, target)
+    return root
@@ -0,0 +1,147 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fairtool.analyze import analysis_record_path, result_columns, run_analysis, select_tasks
+from fairtool.results import ResultsStore, read_results, results_path
+
+
+def _by_example(table: pd.DataFrame) -> pd.DataFrame:
+    return table.set_index(table["archive"].map(lambda archive: Path(archive).parent.name))
+
+
+def test_results_table_of_a_project(archives, tmp_path):
+    pytest.importorskip("pyarrow")
+    config = tmp_path / "analysis.yaml"
+    config.write_text("batch_size: 2\n")
+
+    table_path = run_analysis(archives, tmp_path / "out", config)
+
+    assert table_path == tmp_path / "out" / "fair_analysis.parquet"
+    import pyarrow.parquet
+    assert pyarrow.parquet.ParquetFile(table_path).num_row_groups == 3  # 6 archives, 2 per batch
+
+    table = _by_example(read_results(table_path))
+    assert list(table.columns) == list(result_columns(select_tasks({})))
+    relax = table.loc["example06"]
+    assert relax["formula"] == "AcAg"
+    assert relax["n_steps"] == 3
+    assert relax["energy_total"] == pytest.approx(-7.138442, abs=1e-6)
+    assert relax["pressure"] == pytest.approx(0.202429, abs=1e-6)
+    assert relax["magnetization"] == pytest.approx(-0.037035, abs=1e-6)
+    assert not relax["geometry_converged"]
+    assert table.loc["example01", "scf_converged"]
+    assert table.loc["example01", "band_gap"] == pytest.approx(7.2254)
+    assert np.isnan(table.loc["example04", "energy_total"])  # No total energy in that archive
+
+    # Projection: only the requested columns are read
+    assert list(read_results(table_path, columns=["formula", "band_gap"]).columns) == ["formula", "band_gap"]
+
+
+def test_selected_tasks(archives, tmp_path):
+    config = tmp_path / "analysis.yaml"
+    config.write_text(
+        "tasks:\n"
+        "  - band_gap\n"
+        "  - effective_mass\n"
+        "  - formation_energy:\n"
+        "      references: {Si: -5.4}\n"
+    )
+
+    table = _by_example(read_results(run_analysis(archives, tmp_path, config)))
+
+    assert list(table.columns) == ["archive", "analyzed", "band_gap", "mass_electron", "mass_hole", "formation_energy"]
+    assert len(table) == 6
+    band = table.loc["example02"]
+    assert band["mass_electron"] == pytest.approx(0.9449, abs=1e-4)
+    assert band["mass_hole"] == pytest.approx(0.1855, abs=1e-4)
+    assert band["formation_energy"] == pytest.approx((-12.05161 + 2 * 5.4) / 2, abs=1e-5)
+    assert np.isnan(table.loc["example06", "formation_energy"])  # No reference for Ac and Ag
+    assert np.isnan(table.loc["example03", "mass_electron"])  # No band structure
+
+    config.write_text("tasks: [colour]\n")
+    with pytest.raises(ValueError, match="colour"):
+        run_analysis(archives, tmp_path, config)
+
+
+def test_task_results_are_memoized(archives, tmp_path, monkeypatch):
+    import fairtool.analyze
+    loaded = []
+    load_archive = fairtool.analyze.load_archive
+    monkeypatch.setattr("fairtool.analyze.load_archive",
+                        lambda path, paths=None: loaded.append(paths) or load_archive(path, paths=paths))
+    archive = archives / "Basic" / "example03" / "fair_parsed_dos_si_vasprun.json"
+    config = tmp_path / "analysis.yaml"
+
+    config.write_text("tasks: [energies]\n")
+    first = read_results(run_analysis(archive, tmp_path, config))
+    assert analysis_record_path(archive).is_file()
+    assert loaded == [["run.0.calculation.-1.energy"]]
+
+    # Adding a task only computes that task, from its own paths
+    config.write_text("tasks: [energies, stress]\n")
+    second = read_results(run_analysis(archive, tmp_path, config))
+    assert loaded[1:] == [["run.0.calculation.-1.stress"]]
+    assert second["energy_total"][0] == first["energy_total"][0]
+    assert second["pressure"][0] == pytest.approx(3.222327, abs=1e-6)
+
+    # Nothing new: the archive is not opened at all
+    run_analysis(archive, tmp_path, config)
+    assert len(loaded) == 2
+
+    # New options or a changed archive invalidate the memoized results
+    config.write_text("tasks: [energies, {stress: {unused: 1}}]\n")
+    run_analysis(archive, tmp_path, config)
+    assert loaded[2:] == [["run.0.calculation.-1.stress"]]
+    archive.write_text(archive.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    run_analysis(archive, tmp_path, config)
+    assert len(loaded[3]) == 2
+
+
+def test_csv_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr("fairtool.results._import_pyarrow", lambda: None)
+    columns = {"archive": "string", "n_atoms": "int64", "energy": "float64", "converged": "bool"}
+    path = results_path(tmp_path)
+    assert path.name == "fair_analysis.csv"
+
+    with ResultsStore(path, columns, batch_size=2) as store:
+        store.append({"archive": "a", "n_atoms": 2, "energy": -1.5, "converged": True})
+        store.append({"archive": "b", "n_atoms": None, "energy": np.nan, "converged": None})
+        assert path.with_name(".fair_analysis.csv.tmp").exists() and not path.exists()
+        store.append({"archive": "c", "n_atoms": 8, "energy": -3.0, "converged": False})
+
+    table = read_results(path, column_types=columns)
+    assert table["archive"].tolist() == ["a", "b", "c"]
+    assert table["n_atoms"].tolist() == [2, pd.NA, 8]
+    assert table["converged"].tolist() == [True, pd.NA, False]
+    assert np.isnan(table["energy"][1])
+    assert read_results(path, columns=["energy"], column_types=columns).columns.tolist() == ["energy"]
+
+
+def test_failed_run_leaves_previous_table(tmp_path):
+    path = results_path(tmp_path, "csv")
+    with ResultsStore(path, {"archive": "string"}) as store:
+        store.append({"archive": "old"})
+
+    with pytest.raises(RuntimeError):
+        with ResultsStore(path, {"archive": "string"}, batch_size=1) as store:
+            store.append({"archive": "new"})
+            raise RuntimeError("interrupted")
+
+    assert read_results(path)["archive"].tolist() == ["old"]
+    assert not path.with_name(".fair_analysis.csv.tmp").exists()
+
+
+def test_parallel_run_matches_serial_run(archives, tmp_path, monkeypatch):
+    monkeypatch.setattr("fairtool.analyze.MAX_WORKER_BATCH", 1)
+    broken = archives / "Broken" / "fair_parsed_vasprun.json"
+    broken.parent.mkdir()
+    broken.write_text("{ not json", encoding="utf-8")
+
+    serial = read_results(run_analysis(archives, tmp_path / "serial", None))
+    parallel = read_results(run_analysis(archives, tmp_path / "parallel", None, jobs=3))
+
+    assert len(serial) == 6  # Only the broken archive is missing
+    pd.testing.assert_frame_equal(serial.drop(columns="analyzed"), parallel.drop(columns="analyzed"))
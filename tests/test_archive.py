@@ -0,0 +1,140 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fairtool.archive import ArchiveReader, archive_path, find_archives, load_archive, save_archive
+from fairtool.summarize import SUMMARY_PATHS, extract_context, generate_markdown, load_data, run_summarization
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+@pytest.fixture(scope="module")
+def example06_data():
+    return json.loads(EXAMPLE06.read_text(encoding="utf-8"))
+
+
+def test_msgpack_roundtrip_matches_json(tmp_path, example06_data):
+    """The binary archive reloads to the same content and is much smaller."""
+    binary = archive_path(tmp_path, "vasprun", "msgpack")
+    save_archive(example06_data, binary)
+
+    assert binary.name == "fair_parsed_vasprun.msgpack"
+    assert load_archive(binary) == example06_data
+    assert binary.stat().st_size * 3 < EXAMPLE06.stat().st_size
+
+
+def test_msgpack_keeps_scalars_and_mixed_lists(tmp_path):
+    """Only rectangular numeric lists become blobs; everything else is kept as is."""
+    data = {
+        "ints": list(range(10)),
+        "floats": [[1.5e-10, 2.0, 3.0]] * 4,
+        "ragged": [[1, 2], [3]],
+        "flags": [True, False] * 5,
+        "mixed": [1, "a", None, 2.5],
+        "empty": [],
+        "nested": {"value": -4.8e-18, "labels": ["X"] * 10},
+    }
+    path = tmp_path / "fair_parsed_small.msgpack"
+    save_archive(data, path)
+
+    loaded = load_archive(path)
+    assert loaded == data
+    assert all(isinstance(i, int) for i in loaded["ints"])
+    assert loaded["flags"][0] is True
+
+    arrays = load_archive(path, arrays=True)
+    assert isinstance(arrays["floats"], np.ndarray) and arrays["floats"].shape == (4, 3)
+    assert arrays["ints"].dtype == np.int64
+
+
+@pytest.mark.parametrize("mixed", [[1, 2.5], [1, 2.5] * 8, [[1, 2.0]] * 8, [1, True] * 8])
+def test_msgpack_roundtrip_keeps_mixed_number_types(tmp_path, mixed):
+    path = tmp_path / "fair_parsed_mixed.msgpack"
+    save_archive({"values": mixed}, path)
+
+    loaded = load_archive(path)["values"]
+    assert json.dumps(loaded) == json.dumps(mixed)
+    assert not isinstance(load_archive(path, arrays=True)["values"], np.ndarray)
+
+
+def test_find_archives_prefers_newest_format(tmp_path):
+    json_file = tmp_path / "a" / "fair_parsed_vasprun.json"
+    json_file.parent.mkdir()
+    save_archive({"run": []}, json_file)
+    binary = json_file.with_suffix(".msgpack")
+    save_archive({"run": []}, binary)
+    os.utime(json_file, (1, 1))
+    save_archive({"run": []}, tmp_path / "fair_parsed_other.json")
+    (tmp_path / "vasprun.xml").write_text("not an archive")
+
+    assert find_archives(tmp_path) == [binary, tmp_path / "fair_parsed_other.json"]
+    assert find_archives(tmp_path, recursive=False) == [tmp_path / "fair_parsed_other.json"]
+
+
+def test_summarize_reads_msgpack_archive(tmp_path, example06_data):
+    """Later stages load the binary archive transparently."""
+    binary = tmp_path / "binary" / "fair_parsed_vasprun.msgpack"
+    binary.parent.mkdir()
+    save_archive(example06_data, binary)
+
+    run_summarization(binary, binary.parent)
+    run_summarization(EXAMPLE06, tmp_path / "json")
+
+    report = (binary.parent / "fair_summarized_vasprun.md").read_text(encoding="utf-8")
+    assert "Structural information" in report
+    assert report == (tmp_path / "json" / "fair_summarized_vasprun.md").read_text(encoding="utf-8")
+
+
+# --- Path-addressed access ---
+
+def test_reader_materializes_only_requested_segments(tmp_path, example06_data):
+    binary = tmp_path / "fair_parsed_vasprun.msgpack"
+    save_archive(example06_data, binary)
+
+    with ArchiveReader(binary) as reader:
+        energy = reader.get("run.0.calculation.-1.energy")
+        decoded = len(reader._segments)
+        n_segments = len(reader._table)
+        assert reader.get("run.0.calculation.7") is None
+    assert energy == example06_data["run"][0]["calculation"][-1]["energy"]
+    assert decoded < n_segments
+
+
+@pytest.mark.parametrize("suffix", [".json", ".msgpack"])
+def test_select_returns_sparse_archive(tmp_path, example06_data, suffix):
+    path = tmp_path / f"fair_parsed_vasprun{suffix}"
+    save_archive(example06_data, path)
+
+    sparse = load_archive(path, paths=["metadata", "run.0.calculation.1.energy", "results.material.*"])
+
+    assert set(sparse) == {"metadata", "run", "results"}
+    assert sparse["metadata"] == example06_data["metadata"]
+    calculations = sparse["run"][0]["calculation"]
+    assert calculations == [{}, {"energy": example06_data["run"][0]["calculation"][1]["energy"]}, {}]
+    assert sparse["results"] == {"material": example06_data["results"]["material"]}
+
+
+@pytest.mark.parametrize("example", sorted(Path(__file__).parent.glob("VASP/*/*/fair_parsed_*.json")),
+                         ids=lambda p: p.parent.name)
+def test_summary_paths_cover_the_report(tmp_path, example):
+    """Summaries built from the sparse SUMMARY_PATHS load match those from the full archive."""
+    data = json.loads(example.read_text(encoding="utf-8"))
+    binary = tmp_path / "fair_parsed_vasprun.msgpack"
+    save_archive(data, binary)
+
+    expected = generate_markdown(extract_context(data))
+    assert generate_markdown(extract_context(load_data(binary, paths=SUMMARY_PATHS))) == expected
+
+
+def test_plain_msgpack_archives_still_load(tmp_path):
+    """Archives written as a single msgpack document (before segmentation) remain readable."""
+    import msgpack
+    path = tmp_path / "fair_parsed_old.msgpack"
+    data = {"run": [{"calculation": [{"energy": {"total": {"value": -1.0}}}]}], "metadata": {"a": 1}}
+    path.write_bytes(msgpack.packb(data, use_bin_type=True))
+
+    assert load_archive(path) == data
+    assert load_archive(path, paths=["metadata"]) == {"metadata": {"a": 1}}
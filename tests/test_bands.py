@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fairtool.bands import (
+    band_structure_from_archive, dos_from_archive, read_band_structure, sidecar_path, write_band_structure,
+)
+from fairtool.summarize import extract_context
+from fairtool.visualize import run_visualization
+
+from .conftest import VASP
+
+BAND_SI = VASP / "Basic" / "example02" / "fair_parsed_band_si_vasprun.json"
+DOS_SI = VASP / "Basic" / "example03" / "fair_parsed_dos_si_vasprun.json"
+
+
+def _load(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_band_structure_segments():
+    bands = band_structure_from_archive(_load(BAND_SI))
+
+    assert bands["source"] == "band_structure_electronic"
+    assert bands["reference"] == "vbm"
+    assert bands["band_gap"] == pytest.approx(0.5091, abs=1e-4)
+    assert bands["energies"].shape == (1, 11, 200)  # Only the bands within 10 eV of the VBM
+    assert len(bands["segments"]) == 10 and bands["segments"][-1] == [180, 200]
+    assert np.all(np.diff(bands["distances"]) >= 0)
+    assert bands["distances"][19] == bands["distances"][20]  # No length across segment boundaries
+    assert bands["ticks"][:2] == [{"distance": 0.0, "label": "Γ"},
+                                  {"distance": pytest.approx(2 * np.pi / 5.4687, rel=1e-2), "label": "X"}]
+    assert bands["energies"].max(axis=2)[0, 1] == pytest.approx(0.0)  # Top valence band touches the VBM
+
+    # A mesh (uneven k-point weights) is not a path
+    assert band_structure_from_archive(_load(DOS_SI)) is None
+
+
+def test_quantized_sidecar(tmp_path):
+    bands = band_structure_from_archive(_load(BAND_SI))
+    path = tmp_path / "band_si_bands.json"
+
+    sidecar = write_band_structure(bands, path)
+
+    assert sidecar == sidecar_path(path) and sidecar.stat().st_size == 2 * bands["energies"].size
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    assert meta["energies"]["file"] == "band_si_bands.u16"
+    assert meta["energies"]["shape"] == [1, 11, 200]
+    decoded = read_band_structure(path)
+    np.testing.assert_allclose(decoded["energies"], bands["energies"], atol=meta["energies"]["scale"] / 2 + 1e-12)
+    assert decoded["ticks"] == bands["ticks"]
+
+
+def test_dos_and_visualization_files(tmp_path):
+    dos = dos_from_archive(_load(DOS_SI), max_points=100)
+    assert len(dos["energies"]) <= 100 and len(dos["dos"]) == 1
+    assert max(dos["dos"][0]) == pytest.approx(2.46, abs=0.01)  # states/eV
+    # Same units as the DOS chart of the summary report
+    chart = extract_context(_load(DOS_SI), dos_max_points=100)["dos_chart_data"]
+    np.testing.assert_allclose(chart[:, 1], dos["dos"][0])
+
+    run_visualization(BAND_SI, tmp_path, embed=True)
+    assert read_band_structure(tmp_path / "fair_band_si_vasprun_bands.json")["energies"].shape == (1, 11, 200)
+    assert (tmp_path / "fair_band_si_vasprun_bands.u16").is_file()
+    assert json.loads((tmp_path / "fair_band_si_vasprun_dos.json").read_text(encoding="utf-8"))["reference"] == "fermi"
+
+
+def test_embedded_band_structure_references_the_sidecar(tmp_path):
+    run_visualization(BAND_SI, tmp_path, embed=True)
+
+    page = (tmp_path / "visualization_embeds.md").read_text(encoding="utf-8")
+    assert 'class="fair-bands"' in page
+    assert 'data-src="fair_band_si_vasprun_bands.json"' in page
+    assert 'data-sidecar="fair_band_si_vasprun_bands.u16"' in page
+    assert (tmp_path / "fair_band_si_vasprun_bands.u16").is_file()
+    # The site script that lazily draws it
+    charts_js = (Path(__file__).parents[1] / "documentation" / "docs" / "js" / "charts.js").read_text(encoding="utf-8")
+    assert ".fair-bands" in charts_js and "dataset.sidecar" in charts_js
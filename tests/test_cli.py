@@ -1,3 +1,5 @@
+import json
+import os
 import pytest
 from typer.testing import CliRunner
 from pathlib import Path
@@ -5,7 +7,9 @@ from unittest.mock import patch, MagicMock
 import typer
 
 # Import the main Typer application from your cli.py
-from fairtool.cli import app, _find_calc_files
+from fairtool.cli import app, _find_calc_files, _run_parse_jobs, _run_summarize_jobs
+from fairtool.prune import resolve_profile
+from fairtool.summarize import DOS_MAX_POINTS
 
 # Initialize the CliRunner
 runner = CliRunner()
@@ -200,7 +204,8 @@ def test_cli_analyze_command(mock_all_runners, setup_test_files):
     mock_analyze.assert_called_once_with(
         json_file, # Typer resolves this path
         out_dir,
-        config_file
+        config_file,
+        jobs=1
     )
 
 def test_cli_all_command(mock_all_runners, setup_test_files):
@@ -238,17 +243,190 @@ def test_cli_all_command(mock_all_runners, setup_test_files):
         
         # 1. Parse
         mock_find_calc.assert_called_once_with(test_dir, recursive=True, assume_yes=True)
-        mock_all_runners["parse"].assert_called_once_with(dummy_calc_file, out_dir, True)
+        mock_all_runners["parse"].assert_called_once_with(
+            dummy_calc_file, out_dir, True, engine="auto", archive_format="json", profile=resolve_profile("full")
+        )
         
         # 2. Analyze
-        mock_all_runners["analyze"].assert_called_once_with(out_dir, out_dir, None)
+        mock_all_runners["analyze"].assert_called_once_with(out_dir, out_dir, None, jobs=1)
         
         # 3. Summarize
         mock_find_json.assert_called_once_with(out_dir, recursive=True)
-        mock_all_runners["summarize"].assert_called_once_with(dummy_json_file, out_dir, None)
+        mock_all_runners["summarize"].assert_called_once_with(
+            dummy_json_file, out_dir, None, dos_max_points=DOS_MAX_POINTS
+        )
 
         # 4. Export
         mock_all_runners["export"].assert_called_once_with(out_dir, out_dir, "csv")
 
         # 5. Visualize
         mock_all_runners["visualize"].assert_called_once_with(out_dir, out_dir, True)
+
+
+# --- Parallel parse scheduler ---
+
+@pytest.fixture
+def fake_nomad_executable(tmp_path, monkeypatch):
+    """
+    Puts a fake `nomad` command on PATH. It prints a minimal archive and fails
+    for any input whose path contains 'bad'. Worker processes inherit PATH, so
+    this works for every multiprocessing start method.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "nomad"
+    script.write_text(
+        "#!/bin/sh\n"
+        "for last; do :; done\n"
+        "case \"$last\" in *bad*) echo 'broken file' >&2; exit 1;; esac\n"
+        "echo '{\"run\": [], \"metadata\": {\"mainfile\": \"'\"$last\"'\"}}'\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return script
+
+
+def _make_calc_tree(root: Path, names):
+    files = []
+    for name in names:
+        calc = root / name / "vasprun.xml"
+        calc.parent.mkdir(parents=True)
+        calc.write_text(f"dummy {name}")
+        files.append(calc)
+    return files
+
+
+def test_run_parse_jobs_parallel_counts_and_isolates_failures(tmp_path, fake_nomad_executable):
+    """
+    A pool of workers parses every file, keeps going after a failure and
+    reports accurate success/skipped/failed counters.
+    """
+    files = _make_calc_tree(tmp_path / "calcs", ["a", "b", "bad", "c"])
+
+    counts = _run_parse_jobs(files, None, False, "subprocess", jobs=3)
+    assert counts == (3, 0, 1)
+    for name in ("a", "b", "c"):
+        assert (tmp_path / "calcs" / name / "fair_parsed_vasprun.json").exists()
+    assert not (tmp_path / "calcs" / "bad" / "fair_parsed_vasprun.json").exists()
+
+
+def test_run_parse_jobs_parallel_matches_serial(tmp_path, fake_nomad_executable):
+    """Parallel runs place outputs exactly where a serial run does, with the same content."""
+    serial_root = tmp_path / "serial"
+    parallel_root = tmp_path / "parallel"
+    serial_files = _make_calc_tree(serial_root, ["x", "y", "z"])
+    parallel_files = _make_calc_tree(parallel_root, ["x", "y", "z"])
+
+    assert _run_parse_jobs(serial_files, serial_root / "out", True, "subprocess", jobs=1) == (3, 0, 0)
+    assert _run_parse_jobs(parallel_files, parallel_root / "out", True, "subprocess", jobs=3) == (3, 0, 0)
+
+    def load(root):
+        produced = json.loads((root / "out" / "fair_parsed_vasprun.json").read_text(encoding="utf-8"))
+        produced["metadata"].pop("fair_parse_time")
+        return produced
+
+    # All three share one output directory, so the last file in order wins in both modes
+    assert load(parallel_root)["metadata"]["mainfile"].endswith("z/vasprun.xml")
+    assert load(parallel_root)["metadata"]["mainfile"].replace(str(parallel_root), "") == \
+        load(serial_root)["metadata"]["mainfile"].replace(str(serial_root), "")
+
+
+
+def test_run_parse_jobs_parallel_with_single_output_dir(tmp_path, monkeypatch):
+    """Files sharing one output directory still spread over the pool; the structure of the last file wins."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    workers_log = tmp_path / "workers.log"
+    script = bin_dir / "nomad"
+    # One atom of the element named by the calculation directory; logs the worker pid
+    script.write_text(
+        "#!/bin/sh\n"
+        "for last; do :; done\n"
+        f"echo $PPID >> '{workers_log}'\n"
+        "sleep 0.3\n"
+        "element=$(basename \"$(dirname \"$last\")\")\n"
+        "echo '{\"run\": [{\"system\": [{\"atoms\": {\"labels\": [\"'$element'\"], "
+        "\"positions\": [[0, 0, 0]], \"lattice_vectors\": [[4e-10, 0, 0], [0, 4e-10, 0], [0, 0, 4e-10]]}}]}], "
+        "\"metadata\": {\"mainfile\": \"'\"$last\"'\"}}'\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+
+    files = []
+    for element in ("Na", "K", "Li", "Cs"):
+        calc = tmp_path / "calcs" / element / f"vasprun_{element}.xml"
+        calc.parent.mkdir(parents=True)
+        calc.write_text(f"dummy {element}")
+        files.append(calc)
+    out = tmp_path / "out"
+
+    assert _run_parse_jobs(files, out, True, "subprocess", jobs=4) == (4, 0, 0)
+
+    assert len(set(workers_log.read_text().split())) > 1
+    assert sorted(p.name for p in out.glob("fair_parsed_*.json")) == \
+        [f"fair_parsed_vasprun_{element}.json" for element in ("Cs", "K", "Li", "Na")]
+    structure = json.loads((out / "fair-structure.json").read_text(encoding="utf-8"))
+    assert structure["formula"] == "Cs"
+
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+def _make_archive_tree(root, names):
+    archives = []
+    for name in names:
+        archive = root / name / "fair_parsed_vasprun.json"
+        archive.parent.mkdir(parents=True)
+        archive.write_bytes(b"{}" if "bad" in name else EXAMPLE06.read_bytes())
+        archives.append(archive)
+    return archives
+
+
+def test_run_summarize_jobs_parallel_matches_serial(tmp_path):
+    """A worker pool writes the same reports as a serial run and counts failures and skips."""
+    serial = _make_archive_tree(tmp_path / "serial", ["a", "b", "bad"])
+    parallel = _make_archive_tree(tmp_path / "parallel", ["a", "b", "bad"])
+
+    assert _run_summarize_jobs(serial, None, False, jobs=1) == (2, 0, 1)
+    assert _run_summarize_jobs(parallel, None, False, jobs=3) == (2, 0, 1)
+
+    for name in ("a", "b"):
+        for produced in ("fair_summarized_vasprun.md", "fair_summarized_vasprun.scf.bin"):
+            assert (tmp_path / "parallel" / name / produced).read_bytes() == \
+                (tmp_path / "serial" / name / produced).read_bytes()
+    assert not (tmp_path / "parallel" / "bad" / "fair_summarized_vasprun.md").exists()
+
+    # Existing reports are skipped unless forced
+    assert _run_summarize_jobs(parallel, None, False, jobs=3) == (0, 2, 1)
+    assert _run_summarize_jobs(parallel[:2], None, True, jobs=2) == (2, 0, 0)
+
+
+def test_run_summarize_jobs_regenerates_only_stale_reports(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    archive = _make_archive_tree(tmp_path, ["calc"])[0]
+    report = tmp_path / "calc" / "fair_summarized_vasprun.md"
+    template = tmp_path / "layout.md.j2"
+    template.write_text("{{ title }}\n", encoding="utf-8")
+
+    assert _run_summarize_jobs([archive], None, False) == (1, 0, 0)
+    assert _run_summarize_jobs([archive], None, False) == (0, 1, 0)
+
+    # Same content with a new timestamp (e.g. copied back from a backup) is still current
+    os.utime(archive, ns=(0, 10**9))
+    assert _run_summarize_jobs([archive], None, False) == (0, 1, 0)
+
+    # A re-parse that changed the archive
+    data = json.loads(archive.read_text(encoding="utf-8"))
+    data["metadata"]["entry_name"] = "Relabelled"
+    archive.write_text(json.dumps(data), encoding="utf-8")
+    assert _run_summarize_jobs([archive], None, False) == (1, 0, 0)
+    assert "Relabelled" in report.read_text(encoding="utf-8")
+
+    # Other template or options, or a missing chart file
+    assert _run_summarize_jobs([archive], None, False, template=str(template)) == (1, 0, 0)
+    assert _run_summarize_jobs([archive], None, False, template=str(template)) == (0, 1, 0)
+    template.write_text("{{ title }}!\n", encoding="utf-8")
+    assert _run_summarize_jobs([archive], None, False, template=str(template)) == (1, 0, 0)
+    assert _run_summarize_jobs([archive], None, False, dos_max_points=10) == (1, 0, 0)
+    (tmp_path / "calc" / "fair_summarized_vasprun.scf.bin").unlink()
+    assert _run_summarize_jobs([archive], None, False, dos_max_points=10) == (1, 0, 0)
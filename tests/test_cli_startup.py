@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Cold start of `fair --version` (interpreter included). The eager imports of
+# pymatgen, pandas and pint alone used to take about a second.
+STARTUP_BUDGET_S = 0.8
+HEAVY_MODULES = ("numpy", "pandas", "pymatgen", "pint", "msgpack", "nomad")
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+
+@pytest.mark.parametrize("argv", [["--version"], ["about"], ["--help"]])
+def test_light_commands_skip_heavy_imports(argv):
+    code = (
+        "import sys\n"
+        "from fairtool.cli import app\n"
+        "try:\n"
+        f"    app({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print('LOADED', [m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    assert "LOADED []" in _run(code).stdout
+
+
+def test_subcommand_module_loads_on_first_use():
+    code = (
+        "import sys\n"
+        "from fairtool import cli\n"
+        "before = 'pandas' in sys.modules\n"
+        "cli.export_module.run_export\n"
+        "print(before, 'pandas' in sys.modules)\n"
+    )
+    assert _run(code).stdout.split() == ["False", "True"]
+
+
+def test_lazy_module_can_be_loaded_explicitly():
+    code = (
+        "import sys\n"
+        "from fairtool import cli\n"
+        "before = 'pandas' in sys.modules\n"
+        "cli._load_now(cli.export_module)\n"
+        "print(before, 'pandas' in sys.modules)\n"
+    )
+    assert _run(code).stdout.split() == ["False", "True"]
+
+
+@pytest.mark.skipif(not os.environ.get("FAIR_TIMING_TESTS"),
+                    reason="wall-clock budget; set FAIR_TIMING_TESTS=1 to run it on a quiet machine")
+def test_version_cold_start_time():
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "fairtool", "--version"], capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < STARTUP_BUDGET_S, f"fair --version took {min(timings):.2f} s"
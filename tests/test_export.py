@@ -0,0 +1,190 @@
+import gzip
+import json
+
+import pandas as pd
+import pytest
+import yaml
+
+from fairtool.analyze import run_analysis
+from fairtool.export import Exporter, benchmark_export, iter_records, load_result_files, run_export
+from fairtool.query import parse_where
+from fairtool.results import read_results
+
+
+@pytest.fixture
+def analyzed(archives, tmp_path):
+    """A directory holding the results table of the example archives."""
+    out = tmp_path / "analysis"
+    run_analysis(archives, out, None)
+    return out
+
+
+def test_records_are_streamed_in_chunks(analyzed, archives):
+    chunks = list(iter_records(analyzed, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+
+    # Without a results table, the rows come straight from the archives
+    from_archives = pd.concat(list(iter_records(archives, chunk_size=4)), ignore_index=True)
+    pd.testing.assert_frame_equal(from_archives.drop(columns="analyzed"),
+                                  pd.concat(chunks, ignore_index=True).drop(columns="analyzed"),
+                                  check_dtype=False)
+
+
+def test_line_and_text_formats(analyzed, tmp_path):
+    table = read_results(next(analyzed.glob("fair_analysis.*")))
+
+    path = run_export(analyzed, tmp_path / "out", "jsonl", compression="gzip", chunk_size=4)
+    assert path.name == "exported_data.jsonl.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["archive"] for r in records] == table["archive"].tolist()
+    assert records[0]["energy_total"] is None  # NaN -> null
+
+    path = run_export(analyzed, tmp_path / "out", "json_summary", chunk_size=4)
+    assert json.loads(path.read_text(encoding="utf-8")) == records
+
+    path = run_export(analyzed, tmp_path / "out", "yaml", chunk_size=4)
+    assert yaml.safe_load(path.read_text(encoding="utf-8")) == records
+
+    path = run_export(analyzed, tmp_path / "out", "csv", chunk_size=4)
+    assert pd.read_csv(path)["formula"].tolist() == table["formula"].tolist()
+
+
+def test_columnar_formats(analyzed, tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+    table = read_results(next(analyzed.glob("fair_analysis.*")))
+
+    path = run_export(analyzed, tmp_path, "parquet", compression="zstd", chunk_size=4)
+    parquet = pyarrow.parquet.ParquetFile(path)
+    assert parquet.num_row_groups == 2
+    assert parquet.metadata.row_group(0).column(0).compression == "ZSTD"
+    pd.testing.assert_frame_equal(read_results(path), table)
+
+    path = run_export(analyzed, tmp_path, "arrow", compression="lz4", chunk_size=4)
+    with pyarrow.ipc.open_file(path) as reader:
+        assert reader.num_record_batches == 2
+        assert reader.read_all().column("formula").to_pylist() == table["formula"].tolist()
+
+
+def test_errors(tmp_path, analyzed):
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    assert run_export(empty, tmp_path / "out2", "jsonl") is None
+    assert not (tmp_path / "out2" / "exported_data.jsonl").exists()
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        run_export(analyzed, tmp_path, "csv", compression="snappy")
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        run_export(analyzed, tmp_path, "xlsx")
+
+
+def test_exporter_subclass_must_implement_writer(tmp_path):
+    class HalfExporter(Exporter):
+        extension = ".half"
+
+        def _write(self, chunk):
+            pass
+
+    with pytest.raises(TypeError, match="_close"):
+        HalfExporter(tmp_path / "out.half")
+
+
+def test_benchmark(analyzed):
+    results = benchmark_export(analyzed, formats=["csv", "jsonl"])
+    assert [(r["format"], r["compression"]) for r in results] == [
+        (fmt, codec) for fmt in ("csv", "jsonl") for codec in ("none", "gzip", "bz2", "xz")
+    ]
+    assert all(r["rows"] == 6 and r["bytes"] > 0 for r in results)
+
+
+@pytest.fixture
+def result_files(tmp_path):
+    """A directory of per-calculation result files, as written by older `fair analyze` runs."""
+    root = tmp_path / "results"
+    for i in range(12):
+        calc = root / f"calc{i:02d}"
+        calc.mkdir(parents=True)
+        record = {"formula": "Si2", "energy_total": -10.0 - i, "converged": i % 2 == 0}
+        if i % 3:
+            (calc / "vasprun_analysis.yaml").write_text(yaml.safe_dump(record), encoding="utf-8")
+        else:
+            (calc / "vasprun_analysis.json").write_text(json.dumps(record), encoding="utf-8")
+    (root / "calc05" / "vasprun_analysis.yaml").write_text("- not\n- a mapping\n", encoding="utf-8")
+    return root
+
+
+def test_per_calculation_result_files(result_files, tmp_path, monkeypatch):
+    monkeypatch.setattr("fairtool.export.MAX_LOAD_BATCH", 2)
+    paths = sorted(result_files.rglob("*_analysis.*"))
+
+    serial = load_result_files(paths)
+    parallel = load_result_files(paths, jobs=3)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 11  # calc05 is not a mapping
+    assert serial["energy_total"].tolist() == [-10.0 - i for i in range(12) if i != 5]
+    assert serial["source"][0].endswith("calc00/vasprun_analysis.json")
+
+    path = run_export(result_files, tmp_path / "out", "csv", chunk_size=4, jobs=2)
+    exported = pd.read_csv(path)
+    assert exported.columns.tolist() == ["source", "formula", "energy_total", "converged"]
+    assert exported["converged"].tolist() == serial["converged"].tolist()
+
+
+def test_archives_analyzed_in_parallel(archives):
+    serial = pd.concat(list(iter_records(archives)), ignore_index=True)
+    parallel = pd.concat(list(iter_records(archives, jobs=2)), ignore_index=True)
+    pd.testing.assert_frame_equal(serial.drop(columns="analyzed"), parallel.drop(columns="analyzed"))
+
+
+def test_projection_and_filter(analyzed, archives, tmp_path):
+    table = read_results(next(analyzed.glob("fair_analysis.*")))
+    expected = table.loc[table["band_gap"] > 1, ["formula", "band_gap"]].reset_index(drop=True)
+    where = "band_gap > 1 and not formula in ['Xe']"
+
+    path = run_export(analyzed, tmp_path / "out", "csv", columns=["formula", "band_gap"], where=where)
+    exported = pd.read_csv(path)
+    assert exported.columns.tolist() == ["formula", "band_gap"]
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+    # The same selection from a CSV table and straight from the archives
+    csv_table = analyzed / "fair_analysis.csv"
+    table.to_csv(csv_table, index=False)
+    from_csv = pd.concat(list(iter_records(csv_table, chunk_size=2, columns=["formula", "band_gap"],
+                                           where=parse_where(where))), ignore_index=True)
+    pd.testing.assert_frame_equal(from_csv, expected, check_dtype=False)
+    from_archives = pd.concat(list(iter_records(archives, columns=["formula", "band_gap"],
+                                                where=parse_where(where))), ignore_index=True)
+    pd.testing.assert_frame_equal(from_archives, expected, check_dtype=False)
+
+    with pytest.raises(ValueError, match="colour"):
+        run_export(analyzed, tmp_path / "out", "csv", where="colour == 'red'")
+    with pytest.raises(ValueError, match="table formats"):
+        run_export(archives, tmp_path / "out", "extxyz", columns=["formula"])
+
+
+def test_filter_is_pushed_into_parquet_scans(analyzed, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset
+    scans = []
+    open_dataset = pyarrow.dataset.dataset
+
+    class RecordingDataset:
+        def __init__(self, *args, **kwargs):
+            self._dataset = open_dataset(*args, **kwargs)
+
+        def to_batches(self, **kwargs):
+            scans.append(kwargs)
+            return self._dataset.to_batches(**kwargs)
+
+    monkeypatch.setattr(pyarrow.dataset, "dataset", RecordingDataset)
+
+    path = run_export(analyzed, tmp_path, "jsonl", columns=["formula"], where="scf_converged and n_atoms >= 2")
+
+    assert [scan["columns"] for scan in scans] == [["formula"]]
+    assert "scf_converged" in str(scans[0]["filter"])
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    table = read_results(next(analyzed.glob("fair_analysis.parquet")))
+    assert records == [{"formula": formula} for formula in
+                       table.loc[table["scf_converged"].fillna(False) & (table["n_atoms"] >= 2), "formula"]]
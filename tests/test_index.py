@@ -0,0 +1,114 @@
+import io
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from fairtool.cli import _run_parse_jobs
+from fairtool.index import INDEX_FILENAME, ProjectIndex, find_parsed_archives, rebuild_index
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+@pytest.fixture
+def fake_nomad_popen(monkeypatch):
+    """Mocks `nomad parse`: prints the example06 archive, fails for paths containing 'bad'."""
+    archive = EXAMPLE06.read_bytes()
+
+    def popen(command, stdout=None, stderr=None):
+        proc = MagicMock()
+        failed = "bad" in command[-1]
+        proc.stdout = io.BytesIO(b"" if failed else archive)
+        proc.wait.return_value = 1 if failed else 0
+        return proc
+    monkeypatch.setattr("subprocess.Popen", popen)
+
+
+@pytest.fixture
+def project(tmp_path, fake_nomad_popen):
+    """Parses a small tree of calculations and returns (root, index path)."""
+    root = tmp_path / "project"
+    files = []
+    for name in ("a", "b/c", "bad"):
+        calc = root / name / "vasprun.xml"
+        calc.parent.mkdir(parents=True)
+        calc.write_text(f"dummy {name}")
+        files.append(calc)
+    index_path = root / INDEX_FILENAME
+    assert _run_parse_jobs(files, None, False, "subprocess", index_path=index_path) == (2, 0, 1)
+    return root, index_path
+
+
+def test_parse_records_every_outcome(project):
+    root, index_path = project
+
+    with ProjectIndex(index_path) as index:
+        rows = {row["input_path"].parent.name: row for row in index.rows()}
+
+    assert rows["a"]["status"] == "parsed"
+    assert rows["a"]["archive_path"] == (root / "a" / "fair_parsed_vasprun.json").resolve()
+    assert rows["a"]["formula"] == "AcAg"
+    assert rows["a"]["n_atoms"] == 2
+    assert rows["a"]["energy_total"] == pytest.approx(-1.1437045328043087e-18)
+    assert len(rows["a"]["input_sha256"]) == 64
+    assert rows["bad"]["status"] == "failed"
+    assert "returned non-zero exit status 1" in rows["bad"]["error"]
+
+
+def test_skips_are_recorded(project):
+    root, index_path = project
+    files = [root / "a" / "vasprun.xml"]
+
+    assert _run_parse_jobs(files, None, False, "subprocess", index_path=index_path) == (0, 1, 0)
+
+    with ProjectIndex(index_path) as index:
+        row = [r for r in index.rows() if r["input_path"].parent.name == "a"][0]
+    assert row["status"] == "skipped"
+    assert row["formula"] == "AcAg"
+
+
+def test_find_parsed_archives_queries_the_index(project):
+    root, _ = project
+    archives = find_parsed_archives(root)
+    assert archives == [
+        (root / "a" / "fair_parsed_vasprun.json").resolve(),
+        (root / "b" / "c" / "fair_parsed_vasprun.json").resolve(),
+    ]
+    assert find_parsed_archives(root / "b") == [(root / "b" / "c" / "fair_parsed_vasprun.json").resolve()]
+    assert find_parsed_archives(root / "b", recursive=False) == []
+
+
+def test_find_parsed_archives_includes_unindexed_archives(project, caplog):
+    root, _ = project
+    # Next to indexed archives, and in a directory the index has no row for
+    beside = root / "a" / "fair_parsed_copied.json"
+    stray = root / "stray" / "fair_parsed_other.json"
+    stray.parent.mkdir()
+    for archive in (beside, stray):
+        archive.write_text(json.dumps({"run": []}), encoding="utf-8")
+    # The failed parse left an old archive behind; the index knows it failed
+    (root / "bad" / "fair_parsed_vasprun.json").write_text(json.dumps({"run": []}), encoding="utf-8")
+
+    with caplog.at_level("WARNING", logger="fairtool"):
+        archives = find_parsed_archives(root)
+    assert archives == sorted([
+        beside.resolve(),
+        (root / "a" / "fair_parsed_vasprun.json").resolve(),
+        (root / "b" / "c" / "fair_parsed_vasprun.json").resolve(),
+        stray.resolve(),
+    ])
+    assert "2 archive(s)" in caplog.text and "fair index --rebuild" in caplog.text
+    assert find_parsed_archives(root / "stray") == [stray.resolve()]
+
+
+def test_rebuild_index_from_the_tree(project):
+    root, index_path = project
+    index_path.unlink()
+    assert len(find_parsed_archives(root)) == 2  # Falls back to scanning
+
+    assert rebuild_index(root) == 2
+    with ProjectIndex(index_path) as index:
+        rows = index.rows()
+    assert {row["input_path"].parent.name for row in rows} == {"a", "c"}
+    assert all(row["formula"] == "AcAg" for row in rows)
@@ -1,3 +1,4 @@
+import io
 import json
 import time
 from pathlib import Path
@@ -10,15 +11,16 @@ from typer.testing import CliRunner
 # Import run_parser from parse
 from fairtool.cli import app, parse as parse_cmd, _find_calc_files
 from fairtool.parse import run_parser
+from fairtool.prune import resolve_profile
 
 runner = CliRunner()
 
 
 def make_nomad_process(stdout_text: str):
-    """Helper to create a mock subprocess.run result."""
+    """Helper to create a mock subprocess.Popen result streaming stdout_text."""
     proc = MagicMock()
-    proc.stdout = stdout_text
-    proc.stderr = ""
+    proc.stdout = io.BytesIO(stdout_text.encode("utf-8"))
+    proc.wait.return_value = 0
     proc.returncode = 0
     return proc
 
@@ -80,13 +82,13 @@ def test_run_parser_writes_fair_parse_time_and_filters(tmp_path, monkeypatch):
     })
 
     fake_proc = make_nomad_process(fake_nomad_json)
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: fake_proc)
+    monkeypatch.setattr("subprocess.Popen", lambda *a, **k: fake_proc)
 
     # --- [FIX] Capture current time BEFORE running ---
     start_time = time.time()
 
     # Call run_parser directly, force=True to bypass skip logic
-    skipped = run_parser(input_file, output_dir, force=True)
+    skipped = run_parser(input_file, output_dir, force=True, engine="subprocess")
 
     # It should not have skipped
     assert not skipped
@@ -111,34 +113,33 @@ def test_run_parser_writes_fair_parse_time_and_filters(tmp_path, monkeypatch):
 
 
 # --- [FIXED TEST] Logic is now in run_parser ---
-@patch("subprocess.run") # We don't want subprocess to run at all
-def test_run_parser_skips_when_unchanged(mock_subprocess_run, tmp_path):
+def test_run_parser_skips_when_unchanged(tmp_path, monkeypatch):
     """
     Tests that run_parser (the core function) *itself*
-    correctly skips parsing when force=False and mtime is older.
+    correctly skips parsing when force=False and the input is unchanged
+    since the parse recorded in the cache.
     """
     # Create a dummy input file
     input_file = tmp_path / "vasprun2.xml"
     input_file.write_text("content")
-    file_mtime = input_file.stat().st_mtime
     
     output_dir = tmp_path / "out2"
     output_dir.mkdir()
 
-    # Create an existing parsed JSON with fair_parse_time >= file mtime
-    json_file = output_dir / f"fair_parsed_{input_file.stem}.json"
-    # Save a parse time that is *newer* than the file
-    json_content = {"metadata": {"fair_parse_time": file_mtime + 10}}
-    json_file.write_text(json.dumps(json_content), encoding='utf-8')
+    fake_proc = make_nomad_process(json.dumps({"metadata": {}, "run": []}))
+    monkeypatch.setattr("subprocess.Popen", lambda *a, **k: fake_proc)
+    assert run_parser(input_file, output_dir, force=False, engine="subprocess") is False
 
-    # Call run_parser directly, with force=False
-    skipped = run_parser(input_file, output_dir, force=False)
+    # The second call must be answered from the cache alone
+    mock_popen = MagicMock(side_effect=AssertionError("nomad must not run"))
+    monkeypatch.setattr("subprocess.Popen", mock_popen)
+    skipped = run_parser(input_file, output_dir, force=False, engine="subprocess")
 
     # --- [FIX] Assert that run_parser *returned True* (indicating a skip) ---
     assert skipped
     
     # And double-check it didn't try to run nomad
-    mock_subprocess_run.assert_not_called()
+    mock_popen.assert_not_called()
 
 
 # --- [FIXED TEST] Logic is in run_parser, and CLI args changed ---
@@ -174,5 +175,7 @@ def test_cli_calls_parser_when_missing_fair_parse_time(mock_run_parser, tmp_path
     # The CLI's job is just to find files and call the parser.
     # The skip logic is inside run_parser, so the CLI *will* call it.
     # The `force` arg (False) is passed from the CLI to run_parser.
-    mock_run_parser.assert_called_once_with(input_file, output_dir, False)
+    mock_run_parser.assert_called_once_with(
+        input_file, output_dir, False, engine="auto", archive_format="json", profile=resolve_profile("full")
+    )
 
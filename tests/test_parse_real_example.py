@@ -1,13 +1,28 @@
+import io
 import json
 import copy
 from pathlib import Path
 from unittest.mock import MagicMock, patch
+import os
 import subprocess
 import time
 
 import pytest
 
-from fairtool.parse import run_parser
+from fairtool.parse import run_parser, _iter_json_documents
+
+
+def make_nomad_popen(stdout_text: str, returncode: int = 0, stderr_text: str = ""):
+    """Helper to create a mock subprocess.Popen result streaming stdout_text."""
+    proc = MagicMock()
+    proc.stdout = io.BytesIO(stdout_text.encode("utf-8"))
+    proc.wait.return_value = returncode
+    proc.returncode = returncode
+
+    def popen(*args, **kwargs):
+        kwargs["stderr"].write(stderr_text.encode("utf-8"))
+        return proc
+    return popen
 
 # --- [NEW] Session-scoped fixture to load the reference data once ---
 @pytest.fixture(scope="session")
@@ -40,7 +55,7 @@ def test_parse_vasprun_example_matches_reference(tmp_path, monkeypatch, referenc
     # This mock represents the *final merged* object after the `while` loop in `run_parser`.
     mock_output_data = copy.deepcopy(reference_data)
 
-    # 3. Mock the subprocess.run call to return the merged data structure
+    # 3. Mock the subprocess call to return the merged data structure
     #    that `run_parser` expects *before* it starts deleting keys.
     
     # Add top-level keys that `run_parser` expects to delete:
@@ -67,9 +82,7 @@ def test_parse_vasprun_example_matches_reference(tmp_path, monkeypatch, referenc
     mock_output_data['metadata']['section_defs'] = ['dummy_sd']
 
 
-    fake_proc = MagicMock()
-    fake_proc.stdout = json.dumps(mock_output_data)
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: fake_proc)
+    monkeypatch.setattr("subprocess.Popen", make_nomad_popen(json.dumps(mock_output_data)))
 
     out_dir = tmp_path / "out"
     out_dir.mkdir()
@@ -77,7 +90,7 @@ def test_parse_vasprun_example_matches_reference(tmp_path, monkeypatch, referenc
     # 4. Run the parser
     # This will delete the extra keys we added to `mock_output_data`
     # and add `fair_parse_time`.
-    run_parser(input_file, out_dir, force=True)
+    run_parser(input_file, out_dir, force=True, engine="subprocess")
 
     # 5. Load the file produced by the parser
     produced_file = out_dir / f"fair_parsed_{input_file.stem}.json"
@@ -165,22 +178,19 @@ def test_parser_handles_parse_failure(tmp_path, monkeypatch, caplog):
     input_file = tmp_path / "vasprun_bad.xml"
     input_file.write_text("<bad>content</bad>")
 
-    # 2. Mock the subprocess.run to raise an error
+    # 2. Mock the subprocess to exit with an error
     monkeypatch.setattr(
-        "subprocess.run",
-        MagicMock(
-            side_effect=subprocess.CalledProcessError(
-                returncode=1, cmd="nomad parse", stderr="File is not valid"
-            )
-        )
+        "subprocess.Popen",
+        make_nomad_popen("", returncode=1, stderr_text="File is not valid")
     )
 
     out_dir = tmp_path / "out"
     out_dir.mkdir()
 
     # 3. Run the parser and check that it raises the error
-    with pytest.raises(subprocess.CalledProcessError):
-        run_parser(input_file, out_dir, force=True)
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        run_parser(input_file, out_dir, force=True, engine="subprocess")
+    assert excinfo.value.stderr == "File is not valid"
 
     # 4. Check that the error was logged (optional)
     assert "NOMAD parsing command failed" in caplog.text    
@@ -199,15 +209,11 @@ def test_parser_handles_empty_nomad_output(tmp_path, monkeypatch, caplog, force_
     out_dir = tmp_path / "out"
     out_dir.mkdir()
 
-    # Mock subprocess.run to return an empty string
-    fake_proc = MagicMock()
-    fake_proc.stdout = ""
-    fake_proc.stderr = ""
-    fake_proc.returncode = 0
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: fake_proc)
+    # Mock the subprocess to return an empty string
+    monkeypatch.setattr("subprocess.Popen", make_nomad_popen(""))
 
     # Run parser
-    skipped = run_parser(input_file, out_dir, force=force_flag)
+    skipped = run_parser(input_file, out_dir, force=force_flag, engine="subprocess")
 
     # It should not have skipped, but it also shouldn't crash
     assert not skipped
@@ -230,54 +236,87 @@ def test_parser_handles_invalid_json_output(tmp_path, monkeypatch, caplog):
     out_dir = tmp_path / "out"
     out_dir.mkdir()
 
-    # Mock subprocess.run to return invalid JSON
-    fake_proc = MagicMock()
-    fake_proc.stdout = "This is not JSON { not: valid }"
-    fake_proc.stderr = ""
-    fake_proc.returncode = 0
-    monkeypatch.setattr("subprocess.run", lambda *a, **k: fake_proc)
+    # Mock the subprocess to return invalid JSON
+    monkeypatch.setattr("subprocess.Popen", make_nomad_popen("This is not JSON { not: valid }"))
 
     # Run parser and expect it to fail
     with pytest.raises(json.JSONDecodeError):
-        run_parser(input_file, out_dir, force=True)
+        run_parser(input_file, out_dir, force=True, engine="subprocess")
 
     # Check that the error was logged
     assert "Failed to decode JSON output" in caplog.text
 
 
 # --- [NEW TEST 3] ---
-@patch("subprocess.run")
-def test_run_parser_skips_when_unchanged(mock_subprocess_run, tmp_path):
+def _parse_counting(monkeypatch, input_file, output_dir, force=False):
+    """Runs run_parser with a mocked `nomad parse` and returns (skipped, number of nomad runs)."""
+    calls = []
+
+    def popen(*args, **kwargs):
+        calls.append(args)
+        return make_nomad_popen(json.dumps({"metadata": {}, "run": []}))(*args, **kwargs)
+    monkeypatch.setattr("subprocess.Popen", popen)
+    skipped = run_parser(input_file, output_dir, force=force, engine="subprocess")
+    return skipped, len(calls)
+
+
+def test_run_parser_skips_when_unchanged(tmp_path, monkeypatch):
     """
     Tests that run_parser (the core function) *itself*
-    correctly skips parsing when force=False and mtime is older.
+    skips on identical content, whatever the timestamps say.
     (Moved from test_parse_fairtime.py)
     """
     input_file = tmp_path / "vasprun_unchanged.xml"
     input_file.write_text("content")
-    file_mtime = input_file.stat().st_mtime
-    
     output_dir = tmp_path / "out"
     output_dir.mkdir()
 
-    # Create an existing parsed JSON with fair_parse_time >= file mtime
-    json_file = output_dir / f"fair_parsed_{input_file.stem}.json"
-    json_content = {"metadata": {"fair_parse_time": file_mtime + 10}}
-    json_file.write_text(json.dumps(json_content), encoding='utf-8')
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
+    assert (output_dir / ".fair_cache" / "fair_parsed_vasprun_unchanged.json.record").exists()
 
-    # Call run_parser directly, with force=False
-    skipped = run_parser(input_file, output_dir, force=False)
+    # A copy with a new (even future) timestamp but the same bytes is not parsed again
+    future = time.time() + 3600
+    os.utime(input_file, (future, future))
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (True, 0)
 
-    # Assert that run_parser *returned True* (indicating a skip)
-    assert skipped
-    
-    # And double-check it didn't try to run nomad
-    mock_subprocess_run.assert_not_called()
+    # --force always parses
+    assert _parse_counting(monkeypatch, input_file, output_dir, force=True) == (False, 1)
+
+
+def test_run_parser_reparses_changed_content_with_old_mtime(tmp_path, monkeypatch):
+    """`cp -p`/rsync can give modified content an old timestamp; the hash still catches it."""
+    input_file = tmp_path / "vasprun_copied.xml"
+    input_file.write_text("content A")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
+
+    input_file.write_text("content B")
+    os.utime(input_file, (1, 1))
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (True, 0)
+
+
+def test_run_parser_reparses_on_version_or_option_change(tmp_path, monkeypatch):
+    import fairtool.cache as cache_module
+    input_file = tmp_path / "vasprun_versions.xml"
+    input_file.write_text("content")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
+
+    monkeypatch.setattr(cache_module, "tool_versions", lambda: {"fairtool": "99.0", "nomad-lab": "1.0"})
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (True, 0)
+
+    # A missing output archive is regenerated even with a valid record
+    (output_dir / "fair_parsed_vasprun_versions.json").unlink()
+    assert _parse_counting(monkeypatch, input_file, output_dir) == (False, 1)
 
 
 # --- [NEW TEST 4] ---
-@patch("subprocess.run")
-def test_run_parser_reparses_when_fair_parse_time_is_missing(mock_subprocess_run, tmp_path):
+@patch("subprocess.Popen")
+def test_run_parser_reparses_when_fair_parse_time_is_missing(mock_popen, tmp_path):
     """
     Tests that run_parser re-parses if the existing JSON
     is missing the 'fair_parse_time' key.
@@ -295,25 +334,21 @@ def test_run_parser_reparses_when_fair_parse_time_is_missing(mock_subprocess_run
     json_file.write_text(json.dumps(json_content), encoding='utf-8')
 
     # Mock the subprocess to return minimal valid output
-    fake_proc = MagicMock()
-    fake_proc.stdout = json.dumps({"metadata": {}, "run": []})
-    fake_proc.stderr = ""
-    fake_proc.returncode = 0
-    mock_subprocess_run.return_value = fake_proc
+    mock_popen.side_effect = make_nomad_popen(json.dumps({"metadata": {}, "run": []}))
 
     # Call run_parser directly, with force=False
-    skipped = run_parser(input_file, output_dir, force=False)
+    skipped = run_parser(input_file, output_dir, force=False, engine="subprocess")
 
     # Assert that run_parser *did not skip*
     assert not skipped
     
     # And check that it *did* call nomad
-    mock_subprocess_run.assert_called_once()
+    mock_popen.assert_called_once()
 
 
 # --- [NEW TEST 5] ---
-@patch("subprocess.run")
-def test_run_parser_reparses_when_file_is_newer(mock_subprocess_run, tmp_path):
+@patch("subprocess.Popen")
+def test_run_parser_reparses_when_file_is_newer(mock_popen, tmp_path):
     """
     Tests that run_parser re-parses if the input file
     is newer than the existing JSON's 'fair_parse_time'.
@@ -334,18 +369,134 @@ def test_run_parser_reparses_when_file_is_newer(mock_subprocess_run, tmp_path):
     assert input_file.stat().st_mtime > old_time
 
     # Mock the subprocess to return minimal valid output
-    fake_proc = MagicMock()
-    fake_proc.stdout = json.dumps({"metadata": {}, "run": []})
-    fake_proc.stderr = ""
-    fake_proc.returncode = 0
-    mock_subprocess_run.return_value = fake_proc
+    mock_popen.side_effect = make_nomad_popen(json.dumps({"metadata": {}, "run": []}))
 
     # Call run_parser directly, with force=False
-    skipped = run_parser(input_file, output_dir, force=False)
+    skipped = run_parser(input_file, output_dir, force=False, engine="subprocess")
 
     # Assert that run_parser *did not skip*
     assert not skipped
     
     # And check that it *did* call nomad
-    mock_subprocess_run.assert_called_once()
+    mock_popen.assert_called_once()
+
+
+
+# --- In-process engine ---
+
+class _FakeSection:
+    """Minimal stand-in for a NOMAD metainfo section exposing m_to_dict()."""
+    def __init__(self, data, metadata=None):
+        self._data = data
+        self.metadata = metadata
+
+    def m_to_dict(self):
+        return copy.deepcopy(self._data)
+
 
+@pytest.fixture
+def fake_nomad_client(monkeypatch, reference_data):
+    """
+    Installs a fake `nomad.client` module whose parse() yields one entry archive
+    built from the reference data, and resets the cached client in fairtool.parse.
+    """
+    import sys
+    import types
+    import fairtool.parse as parse_module
+
+    archive_dict = copy.deepcopy(reference_data)
+    metadata_dict = {
+        "entry_name": reference_data["metadata"]["entry_name"],
+        "n_quantities": 99,
+        "quantities": ["dummy_q"],
+    }
+    calls = {"parse": 0, "normalize": 0}
+
+    def fake_parse(mainfile, *args, **kwargs):
+        calls["parse"] += 1
+        return [_FakeSection(archive_dict, metadata=_FakeSection(metadata_dict))]
+
+    def fake_normalize_all(entry_archive):
+        calls["normalize"] += 1
+
+    nomad_pkg = types.ModuleType("nomad")
+    client_mod = types.ModuleType("nomad.client")
+    client_mod.parse = fake_parse
+    client_mod.normalize_all = fake_normalize_all
+    nomad_pkg.client = client_mod
+    monkeypatch.setitem(sys.modules, "nomad", nomad_pkg)
+    monkeypatch.setitem(sys.modules, "nomad.client", client_mod)
+    monkeypatch.setattr(parse_module, "_nomad_client", None)
+    return calls
+
+
+def test_run_parser_inprocess_engine_matches_reference(tmp_path, monkeypatch, reference_data, fake_nomad_client):
+    """
+    The in-process engine should produce the same filtered output as the
+    subprocess engine, without spawning `nomad parse`.
+    """
+    mock_run = MagicMock(side_effect=AssertionError("subprocess must not be used"))
+    monkeypatch.setattr("subprocess.Popen", mock_run)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    for name in ("a", "b"):
+        input_file = tmp_path / name / "vasprun.xml"
+        input_file.parent.mkdir()
+        input_file.write_text("dummy")
+        (out_dir / name).mkdir()
+        assert run_parser(input_file, out_dir / name, force=True, engine="inprocess") is False
+
+    # Both files went through the same cached client
+    assert fake_nomad_client == {"parse": 2, "normalize": 2}
+    mock_run.assert_not_called()
+
+    produced = json.loads((out_dir / "a" / "fair_parsed_vasprun.json").read_text(encoding="utf-8"))
+    produced["metadata"].pop("fair_parse_time")
+    assert produced == reference_data
+
+
+def test_load_nomad_client_is_cached(fake_nomad_client):
+    """The NOMAD client is imported once and reused for every later call."""
+    from fairtool.parse import _load_nomad_client
+    assert _load_nomad_client() is _load_nomad_client()
+
+
+@patch("subprocess.Popen")
+def test_auto_engine_falls_back_to_subprocess(mock_popen, tmp_path, monkeypatch):
+    """When nomad-lab is not importable, 'auto' runs the `nomad parse` command."""
+    import sys
+    import fairtool.parse as parse_module
+    monkeypatch.setitem(sys.modules, "nomad", None)
+    monkeypatch.setattr(parse_module, "_nomad_client", None)
+
+    input_file = tmp_path / "vasprun.xml"
+    input_file.write_text("dummy")
+    mock_popen.side_effect = make_nomad_popen(json.dumps({"metadata": {}, "run": []}))
+
+    assert run_parser(input_file, tmp_path, force=True, engine="auto") is False
+    mock_popen.assert_called_once()
+
+
+# --- Streaming decoder ---
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 1 << 20])
+def test_iter_json_documents_streams_concatenated_output(reference_data, chunk_size):
+    """
+    Concatenated documents are decoded exactly like json.loads, whatever the
+    chunk boundaries, including escapes and brackets inside strings.
+    """
+    tricky = {"label": 'a "quoted" \\ {[ ]}', "values": [[1.5e-10, -2], [], {}], "flag": None}
+    stream = io.BytesIO(
+        (json.dumps(reference_data, indent=2) + "\n" + json.dumps(tricky) + "\n").encode("utf-8")
+    )
+
+    documents = list(_iter_json_documents(stream, chunk_size=chunk_size))
+
+    assert documents == [reference_data, tricky]
+
+
+def test_iter_json_documents_rejects_truncated_output():
+    """A document cut off by a crashing parser is reported, not silently dropped."""
+    with pytest.raises(json.JSONDecodeError):
+        list(_iter_json_documents(io.BytesIO(b'{"run": [{"calculation": [1, 2')))
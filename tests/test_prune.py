@@ -0,0 +1,76 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from fairtool.prune import prune_archive, resolve_profile
+from fairtool.summarize import extract_context, generate_markdown
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+@pytest.fixture(scope="module")
+def example06_data():
+    return json.loads(EXAMPLE06.read_text(encoding="utf-8"))
+
+
+def test_full_profile_drops_only_bookkeeping():
+    data = {
+        "entry_name": "x", "quantities": ["q"], "workflow2": {}, "results": {"a": 1},
+        "metadata": {"n_quantities": 3, "mainfile": "vasprun.xml"},
+        "run": [{"method": [{"k_mesh": {"points": {"re": [1], "im": [0]}}}],
+                 "calculation": [{"eigenvalues": [{"energies": [1.0]}]}]}],
+    }
+    original = copy.deepcopy(data)
+
+    pruned = prune_archive(data, "full")
+
+    assert pruned == {
+        "results": {"a": 1},
+        "metadata": {"mainfile": "vasprun.xml"},
+        "run": [{"method": [{"k_mesh": {"points": {"re": [1]}}}],
+                 "calculation": [{"eigenvalues": [{"energies": [1.0]}]}]}],
+    }
+    assert data == original  # The input is not modified
+
+
+def test_minimal_profile_keeps_energies_and_structure(example06_data):
+    pruned = prune_archive(example06_data, "minimal")
+
+    calc = pruned["run"][0]["calculation"][0]
+    assert set(calc) <= {"system_ref", "method_ref", "energy", "band_gap"}
+    assert calc["energy"] == example06_data["run"][0]["calculation"][0]["energy"]
+    assert pruned["run"][0]["system"] == example06_data["run"][0]["system"]
+    assert "method" not in pruned["run"][0]
+    assert len(json.dumps(pruned)) * 10 < len(json.dumps(example06_data))
+
+
+def test_summary_profile_produces_the_same_report(example06_data):
+    """The 'summary' profile keeps everything the Markdown report uses."""
+    pruned = prune_archive(example06_data, "summary")
+
+    assert "points" not in pruned["run"][0]["method"][0]["k_mesh"]
+    assert generate_markdown(extract_context(pruned)) == generate_markdown(extract_context(example06_data))
+
+
+def test_custom_profile_file_with_extra_paths(tmp_path, example06_data):
+    profile_file = tmp_path / "screening.yaml"
+    profile_file.write_text(
+        "extends: minimal\n"
+        "include: [run.calculation.forces]\n"
+        "exclude: [results.method]\n",
+        encoding="utf-8",
+    )
+
+    profile = resolve_profile(profile_file, exclude=["run.system.atoms.velocities", "metadata.*"])
+    pruned = prune_archive(example06_data, profile)
+
+    assert "forces" in pruned["run"][0]["calculation"][0]
+    assert "method" not in pruned["results"]
+    assert pruned["metadata"] == {}
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown pruning profile"):
+        resolve_profile("everything")
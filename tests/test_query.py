@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fairtool.query import parse_where
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "band_gap": [1.2, np.nan, 3.0, 0.5],
+        "scf_converged": pd.array([True, None, True, False], dtype="boolean"),
+        "formula": pd.array(["Si", "GaAs", None, "SiO2"], dtype="string"),
+        "n_atoms": pd.array([2, None, 3, 4], dtype="Int64"),
+    })
+
+
+@pytest.mark.parametrize("where, expected", [
+    ("scf_converged and band_gap > 1", [True, False, True, False]),
+    ("band_gap != 1.2", [False, False, True, True]),
+    ("not band_gap > 1", [False, True, False, True]),
+    ("'Si' in formula", [True, False, False, True]),
+    ("n_atoms in [2, 4]", [True, False, False, True]),
+    ("n_atoms not in (2, 4)", [False, True, True, False]),
+    ("1 <= band_gap < 3 or not scf_converged", [True, True, False, True]),
+    ("formula == 'Si' or n_atoms > -1", [True, False, True, True]),
+])
+def test_mask_and_arrow_expression_agree(frame, where, expected):
+    record_filter = parse_where(where)
+    assert record_filter.mask(frame).tolist() == expected
+
+    pyarrow = pytest.importorskip("pyarrow")
+    table = pyarrow.Table.from_pandas(frame)
+    assert table.filter(record_filter.expression()).num_rows == sum(expected)
+
+
+def test_columns_and_rejected_expressions(frame):
+    assert parse_where("scf_converged and (band_gap > 1 or 'Si' in formula)").columns == \
+        ["scf_converged", "band_gap", "formula"]
+    for where in ("band_gap + 1 > 2", "__import__('os').system('true')", "band_gap >", "band_gap > n_atoms"):
+        with pytest.raises(ValueError):
+            parse_where(where)
+    with pytest.raises(ValueError, match="colour"):
+        parse_where("colour == 'red'").mask(frame)
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+
+from fairtool.export import run_export
+from fairtool.structures import structure_from_archive
+from fairtool.visualize import get_structure_data
+
+from .conftest import VASP
+
+EXAMPLE06 = VASP / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+def test_final_structure_in_angstrom():
+    structure = structure_from_archive(json.loads(EXAMPLE06.read_text(encoding="utf-8")))
+
+    assert structure["species"] == ["Ac", "Ag"]
+    assert structure["pbc"] == [True, True, True]
+    np.testing.assert_allclose(np.linalg.norm(structure["cell"], axis=1), 4.6096985, atol=1e-6)
+    assert structure_from_archive({"run": [{"system": [{}]}]}) is None
+
+
+def test_optimade_jsonl(archives, tmp_path):
+    path = run_export(archives, tmp_path, "optimade")
+
+    header, *entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert path.name == "structures.jsonl"
+    assert header == {"x-optimade": {"meta": {"api_version": "1.1.0"}}}
+    assert len(entries) == 6
+    entry = {e["id"]: e for e in entries}["Advanced/example06/fair_parsed_vasprun.json"]
+    attributes = entry["attributes"]
+    assert entry["type"] == "structures"
+    assert attributes["chemical_formula_reduced"] == "AcAg"
+    assert attributes["nsites"] == len(attributes["cartesian_site_positions"]) == 2
+    assert attributes["_fair_energy_total"] == pytest.approx(-7.138442, abs=1e-6)
+
+
+def test_extxyz_and_ase_db(archives, tmp_path):
+    ase_io = pytest.importorskip("ase.io")
+    import ase.db
+
+    frames = ase_io.read(run_export(archives, tmp_path, "extxyz"), index=":")
+    assert len(frames) == 6
+    relax = {frame.info["id"]: frame for frame in frames}["Advanced/example06/fair_parsed_vasprun.json"]
+    assert relax.get_chemical_formula() == "AcAg"
+    assert relax.info["energy_total"] == pytest.approx(-7.138442, abs=1e-6)
+    assert relax.info["geometry_converged"] is False
+
+    db = ase.db.connect(str(run_export(archives, tmp_path, "ase-db")))
+    assert db.count() == 6
+    assert sorted(row.fair_formula for row in db.select("band_gap>1")) == ["AgCl6Cs2Hg", "Si"]
+    row = db.get(fair_id="Advanced/example06/fair_parsed_vasprun.json")
+    assert row.toatoms().get_potential_energy() == pytest.approx(-7.138442, abs=1e-6)
+
+
+def test_structure_data_for_the_viewer():
+    pytest.importorskip("pymatgen")
+    data = get_structure_data(json.loads(EXAMPLE06.read_text(encoding="utf-8")))
+    assert [site["label"] for site in data["sites"]] == ["Ac", "Ag"]
+    assert data["lattice"]["a"] == pytest.approx(4.6096985, abs=1e-6)
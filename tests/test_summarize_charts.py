@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fairtool.charts import downsample_minmax
+from fairtool.summarize import (
+    DOS_MAX_POINTS, extract_context, read_chart_data, run_summarization,
+    write_chart_data,
+)
+from fairtool.units import J_PER_EV
+
+EXAMPLE02 = Path(__file__).parent / "VASP" / "Basic" / "example02" / "fair_parsed_band_si_vasprun.json"
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+def _dos_archive(energies_ev, *totals, spin_polarized=False):
+    """Minimal archive holding one DOS block (totals given in states/eV, stored in SI units like NOMAD)."""
+    dos = {
+        "energies": list(np.asarray(energies_ev) * J_PER_EV),
+        "energy_fermi": 0.0,
+        "spin_polarized": spin_polarized,
+        "total": [{"value": list(np.asarray(values, dtype=float) / J_PER_EV)} for values in totals],
+    }
+    return {"run": [{"calculation": [{"dos_electronic": [dos]}]}]}
+
+
+def test_downsampling_keeps_peaks_and_end_points():
+    energies = np.linspace(-20, 10, 20000)
+    dos = np.exp(-energies ** 2)
+    dos[12345] = 50.0  # A single-point spike
+    rows = np.column_stack((energies, dos, -dos))
+
+    reduced = downsample_minmax(rows, 500)
+
+    assert len(reduced) <= 500
+    assert reduced[0].tolist() == rows[0].tolist() and reduced[-1].tolist() == rows[-1].tolist()
+    assert reduced[:, 1].max() == 50.0 and reduced[:, 2].min() == -50.0
+    assert np.all(np.diff(reduced[:, 0]) > 0)  # Still in energy order
+    assert downsample_minmax(rows, None) is rows
+    assert len(downsample_minmax(rows[:100], 500)) == 100
+
+
+def test_spin_polarized_rows():
+    context = extract_context(_dos_archive([-1.0, 0.0, 1.0], [1, 2, 3], [4, 5, 6], spin_polarized=True))
+
+    assert context["dos_is_spin_polarized"] is True
+    np.testing.assert_allclose(context["dos_chart_data"], [[-1, 1, -4], [0, 2, -5], [1, 3, -6]])
+
+
+def test_fine_dos_grid_sidecar_is_small(tmp_path):
+    energies = np.linspace(-30, 15, 20001)
+    dos = np.abs(np.sin(energies * 3)) * 4 + np.exp(-(energies - 2.5) ** 2 * 400) * 80
+    context = extract_context(_dos_archive(energies, dos))
+
+    chart_files = write_chart_data(context, tmp_path, "fair_summarized_fine")
+
+    sidecar = tmp_path / chart_files["dos"]
+    assert sidecar.name == "fair_summarized_fine.dos.bin"
+    assert sidecar.stat().st_size <= DOS_MAX_POINTS * 2 * 4  # float32 [energy, dos] rows
+    rows = read_chart_data(sidecar, 2, "dos")
+    assert rows[:, 1].max() == pytest.approx(dos.max(), rel=1e-6)
+
+
+def test_report_links_chart_sidecars(tmp_path):
+    run_summarization(EXAMPLE06, tmp_path)
+
+    report = (tmp_path / "fair_summarized_vasprun.md").read_text(encoding="utf-8")
+    assert "JSON.parse" not in report
+    assert report.count('id="scf_chart_div"') == 1
+    assert 'data-src="fair_summarized_vasprun.scf.bin"' in report
+
+    context = extract_context(json.loads(EXAMPLE06.read_text(encoding="utf-8")))
+    rows = read_chart_data(tmp_path / "fair_summarized_vasprun.scf.bin", 4, "scf")
+    assert len(rows) == len(context["scf_energies"])
+    assert rows[0, 1] == context["scf_energies"]["total"][0]
+
+
+def test_default_keeps_a_regular_dos_grid():
+    data = json.loads(EXAMPLE02.read_text(encoding="utf-8"))
+    n_energies = len(data["run"][0]["calculation"][0]["dos_electronic"][0]["energies"])
+
+    context = extract_context(data)
+
+    assert isinstance(context["dos_chart_data"], np.ndarray)
+    assert len(context["dos_chart_data"]) == min(n_energies, DOS_MAX_POINTS)
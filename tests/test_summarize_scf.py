@@ -0,0 +1,36 @@
+import numpy as np
+
+from fairtool.summarize import J_PER_EV, _generate_scf_energies_table, extract_scf_energies
+
+
+def _iteration(**energies):
+    return {"energy": {key: {"value": value * J_PER_EV} for key, value in energies.items()}}
+
+
+def test_single_pass_over_any_keys_with_nan_for_missing():
+    iterations = [
+        _iteration(total=-1.0, free=-1.1, xc=-0.5),
+        _iteration(total=-2.0),
+        {"energy": {"free": {}}},
+        {},
+    ]
+
+    table = extract_scf_energies(iterations, keys=("total", "free", "xc"))
+
+    assert table.dtype.names == ("step", "total", "free", "xc")
+    assert table["step"].tolist() == [1, 2, 3, 4]
+    np.testing.assert_allclose(table["total"], [-1.0, -2.0, np.nan, np.nan])
+    np.testing.assert_allclose(table["free"], [-1.1, np.nan, np.nan, np.nan])
+    np.testing.assert_allclose(table["xc"], [-0.5, np.nan, np.nan, np.nan])
+    assert len(extract_scf_energies([])) == 0
+
+
+def test_table_rows():
+    table = extract_scf_energies([_iteration(total=-1.0, free=-1.5, total_t0=-1.25), _iteration(total=-2.0)])
+
+    rendered = _generate_scf_energies_table({"scf_energies": table})
+
+    assert rendered.splitlines()[-2:] == [
+        "| 1 | -1.00000 | -1.50000 | -1.25000 |",
+        "| 2 | -2.00000 | N/A | N/A |",
+    ]
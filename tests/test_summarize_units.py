@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from fairtool.summarize import FIELD_UNITS, _convert_field, _format_field_numeric, convert_fields
+
+# Display units of FIELD_UNITS, as pint spells them
+PINT_DISPLAY_UNITS = {
+    "a": "angstrom", "b": "angstrom", "c": "angstrom",
+    "alpha": "degree", "beta": "degree", "gamma": "degree",
+    "volume": "angstrom**3", "atomic_density": "1/angstrom**3", "mass_density": "kg/angstrom**3",
+}
+
+
+@pytest.mark.parametrize("field", sorted(FIELD_UNITS))
+def test_factors_match_pint(field):
+    pint = pytest.importorskip("pint")
+    registry = pint.UnitRegistry()
+    si_unit, factor, _, fmt = FIELD_UNITS[field]
+    values = np.array([1.0, 3.21e-10, 5.4e-29, 2.09, 8.3e28, 4.2e3])
+
+    expected = (values * registry(si_unit)).to(PINT_DISPLAY_UNITS[field]).magnitude
+
+    np.testing.assert_allclose(convert_fields(values, field), expected, rtol=1e-14)
+    assert [format(v, fmt) for v in convert_fields(values, field)] == [format(v, fmt) for v in expected]
+
+
+def test_convert_field_formats_and_handles_missing():
+    assert _convert_field([5.4e-10], "a") == "5.400 Å"
+    assert _convert_field(np.pi / 2, "gamma", return_numeric=True) == pytest.approx(90.0)
+    assert _convert_field("unavailable", "volume", default="-") == "-"
+    assert _format_field_numeric("not a number", "a") is None
+    with pytest.raises(KeyError):
+        convert_fields([1.0], "energy")
+
+
+def test_summarize_does_not_import_pint():
+    code = "import sys, fairtool.summarize, fairtool.parse; print('pint' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,69 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("jinja2")
+
+from fairtool import templating
+from fairtool.summarize import extract_context, generate_markdown, run_summarization
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+@pytest.fixture(autouse=True)
+def template_cache(tmp_path, monkeypatch):
+    """Points the compiled-template cache into tmp_path with a fresh environment."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    templating._environment.cache_clear()
+    yield tmp_path / "cache" / "fairtool" / templating.TEMPLATE_CACHE_DIRNAME
+    templating._environment.cache_clear()
+
+
+def test_custom_template_sees_context_and_sections(tmp_path):
+    template = tmp_path / "short.md.j2"
+    template.write_text(
+        "# {{ title }}\n"
+        "Atoms: {{ t_original_data.n_atoms }}, missing: '{{ t_original_data.nothing.deeper }}'\n"
+        "{{ structure_viewer }}\n"
+        "{{ final_energies_table }}\n",
+        encoding="utf-8",
+    )
+    context = extract_context(json.loads(EXAMPLE06.read_text(encoding="utf-8")))
+
+    report = generate_markdown(context, template)
+
+    assert report.startswith(f"# {context['metadata']['entry_name']}\n")
+    assert f"Atoms: {context['t_original_data']['n_atoms']}, missing: ''" in report
+    assert '{{ structure_viewer("fair-structure.json") }}' in report
+    assert "- ### Final Calculation Energies" in report
+
+
+def test_templates_are_compiled_once_and_cached_by_content(tmp_path, template_cache):
+    first = tmp_path / "a" / "report.md.j2"
+    copy = tmp_path / "b" / "report.md.j2"
+    for path in (first, copy):
+        path.parent.mkdir()
+        path.write_text("{{ title }}!", encoding="utf-8")
+
+    assert templating.load_template(first) is templating.load_template(first)
+    templating.load_template(copy)
+    assert len(list(template_cache.iterdir())) == 1  # Same source, one compiled entry
+
+    # An edit is picked up (and compiled into a second entry)
+    first.write_text("{{ title }}?", encoding="utf-8")
+    os.utime(first, ns=(0, 1))
+    assert templating.render_template(first, {"title": "x"}) == "x?"
+    assert len(list(template_cache.iterdir())) == 2
+
+
+def test_run_summarization_with_template(tmp_path):
+    template = tmp_path / "layout.md.j2"
+    template.write_text("{{ title }}\n{{ scf_chart_html }}", encoding="utf-8")
+
+    assert run_summarization(EXAMPLE06, tmp_path / "out", str(template))
+    report = (tmp_path / "out" / "fair_summarized_vasprun.md").read_text(encoding="utf-8")
+    assert 'data-src="fair_summarized_vasprun.scf.bin"' in report
+
+    assert not run_summarization(EXAMPLE06, tmp_path / "out", str(tmp_path / "missing.j2"))
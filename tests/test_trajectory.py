@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fairtool.archive import ArchiveReader, save_archive
+from fairtool.summarize import run_summarization
+from fairtool.trajectory import EV_PER_ANGSTROM, J_PER_EV, extract_trajectory, iter_steps, load_trajectory
+
+EXAMPLE06 = Path(__file__).parent / "VASP" / "Advanced" / "example06" / "fair_parsed_vasprun.json"
+
+
+def _relaxation(n_steps=200, n_atoms=100):
+    """Archive of a relaxation whose forces shrink step by step (SI units, like NOMAD)."""
+    rng = np.random.default_rng(0)
+    calculations = []
+    for step in range(n_steps):
+        forces = rng.normal(size=(n_atoms, 3)) * EV_PER_ANGSTROM / (step + 1)
+        calculations.append({
+            "energy": {"total": {"value": (-10.0 - step * 1e-3) * J_PER_EV}},
+            "forces": {"total": {"value": forces.tolist()}},
+            "stress": {"total": {"value": (np.eye(3) * -1e9).tolist()}},
+            "eigenvalues": [{"energies": rng.normal(size=(1, 8, 40)).tolist()}],  # Never needed
+        })
+    return {"run": [{"program": {"name": "VASP"}, "calculation": calculations}]}
+
+
+def test_example06_trajectory():
+    data = json.loads(EXAMPLE06.read_text(encoding="utf-8"))
+    calculations = data["run"][0]["calculation"]
+
+    trajectory = extract_trajectory(EXAMPLE06)
+
+    assert trajectory["step"].tolist() == [1, 2, 3]
+    expected = [calc["energy"]["total"]["value"] / J_PER_EV for calc in calculations]
+    np.testing.assert_allclose(trajectory["energy_total"], expected)
+    assert np.isfinite(trajectory["pressure"]).all()
+    assert np.isnan(trajectory["temperature"]).all()
+
+
+def test_streams_msgpack_archive_one_step_at_a_time(tmp_path):
+    data = _relaxation()
+    json_file = tmp_path / "fair_parsed_relax.json"
+    binary = tmp_path / "fair_parsed_relax.msgpack"
+    save_archive(data, json_file)
+    save_archive(data, binary)
+
+    with ArchiveReader(binary) as reader:
+        steps = iter_steps(reader)
+        first = next(steps)
+        assert set(first) == {"energy", "forces", "stress"}  # eigenvalues are never decoded
+        assert sum(1 for _ in steps) == 199
+        assert len(reader._segments) <= 2  # Only the root and the calculation list are kept
+
+    from_binary = extract_trajectory(binary)
+    from_json = extract_trajectory(json_file)
+    for column, values in from_json.items():
+        np.testing.assert_allclose(from_binary[column], values, equal_nan=True)
+    assert from_binary["pressure"] == pytest.approx(np.ones(200))
+    assert from_binary["force_max"][0] > 10 * from_binary["force_max"][-1]
+
+
+def test_summary_of_a_relaxation_has_trajectory(tmp_path):
+    assert run_summarization(EXAMPLE06, tmp_path)
+
+    report = (tmp_path / "fair_summarized_vasprun.md").read_text(encoding="utf-8")
+    assert "### Trajectory (3 steps)" in report
+    assert 'data-src="fair_summarized_vasprun.trajectory_energy.bin"' in report
+    trajectory = load_trajectory(tmp_path / "fair_trajectory_vasprun.npz")
+    np.testing.assert_allclose(trajectory["energy_total"], extract_trajectory(EXAMPLE06)["energy_total"])